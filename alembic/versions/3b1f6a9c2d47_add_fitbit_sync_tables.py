@@ -0,0 +1,49 @@
+"""Add fitbit_daily_summary and sync_checkpoint tables
+
+Revision ID: 3b1f6a9c2d47
+Revises: f4300e2599e7
+Create Date: 2026-10-19 10:12:31.418207
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b1f6a9c2d47"
+down_revision: str | Sequence[str] | None = "f4300e2599e7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "fitbit_daily_summary",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("steps", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("active_zone_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("calories_out", sa.Integer(), nullable=True),
+        sa.Column(
+            "fetched_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("date"),
+    )
+    op.create_table(
+        "sync_checkpoint",
+        sa.Column("name", sa.String(64), nullable=False),
+        sa.Column("cursor_date", sa.Date(), nullable=True),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("sync_checkpoint")
+    op.drop_table("fitbit_daily_summary")
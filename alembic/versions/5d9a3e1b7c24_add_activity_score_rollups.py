@@ -0,0 +1,54 @@
+"""Add activity_score_daily and activity_score_rollup tables
+
+Revision ID: 5d9a3e1b7c24
+Revises: 8c2e4d7a1f90
+Create Date: 2026-10-19 15:27:08.904415
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d9a3e1b7c24"
+down_revision: str | Sequence[str] | None = "8c2e4d7a1f90"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "activity_score_daily",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("steps", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("active_zone_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("version", sa.String(16), nullable=False),
+        sa.PrimaryKeyConstraint("date"),
+    )
+    op.create_table(
+        "activity_score_rollup",
+        sa.Column("period", sa.String(8), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("days", sa.Integer(), nullable=False),
+        sa.Column("score_sum", sa.Float(), nullable=False),
+        sa.Column("score_min", sa.Float(), nullable=False),
+        sa.Column("score_max", sa.Float(), nullable=False),
+        sa.Column("steps_total", sa.Integer(), nullable=False),
+        sa.Column("active_zone_minutes_total", sa.Integer(), nullable=False),
+        sa.Column("longest_streak", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("period", "period_start"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("activity_score_rollup")
+    op.drop_table("activity_score_daily")
@@ -0,0 +1,43 @@
+"""Add fitbit_token table
+
+Revision ID: 8c2e4d7a1f90
+Revises: 3b1f6a9c2d47
+Create Date: 2026-10-19 14:03:52.611984
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c2e4d7a1f90"
+down_revision: str | Sequence[str] | None = "3b1f6a9c2d47"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "fitbit_token",
+        sa.Column("user_id", sa.String(32), nullable=False),
+        sa.Column("access_token", sa.Text(), nullable=False),
+        sa.Column("refresh_token", sa.Text(), nullable=False),
+        sa.Column("scope", sa.String(255), nullable=False, server_default=""),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("refresh_failures", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_index("ix_fitbit_token_expires_at", "fitbit_token", ["expires_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_fitbit_token_expires_at", table_name="fitbit_token")
+    op.drop_table("fitbit_token")
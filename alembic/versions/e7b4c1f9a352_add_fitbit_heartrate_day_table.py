@@ -0,0 +1,43 @@
+"""Add fitbit_heartrate_day table
+
+Revision ID: e7b4c1f9a352
+Revises: 5d9a3e1b7c24
+Create Date: 2026-10-19 17:02:41.318207
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7b4c1f9a352"
+down_revision: str | Sequence[str] | None = "5d9a3e1b7c24"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "fitbit_heartrate_day",
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False),
+        sa.Column("series", sa.LargeBinary(), nullable=False),
+        sa.Column("resting_heart_rate", sa.Float(), nullable=True),
+        sa.Column("fat_burn_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cardio_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("peak_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("active_zone_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "fetched_at", sa.DateTime(), server_default=sa.text("CURRENT_TIMESTAMP"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("date"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("fitbit_heartrate_day")
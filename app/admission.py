@@ -0,0 +1,271 @@
+"""
+Per-route admission control and load shedding.
+
+Requests are classified by path into priority classes:
+
+- critical (ADMISSION_CRITICAL_PATHS: health, readiness, metrics) bypass admission,
+- expensive (ADMISSION_EXPENSIVE_PATHS: upstream-bound routes) share a small pool,
+- interactive (everything else) share a larger pool.
+
+Each class is an AdmissionGate: a concurrency limit plus a bounded FIFO wait
+queue, so a spike on an expensive route queues (and sheds) against its own
+limit instead of occupying the workers cheap routes need.
+
+Shedding is CoDel-style: the gate watches how long admitted requests waited.
+Once every admission for a full ADMISSION_INTERVAL_MS has waited longer than
+ADMISSION_TARGET_DELAY_MS the queue is a standing queue, not a burst, and new
+arrivals that would have to wait are rejected at once with 503 + Retry-After
+until a request gets through under the target again. Requests are also shed
+when the queue is full or when they have waited ADMISSION_MAX_WAIT_MS.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app import deadline
+
+
+class Shed(Exception):
+    def __init__(self, gate: str, reason: str, retry_after_s: float):
+        super().__init__(f"{gate}: {reason}")
+        self.gate = gate
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+@dataclass
+class GateStats:
+    admitted: int = 0
+    queued: int = 0
+    shed_queue_full: int = 0
+    shed_standing_queue: int = 0
+    shed_timeout: int = 0
+
+
+class AdmissionGate:
+    def __init__(
+        self,
+        name: str,
+        *,
+        limit: int,
+        max_queue: int,
+        target_delay_s: float,
+        interval_s: float,
+        max_wait_s: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.target_delay_s = target_delay_s
+        self.interval_s = interval_s
+        self.max_wait_s = max_wait_s
+        self._clock = clock
+        self._active = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        # CoDel state: when the queue delay first stayed above target, and whether we shed
+        self._above_since: float | None = None
+        self._dropping = False
+        self._service_s = 0.0  # EWMA of time holding a slot, for Retry-After
+        self.stats = GateStats()
+
+    @property
+    def dropping(self) -> bool:
+        return self._dropping
+
+    def _on_admit(self, waited_s: float) -> None:
+        self.stats.admitted += 1
+        if waited_s < self.target_delay_s:
+            self._above_since = None
+            self._dropping = False
+            return
+        now = self._clock()
+        if self._above_since is None:
+            self._above_since = now
+        elif now - self._above_since >= self.interval_s:
+            self._dropping = True
+
+    def retry_after_s(self) -> float:
+        # Time for the current queue to drain through `limit` slots
+        backlog = (len(self._waiters) + 1) / max(1, self.limit)
+        return min(30.0, max(1.0, math.ceil(backlog * max(self._service_s, self.target_delay_s))))
+
+    def _shed(self, reason: str) -> Shed:
+        return Shed(self.name, reason, self.retry_after_s())
+
+    async def acquire(self) -> None:
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            self._on_admit(0.0)
+            return
+        if self._dropping:
+            self.stats.shed_standing_queue += 1
+            raise self._shed("standing queue above target delay")
+        if len(self._waiters) >= self.max_queue:
+            self.stats.shed_queue_full += 1
+            raise self._shed("queue full")
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats.queued += 1
+        enqueued = self._clock()
+        left = deadline.remaining()
+        timeout = self.max_wait_s if left is None else max(0.0, min(self.max_wait_s, left))
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except TimeoutError:
+            self.stats.shed_timeout += 1
+            raise self._shed("queue wait too long") from None
+        except BaseException:
+            # Cancelled (e.g. client disconnect) after a slot was handed over: give it back
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+        self._on_admit(self._clock() - enqueued)
+
+    def release(self, held_s: float | None = None) -> None:
+        if held_s is not None:
+            self._service_s = (
+                held_s if self._service_s == 0 else 0.8 * self._service_s + 0.2 * held_s
+            )
+        self._active -= 1
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next waiter
+                self._active += 1
+                waiter.set_result(None)
+                break
+
+    def snapshot(self) -> dict[str, Any]:
+        s = self.stats
+        return {
+            "limit": self.limit,
+            "active": self._active,
+            "queued_now": len(self._waiters),
+            "dropping": self._dropping,
+            "admitted": s.admitted,
+            "queued": s.queued,
+            "shed_queue_full": s.shed_queue_full,
+            "shed_standing_queue": s.shed_standing_queue,
+            "shed_timeout": s.shed_timeout,
+        }
+
+
+class AdmissionPolicy:
+    """Maps request paths to gates; paths matching `critical_paths` are never gated."""
+
+    def __init__(
+        self,
+        gates: dict[str, AdmissionGate],
+        *,
+        default: str,
+        path_classes: list[tuple[str, str]],
+        critical_paths: list[str],
+    ):
+        self.gates = gates
+        self.default = default
+        # Longest prefix first so specific routes win over broad ones
+        self.path_classes = sorted(path_classes, key=lambda pc: len(pc[0]), reverse=True)
+        self.critical_paths = critical_paths
+
+    def gate_for(self, path: str) -> AdmissionGate | None:
+        if any(path == p or path.startswith(p.rstrip("/") + "/") for p in self.critical_paths):
+            return None
+        for prefix, gate in self.path_classes:
+            if path.startswith(prefix):
+                return self.gates[gate]
+        return self.gates[self.default]
+
+    def snapshot(self) -> dict[str, Any]:
+        return {name: gate.snapshot() for name, gate in self.gates.items()}
+
+
+def _csv(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def build_policy(settings: Any) -> AdmissionPolicy:
+    common = dict(
+        target_delay_s=settings.admission_target_delay_ms / 1000,
+        interval_s=settings.admission_interval_ms / 1000,
+        max_wait_s=settings.admission_max_wait_ms / 1000,
+    )
+    gates = {
+        "expensive": AdmissionGate(
+            "expensive",
+            limit=settings.admission_expensive_limit,
+            max_queue=settings.admission_expensive_queue,
+            **common,
+        ),
+        "interactive": AdmissionGate(
+            "interactive",
+            limit=settings.admission_interactive_limit,
+            max_queue=settings.admission_interactive_queue,
+            **common,
+        ),
+    }
+    return AdmissionPolicy(
+        gates,
+        default="interactive",
+        path_classes=[(p, "expensive") for p in _csv(settings.admission_expensive_paths)],
+        critical_paths=_csv(settings.admission_critical_paths),
+    )
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, *, policy: AdmissionPolicy):
+        self.app = app
+        self.policy = policy
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        gate = self.policy.gate_for(scope["path"])
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await gate.acquire()
+        except Shed as exc:
+            await _send_shed(send, exc)
+            return
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(time.monotonic() - started)
+
+
+async def _send_shed(send: Send, exc: Shed) -> None:
+    payload = json.dumps({"detail": "Server busy, retry later", "reason": exc.reason}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+                (b"retry-after", str(int(exc.retry_after_s)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
@@ -1,34 +1,46 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
 import time
 from datetime import date, datetime
-from typing import Dict, Optional
+from typing import Any
 from urllib.parse import urlencode
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from fastapi.responses import RedirectResponse
+from pydantic import ValidationError
 
-from app.integrations.secret_store import SecretStore
+from app.config import get_settings
 from app.integrations.fitbit_client import (
-    FitbitClient,
     FITBIT_AUTH_URL,
+    FitbitClient,
     make_code_challenge,
     make_code_verifier,
+    secrets_store,
+)
+from app.integrations.fitbit_daily import SECTIONS, fetch_daily_sections, parse_include
+from app.integrations.fitbit_subscriptions import (
+    parse_notifications,
+    refresh_queue,
+    verify_signature,
 )
+from app.integrations.fitbit_tokens import token_store
+from app.responses import FastJSONResponse
+
+logger = logging.getLogger("app.fitbit.api")
 
 router = APIRouter(prefix="/fitbit", tags=["fitbit"])
 
 # NOTE: For Cloud Run (multi-instance), replace this with Redis/DB.
 # For a single-user personal integration, this can still work if you do auth quickly.
-_pkce_store: Dict[str, Dict[str, float | str]] = {}
+_pkce_store: dict[str, dict[str, float | str]] = {}
 
 PROJECT_ID = os.environ["PROJECT_ID"]
 REDIRECT_URI = os.environ["FITBIT_REDIRECT_URI"]
 SCOPE = os.environ.get("FITBIT_SCOPE", "activity heartrate sleep profile weight")
 
-secrets_store = SecretStore(PROJECT_ID)
-
 
 def _get_fitbit_client() -> FitbitClient:
     client_id = secrets_store.read("fitbit_client_id").strip()
@@ -42,7 +54,7 @@ async def _get_fresh_access_token() -> str:
     Always refresh using the stored refresh token.
     This avoids having to persist an access token at all.
     """
-    refresh_token = secrets_store.read("fitbit_refresh_token").strip()
+    refresh_token = secrets_store.read("fitbit_refresh_token", cache=False).strip()
     if not refresh_token:
         raise HTTPException(status_code=400, detail="Fitbit not connected yet. Run /auth/start.")
 
@@ -55,7 +67,7 @@ async def _get_fresh_access_token() -> str:
 
 
 @router.get("/auth/start")
-def auth_start():
+def auth_start() -> RedirectResponse:
     """
     Start OAuth2 PKCE flow.
     Redirects user to Fitbit consent screen.
@@ -82,7 +94,7 @@ def auth_start():
 
 
 @router.get("/auth/callback")
-async def auth_callback(code: Optional[str] = None, state: Optional[str] = None):
+async def auth_callback(code: str | None = None, state: str | None = None) -> dict[str, Any]:
     """
     Fitbit redirects here with ?code=...&state=...
     Exchanges code for tokens and persists refresh token in Secret Manager.
@@ -102,6 +114,14 @@ async def auth_callback(code: Optional[str] = None, state: Optional[str] = None)
 
     # Persist refresh token (as a new secret version)
     secrets_store.write_new_version("fitbit_refresh_token", tokens.refresh_token)
+    if tokens.user_id:
+        # Per-user copy (encrypted) for multi-user reads and the token sweeper. Best effort:
+        # the refresh token is already rotated above, and single-account deployments may
+        # have neither the fitbit_token table nor TOKEN_ENCRYPTION_KEYS.
+        try:
+            await asyncio.to_thread(token_store.save, tokens.user_id, tokens)
+        except Exception:
+            logger.exception("Could not store Fitbit tokens for user %s", tokens.user_id)
     print("Tokens:", tokens)
 
     return {
@@ -112,28 +132,73 @@ async def auth_callback(code: Optional[str] = None, state: Optional[str] = None)
     }
 
 
-@router.get("/profile")
-async def profile():
+@router.get("/profile", response_class=FastJSONResponse)
+async def profile() -> FastJSONResponse:
     access_token = await _get_fresh_access_token()
     client = _get_fitbit_client()
-    return await client.get_profile(access_token)
+    return FastJSONResponse(await client.get_profile(access_token))
 
 
-@router.get("/daily-summary")
+@router.get("/daily-summary", response_class=FastJSONResponse)
 async def daily_summary(
-    day: str = Query(default_factory=lambda: date.today().isoformat(), description="YYYY-MM-DD")
-):
-    access_token = await _get_fresh_access_token()
+    day: str = Query(default_factory=lambda: date.today().isoformat(), description="YYYY-MM-DD"),
+    include: str = Query(
+        ",".join(SECTIONS), description="Comma-separated sections: activity, sleep, heartrate"
+    ),
+) -> FastJSONResponse:
+    """
+    Selected sections are fetched concurrently. A section that fails or times
+    out is served from its last known value (listed under "stale") or, failing
+    that, omitted and listed under "errors"; only if every section is missing
+    does the request fail (502).
+    """
+    try:
+        sections = parse_include(include)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     client = _get_fitbit_client()
     d = datetime.strptime(day, "%Y-%m-%d").date()
 
-    activity = await client.get_daily_activity_summary(access_token, d)
-    sleep = await client.get_sleep(access_token, d)
-    heartrate = await client.get_heartrate_day(access_token, d)
+    fetched = await fetch_daily_sections(client, _get_fresh_access_token, d, sections)
+    if not fetched.data:
+        raise HTTPException(status_code=502, detail={"errors": fetched.errors})
 
-    return {
-        "date": d.isoformat(),
-        "activity": activity,
-        "sleep": sleep,
-        "heartrate": heartrate,
-    }
+    body = {"date": d.isoformat(), **{s: fetched.data[s] for s in sections if s in fetched.data}}
+    if fetched.errors:
+        body["errors"] = fetched.errors
+    if fetched.stale:
+        body["stale"] = fetched.stale
+    return FastJSONResponse(body)
+
+
+@router.get("/webhook", status_code=204)
+def webhook_verify(verify: str = Query(...)) -> Response:
+    """
+    Subscriber verification: Fitbit calls this with the correct code (expects
+    204) and with a wrong one (expects 404).
+    """
+    expected = get_settings().fitbit_subscriber_verification_code
+    if not expected or verify != expected:
+        raise HTTPException(status_code=404)
+    return Response(status_code=204)
+
+
+@router.post("/webhook", status_code=204)
+async def webhook_notify(request: Request) -> Response:
+    """
+    Subscription notifications. Must answer within Fitbit's deadline, so this
+    only checks the signature and enqueues the affected (collection, owner,
+    date) jobs; re-fetching and cache invalidation happen in the background.
+    """
+    body = await request.body()
+    client_secret = secrets_store.read("fitbit_client_secret").strip()
+    if not verify_signature(body, request.headers.get("X-Fitbit-Signature"), client_secret):
+        # Fitbit's guidance: answer 404 to notifications with a bad signature
+        raise HTTPException(status_code=404)
+    try:
+        notifications = parse_notifications(body)
+    except ValidationError as exc:
+        raise HTTPException(status_code=400, detail="Malformed notification payload") from exc
+
+    refresh_queue.enqueue(notifications)
+    return Response(status_code=204)
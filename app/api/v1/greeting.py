@@ -1,23 +1,32 @@
+import uuid
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db, record_write
+from app.greeting_cache import NOT_FOUND, greeting_cache, publish_invalidation
 from app.models import Greeting
+from app.responses import model_response
 from app.schemas import GreetingCreate, GreetingRead, GreetingUpdate
 
 DbSession = Annotated[Session, Depends(get_db)]  # optional alias
+ReadDbSession = Annotated[Session, Depends(get_read_db)]  # replica when available
 
 router = APIRouter(prefix="/greetings", tags=["greetings"])
 
 
 @router.get("/", response_model=list[GreetingRead])
-def list_greetings(db: DbSession) -> list[Greeting]:
-    return db.query(Greeting).all()
+def list_greetings(db: ReadDbSession) -> Response:
+    return model_response(db.query(Greeting).all(), list[GreetingRead], from_attributes=True)
 
 
-@router.post("/", response_model=GreetingRead, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=GreetingRead,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(record_write)],
+)
 def create_greeting(payload: GreetingCreate, db: DbSession) -> Greeting:
     obj = Greeting(**payload.model_dump())
     db.add(obj)
@@ -27,31 +36,44 @@ def create_greeting(payload: GreetingCreate, db: DbSession) -> Greeting:
 
 
 @router.get("/{greeting_id}", response_model=GreetingRead)
-def get_greeting(greeting_id: str, db: DbSession) -> Greeting:
-    obj = db.get(Greeting, greeting_id)
-    if not obj:
+def get_greeting(greeting_id: str, db: ReadDbSession) -> Response:
+    try:
+        key = uuid.UUID(greeting_id)
+    except ValueError:
+        raise HTTPException(404, "Greeting not found") from None
+    body = greeting_cache.get(key)
+    if body is None:
+        obj = db.get(Greeting, key)
+        body = NOT_FOUND
+        if obj is not None:
+            body = bytes(model_response(obj, GreetingRead, from_attributes=True).body)
+        greeting_cache.fill(key, body)
+    if body == NOT_FOUND:
         raise HTTPException(404, "Greeting not found")
-    return obj
-    pass
+    return Response(body, media_type="application/json")
 
 
-@router.patch("/{greeting_id}", response_model=GreetingRead)
+@router.patch("/{greeting_id}", response_model=GreetingRead, dependencies=[Depends(record_write)])
 def update_greeting(greeting_id: str, payload: GreetingUpdate, db: DbSession) -> Greeting:
     obj = db.get(Greeting, greeting_id)
     if not obj:
         raise HTTPException(404, "Greeting not found")
     for k, v in payload.model_dump(exclude_unset=True).items():
         setattr(obj, k, v)
+    publish_invalidation(db, obj.id)
     db.commit()
+    greeting_cache.invalidate(obj.id)
     db.refresh(obj)
     return obj
 
 
-@router.delete("/{greeting_id}", response_model=dict)
+@router.delete("/{greeting_id}", response_model=dict, dependencies=[Depends(record_write)])
 def delete_greeting(greeting_id: str, db: DbSession) -> dict[str, bool]:
     obj = db.get(Greeting, greeting_id)
     if not obj:
         raise HTTPException(404, "Greeting not found")
+    publish_invalidation(db, obj.id)
     db.delete(obj)
     db.commit()
+    greeting_cache.invalidate(obj.id)
     return {"success": True}
@@ -0,0 +1,118 @@
+# app/cache.py
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar, cast
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    stale_hits: int = 0
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe, size-bounded LRU cache with per-entry expiry.
+
+    `ttl_s=None` means entries never expire (they can still be evicted by size).
+    With `keep_stale=True` expired entries stay until evicted or deleted so
+    `get_stale` can serve them as a fallback when the source is unavailable.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl_s: float | None = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        keep_stale: bool = False,
+    ):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self.keep_stale = keep_stale
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.stats.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= self._clock():
+                if not self.keep_stale:
+                    del self._data[key]
+                self.stats.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def get_stale(self, key: K, default: Any = None) -> V | Any:
+        """The entry for `key` even if expired (only kept with keep_stale=True)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            self.stats.stale_hits += 1
+            return item[0]
+
+    def peek(self, key: K) -> bool:
+        """True if `key` holds a live entry; unlike `in`, touches neither stats nor LRU order."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False
+            expires_at = item[1]
+            return expires_at is None or expires_at > self._clock()
+
+    def set(self, key: K, value: V, ttl_s: float | None | object = _MISSING) -> None:
+        ttl = self.ttl_s if ttl_s is _MISSING else cast("float | None", ttl_s)
+        expires_at = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key: K) -> bool:
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key, _MISSING) is not _MISSING  # type: ignore[arg-type]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def snapshot(self) -> dict[str, Any]:
+        s = self.stats
+        total = s.hits + s.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": s.hits,
+            "misses": s.misses,
+            "evictions": s.evictions,
+            "stale_hits": s.stale_hits,
+            "hit_rate": round(s.hits / total, 3) if total else None,
+        }
@@ -20,10 +20,124 @@ class Settings(BaseModel):
     db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
     db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
     db_pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle_s: int = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+    # Ping pooled connections only after this much idle time (-1 disables)
+    db_pool_ping_idle_s: float = float(os.getenv("DB_POOL_PING_IDLE_S", "30"))
+    # "static" (DB_POOL_SIZE/DB_MAX_OVERFLOW) or "budget" (split DB_CONNECTION_BUDGET)
+    db_pool_mode: str = os.getenv("DB_POOL_MODE", "static")
+    db_connection_budget: int = int(os.getenv("DB_CONNECTION_BUDGET", "90"))
+    db_max_instances: int = int(os.getenv("DB_MAX_INSTANCES", "5"))
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "1"))
     db_statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    db_slow_query_ms: int = int(os.getenv("DB_SLOW_QUERY_MS", "500"))  # 0 disables the log
+    db_explain_slow_queries: bool = os.getenv("DB_EXPLAIN_SLOW_QUERIES", "false").lower() == "true"
     allow_origins: str = os.getenv("ALLOW_ORIGINS", "*")
+    # End-to-end request deadline; clients may ask for less (never more than the max)
+    # with X-Request-Timeout-Ms. 0 disables.
+    request_deadline_s: float = float(os.getenv("REQUEST_DEADLINE_S", "30"))
+    request_deadline_max_s: float = float(os.getenv("REQUEST_DEADLINE_MAX_S", "60"))
+    gsi_range_deadline_s: float = float(os.getenv("GSI_RANGE_DEADLINE_S", "20"))
+    # Admission control (app/admission.py): per-class concurrency limits and load shedding.
+    # Off until measured against the deployment (see README "Load testing")
+    admission_enabled: bool = os.getenv("ADMISSION_ENABLED", "false").lower() == "true"
+    admission_critical_paths: str = os.getenv("ADMISSION_CRITICAL_PATHS", "/info,/ready,/metrics")
+    admission_expensive_paths: str = os.getenv(
+        "ADMISSION_EXPENSIVE_PATHS",
+        "/api/v1/gsi/activity-score/range,/api/v1/gsi/activity-score/export,/api/v1/fitbit/daily-summary",
+    )
+    admission_expensive_limit: int = int(os.getenv("ADMISSION_EXPENSIVE_LIMIT", "8"))
+    admission_expensive_queue: int = int(os.getenv("ADMISSION_EXPENSIVE_QUEUE", "32"))
+    admission_interactive_limit: int = int(os.getenv("ADMISSION_INTERACTIVE_LIMIT", "64"))
+    admission_interactive_queue: int = int(os.getenv("ADMISSION_INTERACTIVE_QUEUE", "256"))
+    admission_target_delay_ms: float = float(os.getenv("ADMISSION_TARGET_DELAY_MS", "100"))
+    admission_interval_ms: float = float(os.getenv("ADMISSION_INTERVAL_MS", "1000"))
+    admission_max_wait_ms: float = float(os.getenv("ADMISSION_MAX_WAIT_MS", "5000"))
     db_socket_dir: str = os.getenv("DB_SOCKET_DIR", "/cloudsql")
     cloudsql_connection_name: str = os.getenv("CLOUDSQL_CONNECTION_NAME", "")
+    # Read replica (optional): DB_REPLICA_HOST locally, CLOUDSQL_REPLICA_CONNECTION_NAME on Cloud Run
+    db_replica_host: str = os.getenv("DB_REPLICA_HOST", "")
+    db_replica_port: int = int(os.getenv("DB_REPLICA_PORT", "0"))
+    cloudsql_replica_connection_name: str = os.getenv("CLOUDSQL_REPLICA_CONNECTION_NAME", "")
+    db_replica_max_lag_s: float = float(os.getenv("DB_REPLICA_MAX_LAG_S", "5"))
+    db_replica_lag_check_s: float = float(os.getenv("DB_REPLICA_LAG_CHECK_S", "2"))
+    db_read_your_writes_s: float = float(os.getenv("DB_READ_YOUR_WRITES_S", "5"))
+    # GET /greetings/{id} cache (app/greeting_cache.py). Writes invalidate it locally; set
+    # GREETING_CACHE_CHANNEL to also invalidate every instance through Postgres NOTIFY (each
+    # instance then holds one LISTEN connection)
+    # GREETING_CACHE_NEGATIVE_TTL_S applies to 404s
+    greeting_cache_ttl_s: float = float(os.getenv("GREETING_CACHE_TTL_S", "60"))  # 0 disables
+    greeting_cache_negative_ttl_s: float = float(os.getenv("GREETING_CACHE_NEGATIVE_TTL_S", "5"))
+    greeting_cache_maxsize: int = int(os.getenv("GREETING_CACHE_MAXSIZE", "10000"))
+    greeting_cache_channel: str = os.getenv("GREETING_CACHE_CHANNEL", "")  # e.g. "greeting_cache"
+    # Point at the local emulator (app.integrations.emulators.fitbit) for load tests
+    fitbit_api_base: str = os.getenv("FITBIT_API_BASE", "https://api.fitbit.com")
+    # "gcp" uses Secret Manager; "memory" uses the in-process fake (tests / load tests)
+    secret_store_backend: str = os.getenv("SECRET_STORE_BACKEND", "gcp")
+    secret_store_seed_file: str = os.getenv("SECRET_STORE_SEED_FILE", "")
+    secret_cache_ttl_s: float = float(os.getenv("SECRET_CACHE_TTL_S", "300"))  # 0 disables
+    # Startup warm-up and background readiness probing
+    warmup_enabled: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    db_warmup_connections: int = int(os.getenv("DB_WARMUP_CONNECTIONS", "2"))
+    # Per warm-up step, so an unreachable dependency cannot hold up startup; 0 disables
+    warmup_timeout_s: float = float(os.getenv("WARMUP_TIMEOUT_S", "3"))
+    readiness_probe_interval_s: float = float(os.getenv("READINESS_PROBE_INTERVAL_S", "10"))
+    # "fitbit" fetches summaries on demand; "local" serves only what the sync worker stored
+    gsi_summary_source: str = os.getenv("GSI_SUMMARY_SOURCE", "fitbit")
+    gsi_summary_cache_ttl_s: float = float(
+        os.getenv("GSI_SUMMARY_CACHE_TTL_S", "300")
+    )  # 0 disables
+    gsi_summary_cache_maxsize: int = int(os.getenv("GSI_SUMMARY_CACHE_MAXSIZE", "4096"))
+    # Days of a range the GSI pipeline (app/gsi/pipeline.py) fetches from Fitbit at once
+    gsi_pipeline_concurrency: int = int(os.getenv("GSI_PIPELINE_CONCURRENCY", "4"))
+    # Calculator version materialized into activity_score_daily and the rollups; after
+    # changing it, run `python -m app.workers.recompute` to re-score stored history
+    gsi_score_version: str = os.getenv("GSI_SCORE_VERSION", "2.0.0")
+    recompute_batch_size: int = int(os.getenv("RECOMPUTE_BATCH_SIZE", "1000"))
+    # Bulk export (/gsi/activity-score/export, app.workers.export): days fetched and encoded
+    # per chunk (one Parquet row group); over HTTP each chunk gets GSI_RANGE_DEADLINE_S
+    export_chunk_days: int = int(os.getenv("EXPORT_CHUNK_DAYS", "31"))
+    # Rollups: a day counts towards a streak when its V2 score is at least this (V2 tops out at 5)
+    gsi_rollup_streak_min_score: float = float(os.getenv("GSI_ROLLUP_STREAK_MIN_SCORE", "4.0"))
+    # "fitbit" calls the Active Zone Minutes endpoint; "intraday" computes AZM from the day's
+    # intraday heart rate, stored in fitbit_heartrate_day (needs numpy, requirements-analytics.txt)
+    gsi_azm_source: str = os.getenv("GSI_AZM_SOURCE", "fitbit")
+    fitbit_heartrate_detail_level: str = os.getenv(
+        "FITBIT_HEARTRATE_DETAIL_LEVEL", "1sec"
+    )  # "1min"
+    # Days before the requested one to warm into the summary cache after /day; 0 disables
+    gsi_prefetch_days: int = int(os.getenv("GSI_PREFETCH_DAYS", "0"))
+    # Fitbit subscriptions: the code shown when adding the subscriber in dev.fitbit.com
+    fitbit_subscriber_verification_code: str = os.getenv("FITBIT_SUBSCRIBER_VERIFICATION_CODE", "")
+    # /fitbit/daily-summary and the GSI pipeline: per-section upstream timeout and cache. Days at least
+    # FITBIT_FINALIZED_AFTER_DAYS old are final and cached until evicted.
+    fitbit_section_timeout_s: float = float(os.getenv("FITBIT_SECTION_TIMEOUT_S", "8"))
+    # FITBIT_SECTION_CACHE_TTL_S applies to recent days; 0 disables the cache for all days
+    fitbit_section_cache_ttl_s: float = float(os.getenv("FITBIT_SECTION_CACHE_TTL_S", "60"))
+    fitbit_section_cache_maxsize: int = int(os.getenv("FITBIT_SECTION_CACHE_MAXSIZE", "1024"))
+    fitbit_finalized_after_days: int = int(os.getenv("FITBIT_FINALIZED_AFTER_DAYS", "2"))
+    # Per endpoint family: open after N consecutive upstream failures, probe again after reset
+    fitbit_breaker_failure_threshold: int = int(os.getenv("FITBIT_BREAKER_FAILURE_THRESHOLD", "5"))
+    fitbit_breaker_reset_s: float = float(os.getenv("FITBIT_BREAKER_RESET_S", "30"))
+    # Per-user Fitbit tokens (fitbit_token table). Keys: comma-separated Fernet keys, newest
+    # first; empty reads the token_encryption_keys secret instead.
+    token_encryption_keys: str = os.getenv("TOKEN_ENCRYPTION_KEYS", "")
+    fitbit_token_refresh_skew_s: float = float(os.getenv("FITBIT_TOKEN_REFRESH_SKEW_S", "300"))
+    fitbit_token_sweeper_in_process: bool = (
+        os.getenv("FITBIT_TOKEN_SWEEPER_IN_PROCESS", "false").lower() == "true"
+    )
+    fitbit_token_sweep_interval_s: float = float(os.getenv("FITBIT_TOKEN_SWEEP_INTERVAL_S", "60"))
+    fitbit_token_sweep_horizon_s: float = float(os.getenv("FITBIT_TOKEN_SWEEP_HORIZON_S", "900"))
+    fitbit_token_sweep_batch_size: int = int(os.getenv("FITBIT_TOKEN_SWEEP_BATCH_SIZE", "200"))
+    fitbit_token_sweep_concurrency: int = int(os.getenv("FITBIT_TOKEN_SWEEP_CONCURRENCY", "8"))
+    # Raw per-day Fitbit responses are appended here (app.integrations.fitbit_archive); "" disables
+    fitbit_archive_dir: str = os.getenv("FITBIT_ARCHIVE_DIR", "")
+    fitbit_sync_in_process: bool = os.getenv("FITBIT_SYNC_IN_PROCESS", "false").lower() == "true"
+    fitbit_sync_interval_s: float = float(os.getenv("FITBIT_SYNC_INTERVAL_S", "900"))
+    fitbit_sync_recent_days: int = int(os.getenv("FITBIT_SYNC_RECENT_DAYS", "3"))
+    fitbit_sync_backfill_days: int = int(os.getenv("FITBIT_SYNC_BACKFILL_DAYS", "365"))
+    fitbit_sync_chunk_days: int = int(os.getenv("FITBIT_SYNC_CHUNK_DAYS", "7"))
+    # Calls left for interactive traffic; the worker pauses below this
+    fitbit_sync_min_remaining: int = int(os.getenv("FITBIT_SYNC_MIN_REMAINING", "30"))
 
 
 @lru_cache(maxsize=1)
@@ -0,0 +1,41 @@
+# app/crypto.py
+from __future__ import annotations
+
+from functools import lru_cache
+
+from cryptography.fernet import Fernet, MultiFernet
+
+from app.config import get_settings
+
+
+def _keys() -> list[str]:
+    raw = get_settings().token_encryption_keys
+    if not raw:
+        # Deployed instances keep the keys in Secret Manager rather than the environment
+        from app.integrations.fitbit_client import secrets_store
+
+        raw = secrets_store.read("token_encryption_keys")
+    return [k.strip() for k in raw.split(",") if k.strip()]
+
+
+@lru_cache(maxsize=1)
+def get_token_cipher() -> MultiFernet:
+    """
+    Cipher for secrets stored in the database (Fitbit tokens).
+
+    TOKEN_ENCRYPTION_KEYS is a comma-separated list of Fernet keys, newest
+    first: values are encrypted with the first key and decrypted with any, so
+    a key can be rotated by prepending a new one (and re-saving the rows).
+    """
+    keys = _keys()
+    if not keys:
+        raise RuntimeError("TOKEN_ENCRYPTION_KEYS is not set")
+    return MultiFernet([Fernet(k.encode()) for k in keys])
+
+
+def encrypt(value: str) -> str:
+    return get_token_cipher().encrypt(value.encode()).decode("ascii")
+
+
+def decrypt(value: str) -> str:
+    return get_token_cipher().decrypt(value.encode("ascii")).decode()
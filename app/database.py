@@ -5,12 +5,17 @@ import urllib.parse
 from collections.abc import Generator
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import QueuePool
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, SessionTransaction, sessionmaker
 
+from app import deadline
 from app.config import get_settings
+from app.db_instrumentation import instrument_engine
+from app.db_pool import InstrumentedQueuePool, compute_pool_sizing, install_idle_ping, pool_stats
+from app.db_routing import ReplicaRouter
+from app.metrics import register_collector
 
 # ---------------------------
 # Settings & URL construction
@@ -19,14 +24,16 @@ from app.config import get_settings
 settings = get_settings()
 
 
-def _build_db_url_from_parts() -> str | None:
+def _build_db_url_from_parts(
+    host: str | None = None, port: int | None = None, conn_name: str | None = None
+) -> str | None:
     user = settings.db_user
     pwd_raw = settings.db_password
     dbname = settings.db_name
-    host = settings.db_host
-    port = settings.db_port
+    host = settings.db_host if host is None else host
+    port = settings.db_port if port is None else port
     socket_dir = settings.db_socket_dir
-    conn_name = settings.cloudsql_connection_name
+    conn_name = settings.cloudsql_connection_name if conn_name is None else conn_name
     env = settings.env
 
     if not user or not pwd_raw or not dbname:
@@ -58,6 +65,20 @@ def get_database_url() -> str:
     raise RuntimeError("Database URL not configured.")
 
 
+def replicas_enabled() -> bool:
+    return bool(settings.db_replica_host or settings.cloudsql_replica_connection_name)
+
+
+def get_replica_database_url() -> str | None:
+    if not replicas_enabled():
+        return None
+    return _build_db_url_from_parts(
+        host=settings.db_replica_host,
+        port=settings.db_replica_port or settings.db_port,
+        conn_name=settings.cloudsql_replica_connection_name,
+    )
+
+
 # ---------------
 # Engine & Session
 # ---------------
@@ -66,29 +87,54 @@ _ENGINE: Engine | None = None
 _SessionLocal: sessionmaker | None = None
 
 
-def _create_engine() -> Engine:
-    url = get_database_url()
+def _create_engine(url: str | None = None, metrics_name: str = "db_pool") -> Engine:
+    url = url or get_database_url()
+    pool_size, max_overflow = compute_pool_sizing(settings)
+    connect_args = {}
+    stmt_timeout_ms = settings.db_statement_timeout_ms
+    if stmt_timeout_ms and url.startswith("postgresql+psycopg2"):
+        # Default statement timeout (ms) for every pooled connection, set at connect time
+        connect_args["options"] = f"-c statement_timeout={int(stmt_timeout_ms)}"
     # Pool settings tuned for API usage; adjust as needed
     engine = create_engine(
         url,
-        poolclass=QueuePool,
-        pool_size=settings.db_pool_size,
-        max_overflow=settings.db_max_overflow,
+        connect_args=connect_args,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
         pool_timeout=settings.db_pool_timeout,  # seconds
-        pool_pre_ping=True,  # validates connections from pool
+        pool_recycle=settings.db_pool_recycle_s,  # seconds
         future=True,
     )
-
-    # Optional: set a statement timeout (ms) for all connections
-    stmt_timeout_ms = settings.db_statement_timeout_ms
-    if stmt_timeout_ms:
-        with engine.connect() as conn:
-            conn.execute(text(f"SET statement_timeout = {int(stmt_timeout_ms)}"))
-            conn.commit()
+    # Validates only connections that sat idle past the threshold (cheaper than pool_pre_ping)
+    install_idle_ping(engine, settings.db_pool_ping_idle_s)
+    instrument_engine(engine)
+    register_collector(metrics_name, lambda: pool_stats(engine))
 
     return engine
 
 
+@event.listens_for(Session, "after_begin")
+def _apply_request_deadline(
+    session: Session, transaction: SessionTransaction, connection: Connection
+) -> None:
+    """
+    Inside a request with a deadline, cap Postgres statements in this
+    transaction to the time left (SET LOCAL ends with the transaction).
+    """
+    left = deadline.remaining()
+    if left is None:
+        return
+    if left <= 0:
+        raise deadline.DeadlineExceeded("Request deadline exceeded before the query started")
+    if connection.dialect.name != "postgresql":
+        return
+    timeout_ms = max(1, int(left * 1000))
+    if settings.db_statement_timeout_ms and timeout_ms >= settings.db_statement_timeout_ms:
+        return
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+
 def get_engine() -> Engine:
     global _ENGINE, _SessionLocal
     if _ENGINE is None:
@@ -103,6 +149,30 @@ def get_sessionmaker() -> sessionmaker:
     return _SessionLocal
 
 
+_ROUTER: ReplicaRouter | None = None
+
+
+def get_replica_router() -> ReplicaRouter | None:
+    """Router for read-only sessions, or None when no replica is configured."""
+    global _ROUTER
+    if _ROUTER is None and replicas_enabled():
+        replica_url = get_replica_database_url()
+        replica = None
+        if replica_url:
+            replica_engine = _create_engine(replica_url, metrics_name="db_pool_replica")
+            replica = sessionmaker(
+                bind=replica_engine, autoflush=False, autocommit=False, future=True
+            )
+        _ROUTER = ReplicaRouter(
+            get_sessionmaker(),
+            replica,
+            max_lag_s=settings.db_replica_max_lag_s,
+            lag_check_interval_s=settings.db_replica_lag_check_s,
+            sticky_s=settings.db_read_your_writes_s,
+        )
+    return _ROUTER
+
+
 @contextmanager
 def session_scope() -> Generator[Session, None, None]:
     """
@@ -140,11 +210,70 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def client_key(request: Request) -> str:
+    """Identity used for read-your-writes stickiness."""
+    return request.headers.get("x-client-id") or (
+        request.client.host if request.client else "anonymous"
+    )
+
+
+def get_read_sessionmaker(client_key: str | None = None) -> sessionmaker:
+    router = get_replica_router()
+    return router.read_sessionmaker(client_key) if router else get_sessionmaker()
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    FastAPI dependency for read-only handlers: uses the replica when it is
+    healthy, caught up and the client has not written recently.
+    """
+    db = get_read_sessionmaker(client_key(request))()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def record_write(request: Request) -> Generator[None, None, None]:
+    """
+    Route dependency for handlers that write: pins the client's reads to the
+    primary for DB_READ_YOUR_WRITES_S seconds after the write.
+    """
+    router = get_replica_router()
+    if router is None:
+        yield
+        return
+    key = client_key(request)
+    router.mark_write(key)
+    try:
+        yield
+    finally:
+        router.mark_write(key)  # window starts once the write has finished
+
+
 # -------------
 # Health checks
 # -------------
 
 
+def warm_pool(connections: int, engine: Engine | None = None) -> int:
+    """
+    Open `connections` pool connections at once and return them to the pool,
+    so the first requests after a cold start skip connection setup.
+    """
+    engine = engine or get_engine()
+    opened = []
+    try:
+        for _ in range(max(0, connections)):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
 def ping() -> bool:
     """
     Lightweight connectivity check you can call in a health endpoint.
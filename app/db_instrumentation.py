@@ -0,0 +1,183 @@
+# app/db_instrumentation.py
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+
+logger = logging.getLogger("app.db.slow_query")
+
+settings = get_settings()
+
+# ---------------------------
+# Per-request statement stats
+# ---------------------------
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    parent: QueryStats | None = None
+
+    def record(self, elapsed_ms: float) -> None:
+        stats: QueryStats | None = self
+        while stats is not None:
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats = stats.parent
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("db_query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Generator[QueryStats, None, None]:
+    """
+    Count statements executed in the current context:
+        with track_queries() as stats:
+            ...
+        stats.count, stats.total_ms
+
+    Scopes nest; an outer scope also sees the statements of inner ones.
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+# ---------------------------
+# Slow-query log & EXPLAIN
+# ---------------------------
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Keep the shape of bound parameters but drop their values."""
+    if isinstance(parameters, dict):
+        return {k: "?" for k in parameters}
+    if isinstance(parameters, list | tuple):
+        if parameters and isinstance(parameters[0], dict | list | tuple):
+            return f"<{len(parameters)} parameter sets>"
+        return ["?"] * len(parameters)
+    return "?" if parameters is not None else None
+
+
+def _explain(conn: Connection, statement: str, parameters: Any) -> str | None:
+    # EXPLAIN ANALYZE executes the statement again, so only do it for reads.
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return None
+    try:
+        dbapi_conn = conn.connection.dbapi_connection
+        assert dbapi_conn is not None
+        cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            return "\n".join(str(row[0]) for row in cursor.fetchall())
+        finally:
+            cursor.close()
+    except Exception as exc:  # never fail the real query because of diagnostics
+        return f"<explain failed: {exc}>"
+
+
+def instrument_engine(
+    engine: Engine,
+    *,
+    slow_query_ms: float | None = None,
+    explain_slow_queries: bool | None = None,
+) -> Engine:
+    """
+    Attach before/after_cursor_execute listeners to `engine`.
+
+    Statements are counted into the active `track_queries()` scope, and any
+    statement slower than `slow_query_ms` (0 disables) is logged with redacted
+    parameters, plus its EXPLAIN (ANALYZE, BUFFERS) plan on Postgres when enabled.
+    """
+    threshold = settings.db_slow_query_ms if slow_query_ms is None else slow_query_ms
+    explain = (
+        settings.db_explain_slow_queries if explain_slow_queries is None else explain_slow_queries
+    )
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(elapsed_ms)
+
+        if threshold <= 0 or elapsed_ms < threshold:
+            return
+        plan = None
+        if explain and not executemany and conn.dialect.name == "postgresql":
+            plan = _explain(conn, statement, parameters)
+        logger.warning(
+            "Slow query (%.1f ms): %s | params=%s%s",
+            elapsed_ms,
+            " ".join(statement.split()),
+            redact_parameters(parameters),
+            f"\n{plan}" if plan else "",
+        )
+
+    return engine
+
+
+# -----------------------
+# ASGI middleware
+# -----------------------
+
+
+class QueryStatsMiddleware:
+    """
+    Tracks statements per HTTP request and reports them as
+    X-DB-Query-Count / X-DB-Time-Ms response headers (non-prod only).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.total_ms:.2f}".encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
@@ -0,0 +1,116 @@
+"""
+Postgres LISTEN/NOTIFY for keeping per-instance caches coherent.
+
+A write calls `notify(db, channel, payload)` inside its transaction; Postgres
+delivers the notification only if the transaction commits. Every instance
+runs a `PgNotifyListener` on a dedicated connection (detached from the pool)
+that hands each payload to a callback, e.g. to drop a cache entry.
+
+Notifications sent while a listener is disconnected are lost, so `on_connect`
+runs after every (re)connect (typically: clear the cache). On databases other
+than Postgres `notify` does nothing and the listener exits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("app.db_notify")
+
+
+def notify(db: Session, channel: str, payload: str) -> None:
+    """Queue a notification in `db`'s transaction; it is sent on commit."""
+    if not channel or db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload}
+    )
+
+
+def _listen_connection(channel: str) -> Any | None:
+    """A psycopg2 connection LISTENing on `channel`, or None when the database is not Postgres."""
+    from app.database import get_engine
+
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        return None
+    pooled = engine.raw_connection()
+    pooled.detach()  # held for the listener's lifetime: keep it out of the request pool
+    conn = pooled.driver_connection
+    if conn is None:
+        raise RuntimeError("Listener connection was invalidated before LISTEN")
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute('LISTEN "{}"'.format(channel.replace('"', '""')))
+    return conn
+
+
+class PgNotifyListener:
+    def __init__(
+        self,
+        channel: str,
+        on_notify: Callable[[str], None],
+        *,
+        on_connect: Callable[[], None] = lambda: None,
+        connect: Callable[[], Any | None] | None = None,
+        retry_s: float = 5.0,
+        max_retry_s: float = 60.0,
+    ):
+        self.channel = channel
+        self._on_notify = on_notify
+        self._on_connect = on_connect
+        self._connect = connect or (lambda: _listen_connection(channel))
+        self.retry_s = retry_s
+        self.max_retry_s = max_retry_s
+        self.received = 0
+        self.reconnects = 0
+
+    async def _listen(self, conn: Any) -> None:
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        fd = conn.fileno()
+        loop.add_reader(fd, readable.set)
+        try:
+            while True:
+                await readable.wait()
+                readable.clear()
+                conn.poll()  # raises once the server has gone away
+                while conn.notifies:
+                    self.received += 1
+                    self._on_notify(conn.notifies.pop(0).payload)
+        finally:
+            loop.remove_reader(fd)
+
+    async def run_forever(self) -> None:
+        delay = self.retry_s
+        while True:
+            conn = None
+            try:
+                conn = await asyncio.to_thread(self._connect)
+                if conn is None:
+                    logger.info("Not listening on %r: the database is not Postgres", self.channel)
+                    return
+                self._on_connect()
+                delay = self.retry_s
+                await self._listen(conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(
+                    "Listener on %r failed (%s); reconnecting in %.0fs", self.channel, exc, delay
+                )
+            finally:
+                if conn is not None:
+                    conn.close()
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(self.max_retry_s, delay * 2)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"channel": self.channel, "received": self.received, "reconnects": self.reconnects}
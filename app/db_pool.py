@@ -0,0 +1,175 @@
+# app/db_pool.py
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import ConnectionPoolEntry, PoolProxiedConnection, QueuePool
+
+from app.config import Settings
+
+# ---------------------------
+# Pool sizing
+# ---------------------------
+
+
+def compute_pool_sizing(settings: Settings) -> tuple[int, int]:
+    """
+    Return (pool_size, max_overflow) for one worker process.
+
+    "static" uses DB_POOL_SIZE / DB_MAX_OVERFLOW as-is. "budget" splits the
+    global DB_CONNECTION_BUDGET (Cloud SQL max_connections minus headroom for
+    admin/migrations) across DB_MAX_INSTANCES * WEB_CONCURRENCY processes so a
+    fully scaled-out service can never exceed it; overflow is disabled because
+    it would be unaccounted for.
+    """
+    if settings.db_pool_mode == "static":
+        return settings.db_pool_size, settings.db_max_overflow
+    if settings.db_pool_mode != "budget":
+        raise ValueError(f"Unknown DB_POOL_MODE: {settings.db_pool_mode!r}")
+
+    processes = max(1, settings.db_max_instances) * max(1, settings.web_concurrency)
+    per_process = settings.db_connection_budget // processes
+    if per_process < 1:
+        raise ValueError(
+            f"DB_CONNECTION_BUDGET={settings.db_connection_budget} cannot give each of "
+            f"{processes} worker processes a connection"
+        )
+    return per_process, 0
+
+
+# ---------------------------
+# Telemetry
+# ---------------------------
+
+
+@dataclass
+class PoolTelemetry:
+    checkouts: int = 0
+    timeouts: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+    peak_checked_out: int = 0
+    peak_overflow: int = 0
+    liveness_pings: int = 0
+    liveness_failures: int = 0
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait and how far it overflows."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+        self._telemetry_lock = threading.Lock()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            with self._telemetry_lock:
+                self.telemetry.timeouts += 1
+            raise
+        waited_ms = (time.perf_counter() - started) * 1000
+        with self._telemetry_lock:
+            t = self.telemetry
+            t.checkouts += 1
+            t.total_wait_ms += waited_ms
+            t.max_wait_ms = max(t.max_wait_ms, waited_ms)
+            t.peak_checked_out = max(t.peak_checked_out, self.checkedout())
+            t.peak_overflow = max(t.peak_overflow, self.overflow())
+        return entry
+
+    def record_ping(self, failed: bool) -> None:
+        with self._telemetry_lock:
+            self.telemetry.liveness_pings += 1
+            if failed:
+                self.telemetry.liveness_failures += 1
+
+
+def pool_stats(engine: Engine) -> dict[str, Any]:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+
+    size = pool.size()
+    max_overflow = pool._max_overflow
+    capacity = size + max(0, max_overflow)
+    checked_out = pool.checkedout()
+    stats: dict[str, Any] = {
+        "pool": type(pool).__name__,
+        "size": size,
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow_in_use": max(0, pool.overflow()),
+        "saturation": round(checked_out / capacity, 3) if capacity > 0 else None,
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        t = pool.telemetry
+        stats.update(
+            checkouts=t.checkouts,
+            timeouts=t.timeouts,
+            avg_wait_ms=round(t.total_wait_ms / t.checkouts, 3) if t.checkouts else 0.0,
+            max_wait_ms=round(t.max_wait_ms, 3),
+            peak_checked_out=t.peak_checked_out,
+            peak_overflow=max(0, t.peak_overflow),
+            liveness_pings=t.liveness_pings,
+            liveness_failures=t.liveness_failures,
+        )
+    return stats
+
+
+# ---------------------------
+# Liveness
+# ---------------------------
+
+
+def _ping(dbapi_connection: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+
+
+def install_idle_ping(engine: Engine, idle_threshold_s: float) -> None:
+    """
+    Replacement for pool_pre_ping: only connections that sat idle in the pool
+    longer than `idle_threshold_s` are pinged on checkout. A failed ping raises
+    DisconnectionError, which makes the pool discard the connection and retry
+    with a fresh one. Negative thresholds disable pinging.
+    """
+    if idle_threshold_s < 0:
+        return
+
+    def _record_ping(failed: bool) -> None:
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.record_ping(failed)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        record.info["last_checkin"] = time.monotonic()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+        record.info["last_checkin"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(
+        dbapi_connection: Any, record: ConnectionPoolEntry, proxy: PoolProxiedConnection
+    ) -> None:
+        idle_for = time.monotonic() - record.info.get("last_checkin", 0.0)
+        if idle_for <= idle_threshold_s:
+            return
+        try:
+            _ping(dbapi_connection)
+        except Exception as err:
+            _record_ping(failed=True)
+            raise exc.DisconnectionError("Idle connection failed liveness ping") from err
+        _record_ping(failed=False)
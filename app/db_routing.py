@@ -0,0 +1,97 @@
+# app/db_routing.py
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+# Replay lag in seconds; 0 when the replica has applied everything it received
+_PG_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def postgres_replica_lag(session: Session) -> float:
+    if session.get_bind().dialect.name != "postgresql":
+        return 0.0
+    lag = session.execute(_PG_REPLICA_LAG_SQL).scalar()
+    return float(lag or 0.0)
+
+
+class ReplicaRouter:
+    """
+    Chooses the sessionmaker for read-only work.
+
+    Reads go to the replica unless
+      - its replication lag exceeds `max_lag_s` (or the lag probe fails), or
+      - the client wrote within the last `sticky_s` seconds (read-your-writes).
+    The lag probe result is cached for `lag_check_interval_s`. Stickiness is
+    tracked per client key in this process only.
+    """
+
+    def __init__(
+        self,
+        primary: sessionmaker,
+        replica: sessionmaker | None,
+        *,
+        max_lag_s: float = 5.0,
+        lag_check_interval_s: float = 2.0,
+        sticky_s: float = 5.0,
+        lag_probe: Callable[[Session], float] = postgres_replica_lag,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_s = max_lag_s
+        self.lag_check_interval_s = lag_check_interval_s
+        self.sticky_s = sticky_s
+        self._lag_probe = lag_probe
+        self._lock = threading.Lock()
+        self._sticky_until: dict[str, float] = {}
+        self._lag: float | None = None
+        self._lag_checked_at = float("-inf")
+
+    # Read-your-writes
+
+    def mark_write(self, client_key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sticky_until[client_key] = now + self.sticky_s
+            if len(self._sticky_until) > 10_000:
+                self._sticky_until = {k: v for k, v in self._sticky_until.items() if v > now}
+
+    def is_sticky(self, client_key: str) -> bool:
+        with self._lock:
+            until = self._sticky_until.get(client_key)
+        return until is not None and until > time.monotonic()
+
+    # Lag awareness
+
+    def replica_lag(self) -> float | None:
+        """Cached replica lag in seconds; None when the replica is unreachable."""
+        if self.replica is None:
+            return None
+        now = time.monotonic()
+        if now - self._lag_checked_at < self.lag_check_interval_s:
+            return self._lag
+        try:
+            with self.replica() as session:
+                lag: float | None = self._lag_probe(session)
+        except Exception:
+            lag = None
+        self._lag, self._lag_checked_at = lag, now
+        return lag
+
+    def replica_usable(self) -> bool:
+        lag = self.replica_lag()
+        return lag is not None and lag <= self.max_lag_s
+
+    def read_sessionmaker(self, client_key: str | None = None) -> sessionmaker:
+        if self.replica is None:
+            return self.primary
+        if client_key is not None and self.is_sticky(client_key):
+            return self.primary
+        return self.replica if self.replica_usable() else self.primary
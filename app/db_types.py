@@ -5,7 +5,7 @@ import uuid
 from typing import Any
 
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlalchemy.types import CHAR, TypeDecorator
+from sqlalchemy.types import CHAR, Text, TypeDecorator
 
 
 class GUID(TypeDecorator):
@@ -37,3 +37,27 @@ class GUID(TypeDecorator):
         if value is None:
             return None
         return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+class EncryptedString(TypeDecorator):
+    """String encrypted at rest with app.crypto (Fernet); stored as base64 text.
+
+    Not queryable by value: the ciphertext differs on every write.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value: str | None, dialect: Any) -> str | None:
+        if value is None:
+            return None
+        from app.crypto import encrypt
+
+        return encrypt(value)
+
+    def process_result_value(self, value: str | None, dialect: Any) -> str | None:
+        if value is None:
+            return None
+        from app.crypto import decrypt
+
+        return decrypt(value)
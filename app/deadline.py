@@ -0,0 +1,323 @@
+"""
+End-to-end request deadlines and client-disconnect cancellation.
+
+DeadlineMiddleware gives every HTTP request a Deadline: X-Request-Timeout-Ms
+if the client sent one (capped at REQUEST_DEADLINE_MAX_S), else
+REQUEST_DEADLINE_S. A route can tighten a non-explicit deadline with
+`Depends(route_deadline(seconds))`. Downstream calls read it from a contextvar:
+
+- FitbitClient caps each HTTP timeout with `timeout_for(FITBIT_TIMEOUT_S)`,
+  and a caller joining a coalesced Fitbit call waits for it with `bounded()`,
+- Postgres transactions get `SET LOCAL statement_timeout` to the time left.
+
+The middleware runs the app in its own task and cancels it when the deadline
+passes before a response has started (answering 504) or when the client
+disconnects first, so abandoned requests stop spending Fitbit quota and worker
+capacity. Work that must outlive the request (prefetch, the webhook queue)
+must be started with `detached_task()`. A plain `asyncio.create_task()` copies
+the request's context, deadline included, so the task would start failing with
+DeadlineExceeded once the request's budget is spent. Streamed responses outlive
+the request too: once headers are sent nothing is cancelled, and each chunk can
+run its downstream calls under its own `scope(seconds)`.
+
+Cancellation only reaches async code. A sync `def` handler (or dependency)
+already running in the threadpool keeps running to completion after the 504
+or the disconnect; only its result is dropped. Keep slow work in such handlers
+bounded by their own timeouts.
+
+The request body is passed through one message at a time rather than
+buffered. A client that disconnects mid-upload is noticed once the app reads
+the next chunk (or when the deadline passes).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import math
+import time
+from collections.abc import Awaitable, Callable, Coroutine, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+TIMEOUT_HEADER = b"x-request-timeout-ms"
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Raised before starting work that cannot finish within the request deadline."""
+
+
+class Deadline:
+    def __init__(
+        self,
+        timeout_s: float | None,
+        *,
+        explicit: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self.expires_at = math.inf if timeout_s is None else clock() + timeout_s
+        # Set by the client; route defaults do not override it
+        self.explicit = explicit
+        self._on_change: Callable[[], None] | None = None
+
+    def remaining(self) -> float:
+        return self.expires_at - self._clock()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def tighten(self, timeout_s: float) -> None:
+        expires_at = self._clock() + timeout_s
+        if expires_at < self.expires_at:
+            self.expires_at = expires_at
+            if self._on_change is not None:
+                self._on_change()
+
+
+_current: ContextVar[Deadline | None] = ContextVar("request_deadline", default=None)
+
+
+def current() -> Deadline | None:
+    return _current.get()
+
+
+def remaining() -> float | None:
+    """Seconds left for the current request, or None outside a deadline."""
+    deadline = _current.get()
+    if deadline is None or deadline.expires_at == math.inf:
+        return None
+    return deadline.remaining()
+
+
+def check() -> None:
+    deadline = _current.get()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def timeout_for(default_s: float) -> float:
+    """`default_s`, capped to the time left; raises DeadlineExceeded if none is left."""
+    left = remaining()
+    if left is None:
+        return default_s
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return min(default_s, left)
+
+
+async def bounded(aw: Awaitable[T]) -> T:
+    """
+    Await `aw` for at most the time left, raising DeadlineExceeded when it runs
+    out. For waiting on work shared with other requests, which runs without any
+    one request's deadline.
+    """
+    left = remaining()
+    if left is None:
+        return await aw
+    budget = asyncio.timeout(max(0.0, left))
+    try:
+        async with budget:
+            return await aw
+    except TimeoutError as exc:
+        if budget.expired():
+            raise DeadlineExceeded("Request deadline exceeded") from exc
+        raise
+
+
+def detached_task(coro: Coroutine[Any, Any, T], *, name: str | None = None) -> asyncio.Task[T]:
+    """
+    Start `coro` in a task that outlives the current request. It runs in an
+    empty context, so it inherits neither the request's deadline nor its query
+    stats.
+    """
+    return asyncio.get_running_loop().create_task(coro, name=name, context=contextvars.Context())
+
+
+def route_deadline(timeout_s: float) -> Callable[[], Awaitable[None]]:
+    """
+    Route dependency applying a default deadline unless the client set one:
+        @router.get("/range", dependencies=[Depends(route_deadline(20))])
+    """
+
+    async def _apply() -> None:
+        deadline = _current.get()
+        if deadline is not None and not deadline.explicit and timeout_s > 0:
+            deadline.tighten(timeout_s)
+
+    return _apply
+
+
+@contextmanager
+def scope(timeout_s: float | None) -> Iterator[Deadline]:
+    """
+    Run a block under its own deadline instead of the request's, e.g. one chunk
+    of a streamed response (the request's deadline only covers the headers):
+        with deadline.scope(20):
+            summaries = await provider.get_daily_activity_summaries(start, end)
+    Do not yield from a generator inside the block.
+    """
+    scoped = Deadline(timeout_s if timeout_s and timeout_s > 0 else None)
+    token = _current.set(scoped)
+    try:
+        yield scoped
+    finally:
+        _current.reset(token)
+
+
+@dataclass
+class DeadlineStats:
+    timed_out: int = 0
+    client_disconnects: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"timed_out": self.timed_out, "client_disconnects": self.client_disconnects}
+
+
+# Shared by every DeadlineMiddleware instance (Starlette builds them lazily)
+stats = DeadlineStats()
+
+
+class DeadlineMiddleware:
+    def __init__(self, app: ASGIApp, *, default_s: float, max_s: float):
+        self.app = app
+        self.default_s = default_s
+        self.max_s = max_s
+        self.stats = stats
+
+    def _deadline(self, scope: Scope) -> Deadline:
+        for name, value in scope.get("headers", []):
+            if name == TIMEOUT_HEADER:
+                try:
+                    requested = float(value) / 1000
+                except ValueError:
+                    break
+                if requested > 0:
+                    cap = self.max_s if self.max_s > 0 else math.inf
+                    return Deadline(min(requested, cap), explicit=True)
+        return Deadline(self.default_s if self.default_s > 0 else None)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # The watcher owns `receive` and hands body messages to the app one at a
+        # time, so an upload is never buffered here beyond the message in flight
+        inbox: asyncio.Queue[Message] = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def app_receive() -> Message:
+            if inbox.empty() and disconnected.is_set():
+                return {"type": "http.disconnect"}
+            message = await inbox.get()
+            inbox.task_done()
+            return message
+
+        response_started = False
+        response_done = False
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started, response_done
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                response_done = True
+            await send(message)
+
+        async def watch_disconnect() -> bool:
+            try:
+                while True:
+                    message = await receive()
+                    if message["type"] == "http.disconnect":
+                        return True
+                    inbox.put_nowait(message)
+                    if message.get("more_body"):
+                        # Read the next chunk only once the app has taken this one
+                        await inbox.join()
+            except Exception:
+                return False
+
+        async def run_app() -> None:
+            await self.app(scope, app_receive, tracking_send)
+
+        deadline = self._deadline(scope)
+        token = _current.set(deadline)
+        try:
+            app_task = asyncio.create_task(run_app())
+        finally:
+            _current.reset(token)
+        watcher = asyncio.create_task(watch_disconnect())
+
+        loop = asyncio.get_running_loop()
+        timer: asyncio.TimerHandle | None = None
+        timed_out = False
+
+        def on_expire() -> None:
+            nonlocal timed_out
+            if not response_started and not app_task.done():
+                timed_out = True
+                app_task.cancel()
+
+        def arm() -> None:
+            nonlocal timer
+            if timer is not None:
+                timer.cancel()
+            left = deadline.remaining()
+            if left != math.inf:
+                timer = loop.call_later(max(0.0, left), on_expire)
+
+        deadline._on_change = arm
+        arm()
+        try:
+            while not app_task.done():
+                waiting: set[asyncio.Future[Any]] = {app_task}
+                if not watcher.done():
+                    waiting.add(watcher)
+                await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if watcher.done() and watcher.result() and not disconnected.is_set():
+                    disconnected.set()
+                    inbox.put_nowait({"type": "http.disconnect"})
+                    # After the full response, let the app finish (e.g. background tasks)
+                    if not response_done and not app_task.done():
+                        self.stats.client_disconnects += 1
+                        app_task.cancel()
+        except asyncio.CancelledError:
+            app_task.cancel()
+            raise
+        finally:
+            deadline._on_change = None
+            if timer is not None:
+                timer.cancel()
+            watcher.cancel()
+
+        if app_task.cancelled():
+            if timed_out:
+                self.stats.timed_out += 1
+                await send_deadline_exceeded(send)
+            return
+        exc = app_task.exception()
+        if exc is not None:
+            raise exc
+
+
+async def send_deadline_exceeded(send: Send) -> None:
+    payload = json.dumps({"detail": "Request deadline exceeded"}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
@@ -0,0 +1,99 @@
+"""
+Read-through cache for GET /api/v1/greetings/{id}.
+
+Entries are the serialized GreetingRead JSON, keyed by id, so a hit costs no
+session, query or serialization. Unknown ids are cached too (NOT_FOUND) for
+the shorter GREETING_CACHE_NEGATIVE_TTL_S.
+
+Writes invalidate an id in two steps:
+
+- `publish_invalidation(db, id)` before the commit queues a Postgres NOTIFY
+  on GREETING_CACHE_CHANNEL, delivered only if the write commits; every
+  instance's `PgNotifyListener` (started in the lifespan) drops the entry.
+  This is opt-in: with no channel set (the default) nothing is sent or
+  listened for, and other instances only catch up when their TTL expires,
+- `greeting_cache.invalidate(id)` after the commit drops it locally.
+
+For DB_REPLICA_MAX_LAG_S after an invalidation the id is not re-cached, so
+a read from a lagging replica (or one that started before the write) cannot
+put the old version back. A listener that reconnects clears the cache, and
+the TTL bounds staleness if a notification is lost anyway.
+"""
+
+from __future__ import annotations
+
+import uuid
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.db_notify import PgNotifyListener, notify
+
+NOT_FOUND = b""  # cached 404 (never a valid JSON body)
+
+
+class GreetingCache:
+    def __init__(
+        self, *, maxsize: int, ttl_s: float, negative_ttl_s: float, recent_write_window_s: float
+    ):
+        self.enabled = ttl_s > 0
+        self.negative_ttl_s = negative_ttl_s
+        self._entries: TTLCache[uuid.UUID, bytes] = TTLCache(maxsize=maxsize, ttl_s=ttl_s)
+        self._recent_writes: TTLCache[uuid.UUID, bool] = TTLCache(
+            maxsize=maxsize, ttl_s=recent_write_window_s
+        )
+
+    def get(self, greeting_id: uuid.UUID) -> bytes | None:
+        """The cached JSON body, NOT_FOUND for a cached 404, or None on a miss."""
+        return self._entries.get(greeting_id) if self.enabled else None
+
+    def fill(self, greeting_id: uuid.UUID, body: bytes) -> None:
+        """Cache `body` (or NOT_FOUND) unless the id was written too recently to trust the read."""
+        if not self.enabled or self._recent_writes.peek(greeting_id):
+            return
+        if body == NOT_FOUND:
+            self._entries.set(greeting_id, body, ttl_s=self.negative_ttl_s)
+        else:
+            self._entries.set(greeting_id, body)
+
+    def invalidate(self, greeting_id: uuid.UUID) -> None:
+        self._recent_writes.set(greeting_id, True)
+        self._entries.delete(greeting_id)
+
+    def invalidate_payload(self, payload: str) -> None:
+        """NOTIFY handler: the payload is the greeting id."""
+        try:
+            self.invalidate(uuid.UUID(payload))
+        except ValueError:
+            self.clear()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        return self._entries.snapshot()
+
+
+settings = get_settings()
+
+greeting_cache = GreetingCache(
+    maxsize=settings.greeting_cache_maxsize,
+    ttl_s=settings.greeting_cache_ttl_s,
+    negative_ttl_s=settings.greeting_cache_negative_ttl_s,
+    recent_write_window_s=settings.db_replica_max_lag_s,
+)
+
+
+def publish_invalidation(db: Session, greeting_id: uuid.UUID) -> None:
+    """Tell every instance to drop `greeting_id` once `db`'s transaction commits."""
+    notify(db, settings.greeting_cache_channel, str(greeting_id))
+
+
+def build_listener() -> PgNotifyListener:
+    return PgNotifyListener(
+        settings.greeting_cache_channel,
+        greeting_cache.invalidate_payload,
+        on_connect=greeting_cache.clear,
+    )
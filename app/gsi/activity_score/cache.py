@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, timedelta
+
+import httpx
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.database import session_scope
+from app.deadline import DeadlineExceeded
+from app.integrations.circuit_breaker import CircuitOpenError
+from app.integrations.fitbit_client import rate_limit
+from app.integrations.fitbit_daily import invalidate_sections
+from app.integrations.fitbit_subscriptions import refresh_queue
+
+from .models import FitbitDailySummary
+from .provider import FitbitDailySummaryProvider
+from .store import upsert_summaries
+
+logger = logging.getLogger("app.gsi.activity_score.cache")
+
+settings = get_settings()
+
+# Scores are derived from these summaries on the fly, so invalidating a day's
+# summary is enough to invalidate its score. Expired entries are kept as the
+# stale fallback for Fitbit outages.
+summary_cache: TTLCache[date, FitbitDailySummary] = TTLCache(
+    maxsize=settings.gsi_summary_cache_maxsize,
+    ttl_s=settings.gsi_summary_cache_ttl_s,
+    keep_stale=True,
+)
+
+# Upstream errors after which the last known summary is served instead (a
+# Fitbit call can also end in DeadlineExceeded when the request runs out of time)
+UPSTREAM_ERRORS = (CircuitOpenError, httpx.HTTPError, TimeoutError, DeadlineExceeded)
+
+
+def invalidate_days(days: list[date]) -> None:
+    for d in days:
+        summary_cache.delete(d)
+
+
+def _missing_runs(days: list[date], have: set[date]) -> list[tuple[date, date]]:
+    """Contiguous (start, end) runs of `days` not in `have`."""
+    runs: list[tuple[date, date]] = []
+    for d in days:
+        if d in have:
+            continue
+        if runs and runs[-1][1] == d - timedelta(days=1):
+            runs[-1] = (runs[-1][0], d)
+        else:
+            runs.append((d, d))
+    return runs
+
+
+def _stale(summary: FitbitDailySummary) -> FitbitDailySummary:
+    return summary.model_copy(update={"stale": True})
+
+
+class CachingDailySummaryProvider(FitbitDailySummaryProvider):
+    """
+    Read-through cache in front of another provider; only missing days go upstream.
+
+    If the upstream fails (or its circuit is open), expired entries are served
+    flagged `stale` rather than failing the request.
+    """
+
+    def __init__(
+        self,
+        inner: FitbitDailySummaryProvider,
+        cache: TTLCache[date, FitbitDailySummary] = summary_cache,
+    ):
+        self.inner = inner
+        self.cache = cache
+
+    async def get_daily_activity_summary(self, date: date) -> FitbitDailySummary:
+        cached = self.cache.get(date)
+        if cached is not None:
+            return cached
+        try:
+            summary = await self.inner.get_daily_activity_summary(date)
+        except UPSTREAM_ERRORS:
+            stale = self.cache.get_stale(date)
+            if stale is None:
+                raise
+            logger.warning("Serving stale summary for %s: upstream unavailable", date)
+            return _stale(stale)
+        self.cache.set(date, summary)
+        return summary
+
+    async def get_daily_activity_summaries(
+        self, start_date: date, end_date: date
+    ) -> list[FitbitDailySummary]:
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        found: dict[date, FitbitDailySummary] = {}
+        for d in days:
+            cached = self.cache.get(d)
+            if cached is not None:
+                found[d] = cached
+        for run_start, run_end in _missing_runs(days, set(found)):
+            try:
+                fetched = await self.inner.get_daily_activity_summaries(run_start, run_end)
+            except UPSTREAM_ERRORS:
+                run = [d for d in days if run_start <= d <= run_end]
+                stale = {d: self.cache.get_stale(d) for d in run}
+                if any(s is None for s in stale.values()):
+                    raise
+                logger.warning(
+                    "Serving stale summaries for %s..%s: upstream unavailable", run_start, run_end
+                )
+                found.update({d: _stale(s) for d, s in stale.items()})
+                continue
+            for summary in fetched:
+                self.cache.set(summary.date, summary)
+                found[summary.date] = summary
+        return [found[d] for d in days if d in found]
+
+
+async def refresh_activity_days(days: list[date]) -> None:
+    """
+    Subscription handler for the "activities" collection: drop cached
+    summaries for the notified days, then re-fetch just those days so the
+    cache (and the local store, when serving from it) holds fresh data. A day
+    that fails to re-fetch is logged and left to the next read.
+    """
+    invalidate_days(days)
+    # The re-fetch must not be served the cached raw payloads of these days
+    invalidate_sections("activities", days)
+
+    available = rate_limit.available()
+    if available is not None and available < settings.fitbit_sync_min_remaining + 2 * len(days):
+        logger.info("Skipping re-fetch of %d days: rate-limit budget low", len(days))
+        return
+
+    from .deps import get_upstream_daily_summary_provider
+
+    upstream = get_upstream_daily_summary_provider()
+    fresh: list[FitbitDailySummary] = []
+    for d in days:
+        try:
+            summary = await upstream.get_daily_activity_summary(d)
+        except Exception:
+            logger.exception("Re-fetch of the activity summary for %s failed", d)
+            continue
+        summary_cache.set(summary.date, summary)
+        fresh.append(summary)
+    if not fresh:
+        return
+
+    if settings.gsi_summary_source == "local":
+
+        def _store() -> None:
+            with session_scope() as db:
+                upsert_summaries(db, fresh)
+
+        await asyncio.to_thread(_store)
+
+
+refresh_queue.register("activities", refresh_activity_days)
@@ -1,18 +1,61 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from pydantic import TypeAdapter
+
+from .models import ActivityScoreResult, FitbitDailySummary
+
+T = TypeVar("T")
+
+# Many days' results are validated in one call (calculate_many)
+_results = TypeAdapter(list[ActivityScoreResult])
+
+
+class LookupTable(Generic[T]):
+    """
+    A piecewise function of an integer, precompiled to a table.
+
+    `compile(fn, constant_from=n)` evaluates `fn` (the readable if/elif
+    definition) once for 0..n; `fn` must be constant from `n` on. Lookups are
+    then one index (or the constant tail) instead of a threshold chain, and
+    return exactly what `fn` would, rounding included. Negative inputs (never
+    valid counts, but `score()` does not validate) are passed to `fn` itself
+    rather than indexing the table from its end.
+    """
+
+    __slots__ = ("_values", "_tail", "_fn", "constant_from")
+
+    def __init__(self, values: tuple[T, ...], tail: T, fn: Callable[[int], T]):
+        self._values = values
+        self._tail = tail
+        self._fn = fn
+        self.constant_from = len(values)
+
+    @classmethod
+    def compile(cls, fn: Callable[[int], T], *, constant_from: int) -> LookupTable[T]:
+        return cls(tuple(fn(x) for x in range(constant_from)), fn(constant_from), fn)
+
+    def __call__(self, x: int) -> T:
+        if x >= self.constant_from:
+            return self._tail
+        if x >= 0:
+            return self._values[x]
+        return self._fn(x)
 
-from .models import ActivityScoreBreakdown, ActivityScoreResult, FitbitDailySummary
 
 @dataclass(frozen=True)
 class ActivityScoreCalculatorV2:
     """Daily Activity Score Calculator V2 - Efficiency Gradient Model"""
+
     version: str = "2.0.0"
+
     @staticmethod
     def _getVersion() -> str:
         return "2.0.0"
 
-
     @staticmethod
     def _calculate_steps_signal(steps: int) -> float:
         """Calculates Step Signal (0.0 - 1.0) targeting fat loss volume."""
@@ -42,51 +85,74 @@ class ActivityScoreCalculatorV2:
             # The Redline: Hard floor to discourage the 120+ crash cycle
             return 0.3
 
-    def calculate(self, day: FitbitDailySummary) -> ActivityScoreResult: # type: ignore
-        steps = int(day.steps)
-        azm = int(day.active_zone_minutes)
-        print(f"Steps: {steps}, AZM: {azm}")
-        # 1. Calculate the individual signals
-        step_signal = self._calculate_steps_signal(steps)
-        azm_signal = self._calculate_azm_signal(azm)
-        print(f"Step Signal: {step_signal}, AZM Signal: {azm_signal}")
+    @staticmethod
+    def _points(steps: int, azm: int) -> tuple[float, float, float, float]:
+        """(steps_score, azm_score, raw_total, final_score)"""
+        # 1. Calculate the individual signals (precompiled from the methods above)
+        step_signal = _V2_STEPS_SIGNAL(steps)
+        azm_signal = _V2_AZM_SIGNAL(azm)
 
         points_factor = 5
         steps_score = step_signal * points_factor
         azm_score = azm_signal * points_factor
-        print(f"Steps Score: {steps_score}, AZM Score: {azm_score}")
 
         # 2. Apply Weighted Blending (60% Steps / 40% AZM)
         # We multiply by 10 to fit your original 1-10 scoring scale
-        raw_total = (steps_score * 0.6 + azm_score * 0.4)
-        print(f"Raw Total: {raw_total}")
-        
+        raw_total = steps_score * 0.6 + azm_score * 0.4
+
         # Ensure we return a clean float between 0 and 10
         final_score = round(max(0.0, min(10, raw_total)), 2)
-        print(f"Final Score: {final_score}")
+        return steps_score, azm_score, raw_total, final_score
 
+    def score(self, steps: int, azm: int) -> float:
+        """The final score alone, without building result models (bulk/columnar paths)."""
+        return self._points(steps, azm)[3]
+
+    def _row(self, day: FitbitDailySummary) -> dict[str, Any]:
+        steps = int(day.steps)
+        azm = int(day.active_zone_minutes)
+        steps_score, azm_score, raw_total, final_score = self._points(steps, azm)
 
         # Breakdown remains for your reporting
-        breakdown = ActivityScoreBreakdown(
-            version=self._getVersion(),
-            steps_points=steps_score,
-            azm_points=azm_score,
-            raw_total=raw_total,
-            capped_total=final_score
-        )
+        breakdown = {
+            "version": self._getVersion(),
+            "steps_points": steps_score,
+            "azm_points": azm_score,
+            "raw_total": raw_total,
+            "capped_total": final_score,
+        }
+
+        return {
+            "date": day.date,
+            "score": final_score,
+            "breakdown": breakdown,
+            "steps": steps,
+            "active_zone_minutes": azm,
+            "stale": day.stale,
+        }
+
+    def calculate(self, day: FitbitDailySummary) -> ActivityScoreResult:
+        return ActivityScoreResult.model_validate(self._row(day))
+
+    def calculate_many(self, days: Sequence[FitbitDailySummary]) -> list[ActivityScoreResult]:
+        """`calculate` for every day, validated in one call."""
+        return _results.validate_python([self._row(d) for d in days])
+
+
+_V2_STEPS_SIGNAL = LookupTable.compile(
+    ActivityScoreCalculatorV2._calculate_steps_signal, constant_from=13001
+)
+_V2_AZM_SIGNAL = LookupTable.compile(
+    ActivityScoreCalculatorV2._calculate_azm_signal, constant_from=121
+)
 
-        return ActivityScoreResult(
-            date=day.date,
-            score=final_score,
-            breakdown=breakdown,
-            steps=steps,
-            active_zone_minutes=azm
-        )
 
 @dataclass(frozen=True)
 class ActivityScoreCalculatorV1:
     """Daily Activity Score Calculator V1"""
+
     version: str = "1.0.0"
+
     @staticmethod
     def _getVersion() -> str:
         return "1.0.0"
@@ -128,36 +194,56 @@ class ActivityScoreCalculatorV1:
         if steps >= 12_000 and azm >= 40:
             return 1
         return 0
-        
-
-    def calculate(self, day: FitbitDailySummary) -> ActivityScoreResult:  # type: ignore
-        print(f"Summary: {day}")
-        steps = int(day.steps)
-        azm = int(day.active_zone_minutes)
 
+    def _points(self, steps: int, azm: int) -> tuple[int, int, int, int, int, int]:
+        """(floor_point, standard_bonus, steps_points, azm_points, raw_total, capped_total)"""
         floor_point = self._floor_point(steps, azm)
         standard_bonus = self._standard_bonus(steps, azm)
-        steps_points = self._steps_points(steps)
-        azm_points = self._azm_points(azm)
+        steps_points = _V1_STEPS_POINTS(steps)
+        azm_points = _V1_AZM_POINTS(azm)
 
         raw_total = floor_point + standard_bonus + steps_points + azm_points
-        capped_total = min(10, raw_total)
-
-        breakdown = ActivityScoreBreakdown(
-            version=self._getVersion(),
-            floor_point=floor_point,
-            standard_bonus=standard_bonus,
-            steps_points=steps_points,
-            azm_points=azm_points,
-            raw_total=raw_total,
-            capped_total=capped_total
-        )
+        return floor_point, standard_bonus, steps_points, azm_points, raw_total, min(10, raw_total)
+
+    def score(self, steps: int, azm: int) -> float:
+        """The final score alone, without building result models (bulk/columnar paths)."""
+        return self._points(steps, azm)[5]
 
-        return ActivityScoreResult(
-            date=day.date,
-            score=capped_total,
-            breakdown=breakdown,
-            steps=steps,
-            active_zone_minutes=azm
+    def _row(self, day: FitbitDailySummary) -> dict[str, Any]:
+        steps = int(day.steps)
+        azm = int(day.active_zone_minutes)
+        floor_point, standard_bonus, steps_points, azm_points, raw_total, capped_total = (
+            self._points(steps, azm)
         )
 
+        breakdown = {
+            "version": self._getVersion(),
+            "floor_point": floor_point,
+            "standard_bonus": standard_bonus,
+            "steps_points": steps_points,
+            "azm_points": azm_points,
+            "raw_total": raw_total,
+            "capped_total": capped_total,
+        }
+
+        return {
+            "date": day.date,
+            "score": capped_total,
+            "breakdown": breakdown,
+            "steps": steps,
+            "active_zone_minutes": azm,
+            "stale": day.stale,
+        }
+
+    def calculate(self, day: FitbitDailySummary) -> ActivityScoreResult:
+        return ActivityScoreResult.model_validate(self._row(day))
+
+    def calculate_many(self, days: Sequence[FitbitDailySummary]) -> list[ActivityScoreResult]:
+        """`calculate` for every day, validated in one call."""
+        return _results.validate_python([self._row(d) for d in days])
+
+
+_V1_STEPS_POINTS = LookupTable.compile(
+    ActivityScoreCalculatorV1._steps_points, constant_from=12_000
+)
+_V1_AZM_POINTS = LookupTable.compile(ActivityScoreCalculatorV1._azm_points, constant_from=120)
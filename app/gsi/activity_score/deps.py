@@ -1,25 +1,84 @@
 from __future__ import annotations
 
-from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from .calculator import ActivityScoreCalculatorV1, ActivityScoreCalculatorV2
+from fastapi import HTTPException
+
+from app.config import get_settings
+
+from .cache import CachingDailySummaryProvider
+from .heartrate_ingest import HeartRateIngestor, analytics_available
 from .provider import FitbitDailySummaryProvider
 from .provider_fitbit_impl import ExistingFitbitIntegrationProvider
+from .provider_local_impl import LocalDailySummaryProvider
+from .registry import get_calculator_registry  # noqa: F401  (route dependency)
 
+if TYPE_CHECKING:
+    from app.integrations.fitbit_client import FitbitClient
 
-@lru_cache
-def get_activity_score_calculator_v1() -> ActivityScoreCalculatorV1:
-    return ActivityScoreCalculatorV1()
 
-    
-@lru_cache
-def get_activity_score_calculator_v2() -> ActivityScoreCalculatorV2:
-    return ActivityScoreCalculatorV2()
+def _heartrate_ingestor(fitbit_client: FitbitClient) -> HeartRateIngestor:
+    settings = get_settings()
+    return HeartRateIngestor(
+        fitbit_client,
+        detail_level=settings.fitbit_heartrate_detail_level,
+        finalized_after_days=settings.fitbit_finalized_after_days,
+    )
 
 
-def get_fitbit_daily_summary_provider() -> FitbitDailySummaryProvider:
+def get_heartrate_ingestor() -> HeartRateIngestor:
+    from app.integrations.fitbit_client import get_fitbit_client
+
+    if not analytics_available():
+        raise HTTPException(status_code=501, detail="Intraday heart-rate analytics need numpy")
+    return _heartrate_ingestor(get_fitbit_client())
+
+
+def _azm_from_heartrate(fitbit_client: FitbitClient) -> HeartRateIngestor | None:
+    """GSI_AZM_SOURCE=intraday: compute AZM from intraday heart rate instead of fetching it."""
+    if get_settings().gsi_azm_source != "intraday":
+        return None
+    return _heartrate_ingestor(fitbit_client)
+
+
+def get_upstream_daily_summary_provider() -> FitbitDailySummaryProvider:
+    """
+    Provider that always goes to Fitbit (no summary cache, no local store); raw
+    payloads are shared with /fitbit/daily-summary through the section cache.
+    """
 
     from app.integrations.fitbit_client import get_fitbit_client
+    from app.integrations.fitbit_daily import section_cache
 
     fitbit_client = get_fitbit_client()
-    return ExistingFitbitIntegrationProvider(fitbit_client)
+    return ExistingFitbitIntegrationProvider(
+        fitbit_client, heartrate=_azm_from_heartrate(fitbit_client), cache=section_cache
+    )
+
+
+def get_user_daily_summary_provider(user_id: str) -> FitbitDailySummaryProvider:
+    """Provider reading Fitbit data for `user_id` with their stored (per-user) tokens."""
+
+    from app.integrations.fitbit_client import get_fitbit_client
+    from app.integrations.fitbit_tokens import token_store
+
+    fitbit_client = get_fitbit_client(user_id)
+    return ExistingFitbitIntegrationProvider(
+        fitbit_client,
+        access_token=lambda: token_store.get_access_token(user_id),
+        heartrate=_azm_from_heartrate(fitbit_client),
+    )
+
+
+def get_fitbit_daily_summary_provider() -> FitbitDailySummaryProvider:
+
+    settings = get_settings()
+    if settings.gsi_summary_source == "local":
+        from app.database import get_read_sessionmaker
+
+        return LocalDailySummaryProvider(get_read_sessionmaker())
+
+    upstream = get_upstream_daily_summary_provider()
+    if settings.gsi_summary_cache_ttl_s > 0:
+        return CachingDailySummaryProvider(upstream)
+    return upstream
@@ -0,0 +1,280 @@
+"""
+Bulk export of daily summaries and their scores, as CSV or Parquet.
+
+Arbitrary ranges are read through a FitbitDailySummaryProvider `chunk_days`
+at a time and scored with `calculator.score()`; each chunk is encoded and
+handed on before the next is fetched, so memory stays bounded by one chunk
+however long the range. Columns:
+
+    date, steps, active_zone_minutes, calories_out, stale, score_<version>...
+
+- CSV (stdlib) is written row by row, so a partial file is usable and an
+  export resumes from its last complete line (`csv_resume_after`),
+- Parquet (optional pyarrow, requirements-analytics.txt) gets one row group per
+  chunk. A Parquet file is unreadable until its footer is written, so file
+  exports go to a directory of part files, each closed atomically; an export
+  resumes after the newest part (`parquet_resume_after`).
+
+Used by GET /gsi/activity-score/export and `python -m app.workers.export`.
+"""
+
+from __future__ import annotations
+
+import csv
+import importlib.util
+import io
+import os
+from collections.abc import AsyncIterator, Iterator, Sequence
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from app import deadline
+
+from .formats import UnsupportedFormatError
+from .models import FitbitDailySummary
+from .provider import FitbitDailySummaryProvider
+from .registry import ActivityScoreCalculator
+
+CSV = "csv"
+PARQUET = "parquet"
+
+MEDIA_TYPES = {CSV: "text/csv", PARQUET: "application/vnd.apache.parquet"}
+_REQUIRES = {PARQUET: "pyarrow"}
+
+Columns = dict[str, list[Any]]
+
+
+def available_formats() -> list[str]:
+    return [
+        f
+        for f in MEDIA_TYPES
+        if f not in _REQUIRES or importlib.util.find_spec(_REQUIRES[f]) is not None
+    ]
+
+
+def check_format(format: str) -> None:
+    available = available_formats()
+    if format not in available:
+        raise UnsupportedFormatError(
+            f"Unsupported export format {format!r}; available: {', '.join(available)}"
+        )
+
+
+def field_names(calculators: Sequence[ActivityScoreCalculator]) -> list[str]:
+    return ["date", "steps", "active_zone_minutes", "calories_out", "stale"] + [
+        f"score_{c.version}" for c in calculators
+    ]
+
+
+def date_chunks(start_date: date, end_date: date, chunk_days: int) -> Iterator[tuple[date, date]]:
+    step = timedelta(days=max(1, chunk_days))
+    while start_date <= end_date:
+        yield start_date, min(end_date, start_date + step - timedelta(days=1))
+        start_date += step
+
+
+def build_columns(
+    summaries: Sequence[FitbitDailySummary], calculators: Sequence[ActivityScoreCalculator]
+) -> Columns:
+    steps = [int(s.steps) for s in summaries]
+    azm = [int(s.active_zone_minutes) for s in summaries]
+    columns: Columns = {
+        "date": [s.date for s in summaries],
+        "steps": steps,
+        "active_zone_minutes": azm,
+        "calories_out": [s.calories_out for s in summaries],
+        "stale": [s.stale for s in summaries],
+    }
+    for calculator in calculators:
+        columns[f"score_{calculator.version}"] = list(map(calculator.score, steps, azm))
+    return columns
+
+
+async def iter_columns(
+    provider: FitbitDailySummaryProvider,
+    calculators: Sequence[ActivityScoreCalculator],
+    start_date: date,
+    end_date: date,
+    *,
+    chunk_days: int,
+    chunk_timeout_s: float | None = None,
+) -> AsyncIterator[Columns]:
+    """One column batch per non-empty chunk; each fetch runs under its own `chunk_timeout_s`."""
+    for start, end in date_chunks(start_date, end_date, chunk_days):
+        with deadline.scope(chunk_timeout_s):
+            summaries = await provider.get_daily_activity_summaries(start, end)
+        if summaries:
+            yield build_columns(summaries, calculators)
+
+
+class ExportWriter:
+    """Encodes column batches; each method returns the bytes to emit so far."""
+
+    def begin(self) -> bytes:
+        return b""
+
+    def write(self, columns: Columns) -> bytes:
+        raise NotImplementedError
+
+    def close(self) -> bytes:
+        return b""
+
+
+class CsvExportWriter(ExportWriter):
+    def __init__(self, fields: Sequence[str]):
+        self._fields = list(fields)
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer, lineterminator="\n")
+
+    def begin(self) -> bytes:
+        self._csv.writerow(self._fields)
+        return self._drain()
+
+    def write(self, columns: Columns) -> bytes:
+        values = [columns[f] for f in self._fields]
+        values[0] = [d.isoformat() for d in values[0]]
+        self._csv.writerows(zip(*values, strict=True))
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last `drain()`."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        # Parquet records row-group offsets from this, so it counts drained bytes too
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetExportWriter(ExportWriter):
+    def __init__(self, fields: Sequence[str]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {
+            "date": pa.date32(),
+            "steps": pa.int32(),
+            "active_zone_minutes": pa.int32(),
+            "calories_out": pa.int32(),
+            "stale": pa.bool_(),
+        }
+        self._pa = pa
+        self._schema = pa.schema([(f, types.get(f, pa.float64())) for f in fields])
+        self._sink = _ByteSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+
+    def write(self, columns: Columns) -> bytes:
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def open_writer(format: str, fields: Sequence[str]) -> ExportWriter:
+    check_format(format)
+    if format == PARQUET:
+        return ParquetExportWriter(fields)
+    return CsvExportWriter(fields)
+
+
+async def stream_export(
+    provider: FitbitDailySummaryProvider,
+    calculators: Sequence[ActivityScoreCalculator],
+    start_date: date,
+    end_date: date,
+    format: str,
+    *,
+    chunk_days: int,
+    chunk_timeout_s: float | None = None,
+    begin: bool = True,
+) -> AsyncIterator[bytes]:
+    """
+    The encoded export, one piece per chunk (e.g. a streaming response body).
+    `begin=False` leaves out the CSV header, for appending to an export.
+    """
+    writer = open_writer(format, field_names(calculators))
+    if begin:
+        yield writer.begin()
+    async for columns in iter_columns(
+        provider,
+        calculators,
+        start_date,
+        end_date,
+        chunk_days=chunk_days,
+        chunk_timeout_s=chunk_timeout_s,
+    ):
+        data = writer.write(columns)
+        if data:
+            yield data
+    yield writer.close()
+
+
+# -- resuming file exports ---------------------------------------------
+
+
+def csv_resume_after(path: Path) -> date | None:
+    """
+    Last date in a partially written CSV export, after cutting off a trailing
+    incomplete line, or None when it holds no rows yet.
+    """
+    with path.open("rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        block = 4096
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            tail = f.read()
+            if tail.count(b"\n") >= 2 or start == 0:
+                break
+            block *= 2
+        complete = tail.rfind(b"\n") + 1
+        if start + complete < size:
+            f.truncate(start + complete)
+    lines = tail[:complete].splitlines()
+    if not lines:
+        return None
+    try:
+        return date.fromisoformat(lines[-1].split(b",", 1)[0].decode())
+    except ValueError:  # only the header so far
+        return None
+
+
+def parquet_part_name(start_date: date, end_date: date) -> str:
+    return f"part-{start_date.isoformat()}_{end_date.isoformat()}.parquet"
+
+
+def parquet_resume_after(directory: Path) -> date | None:
+    """End date of the newest complete part file (unfinished parts are `.tmp`)."""
+    ends = []
+    for part in directory.glob("part-*_*.parquet"):
+        try:
+            ends.append(date.fromisoformat(part.stem.rsplit("_", 1)[1]))
+        except ValueError:
+            continue
+    return max(ends, default=None)
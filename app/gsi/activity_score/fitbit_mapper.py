@@ -1,20 +1,33 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Any, Dict, Optional
+from typing import Any
 
-def _extract_steps(payload: Dict[str, Any]) -> int:
+
+def _extract_steps(payload: dict[str, Any]) -> int:
     return int(payload.get("summary", {}).get("steps", 0))
 
-def _extract_azm(payload: Dict[str, Any]) -> int:
+
+def _extract_azm(payload: dict[str, Any]) -> int:
     activities = payload.get("activities-active-zone-minutes", [])
     return sum(activity.get("value", {}).get("activeZoneMinutes", 0) for activity in activities)
 
-def map_fitbit_daily_summary(summary: Dict[str, Any], azmPayload: Dict[str, Any], date: date) -> Optional[Dict[str, Any]]:
-    
+
+def map_fitbit_daily_summary(
+    summary: dict[str, Any],
+    azmPayload: dict[str, Any] | None,
+    date: date,
+    *,
+    active_zone_minutes: int | None = None,
+) -> dict[str, Any]:
+    """`active_zone_minutes` (e.g. computed from intraday heart rate) replaces `azmPayload`."""
     return {
         "date": date,
         "steps": _extract_steps(summary),
-        "active_zone_minutes": _extract_azm(azmPayload),
+        "active_zone_minutes": (
+            active_zone_minutes
+            if active_zone_minutes is not None
+            else _extract_azm(azmPayload or {})
+        ),
         "calories_out": summary.get("summary", {}).get("caloriesOut", 0),
     }
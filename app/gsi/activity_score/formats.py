@@ -0,0 +1,150 @@
+"""
+Columnar and binary encodings of activity-score ranges.
+
+Analytics clients read /range as arrays, so besides the per-day object JSON the
+route can answer with one array per field:
+
+    {"dates": [...], "scores": [...], "steps": [...], "azm": [...], "stale": [...]}
+
+as JSON, MessagePack or an Apache Arrow IPC stream. The columns are filled
+straight from the summaries with `calculator.score()`, without building an
+ActivityScoreResult per day. With several calculator versions, "scores" maps
+each version to its column (Arrow: one `score_<version>` column each).
+
+msgpack and pyarrow are optional (requirements-analytics.txt); a format whose
+library is not installed is simply not offered.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+import orjson
+
+from .models import FitbitDailySummary
+from .registry import ActivityScoreCalculator
+
+JSON = "json"
+COLUMNS = "columns"
+MSGPACK = "msgpack"
+ARROW = "arrow"
+
+MEDIA_TYPES = {
+    JSON: "application/json",
+    COLUMNS: "application/vnd.activity-score.columns+json",
+    MSGPACK: "application/msgpack",
+    ARROW: "application/vnd.apache.arrow.stream",
+}
+_ALIASES = {"application/x-msgpack": MSGPACK}
+_BY_MEDIA_TYPE = {**{v: k for k, v in MEDIA_TYPES.items()}, **_ALIASES}
+_REQUIRES = {MSGPACK: "msgpack", ARROW: "pyarrow"}
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised when a requested format is unknown or its library is not installed."""
+
+
+def available_formats() -> list[str]:
+    return [
+        f
+        for f in MEDIA_TYPES
+        if f not in _REQUIRES or importlib.util.find_spec(_REQUIRES[f]) is not None
+    ]
+
+
+def negotiate(format: str | None, accept: str | None) -> str:
+    """
+    Pick the response format: an explicit `?format=` wins, else the Accept
+    header's most preferred type we can produce, else JSON.
+    """
+    available = available_formats()
+    if format:
+        if format not in available:
+            raise UnsupportedFormatError(
+                f"Unsupported format {format!r}; available: {', '.join(available)}"
+            )
+        return format
+    ranked: list[tuple[float, int, str]] = []
+    for i, part in enumerate((accept or "").split(",")):
+        media_type, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        fmt = _BY_MEDIA_TYPE.get(media_type.lower())
+        if fmt in available and q > 0:
+            ranked.append((-q, i, fmt))
+    return min(ranked)[2] if ranked else JSON
+
+
+@dataclass
+class ScoreColumns:
+    dates: list[date]
+    steps: list[int]
+    azm: list[int]
+    stale: list[bool]
+    scores: dict[str, list[float]]  # calculator version -> column
+
+    @classmethod
+    def build(
+        cls, summaries: Sequence[FitbitDailySummary], calculators: Sequence[ActivityScoreCalculator]
+    ) -> ScoreColumns:
+        steps = [int(s.steps) for s in summaries]
+        azm = [int(s.active_zone_minutes) for s in summaries]
+        return cls(
+            dates=[s.date for s in summaries],
+            steps=steps,
+            azm=azm,
+            stale=[s.stale for s in summaries],
+            scores={c.version: list(map(c.score, steps, azm)) for c in calculators},
+        )
+
+    def as_dict(self, *, keyed_scores: bool) -> dict[str, Any]:
+        scores: Any = self.scores if keyed_scores else next(iter(self.scores.values()))
+        dates = [d.isoformat() for d in self.dates]
+        return {
+            "dates": dates,
+            "scores": scores,
+            "steps": self.steps,
+            "azm": self.azm,
+            "stale": self.stale,
+        }
+
+
+def encode(columns: ScoreColumns, format: str, *, keyed_scores: bool) -> bytes:
+    if format == COLUMNS:
+        return orjson.dumps(columns.as_dict(keyed_scores=keyed_scores))
+    if format == MSGPACK:
+        import msgpack
+
+        return msgpack.packb(columns.as_dict(keyed_scores=keyed_scores), use_bin_type=True)
+    if format == ARROW:
+        return _arrow_stream(columns, keyed_scores=keyed_scores)
+    raise UnsupportedFormatError(f"Cannot encode {format!r} as columns")
+
+
+def _arrow_stream(columns: ScoreColumns, *, keyed_scores: bool) -> bytes:
+    import pyarrow as pa
+
+    arrays: dict[str, Any] = {
+        "date": pa.array(columns.dates, type=pa.date32()),
+        "steps": pa.array(columns.steps, type=pa.int32()),
+        "azm": pa.array(columns.azm, type=pa.int32()),
+        "stale": pa.array(columns.stale, type=pa.bool_()),
+    }
+    for version, scores in columns.scores.items():
+        arrays[f"score_{version}" if keyed_scores else "score"] = pa.array(
+            scores, type=pa.float64()
+        )
+    table = pa.table(arrays)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
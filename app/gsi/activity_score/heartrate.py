@@ -0,0 +1,152 @@
+"""
+Intraday heart-rate analytics.
+
+Fitbit's intraday heart-rate series (`FitbitClient.get_heartrate_intraday`)
+has a sample every few seconds, tens of thousands per day. Instead of passing
+it around as JSON, a day is parsed once into two compact arrays (seconds since
+midnight as uint32, bpm as uint8) and everything else is vectorised NumPy:
+
+- per-minute mean heart rate (`np.bincount`),
+- time in the Fat Burn / Cardio / Peak zones, using the zone bounds Fitbit
+  sends with the series, and Active Zone Minutes from them (1 per Fat Burn
+  minute, 2 per Cardio or Peak minute, as Fitbit counts them),
+- a resting heart-rate estimate (a low percentile of the per-minute means),
+- min/mean/max buckets for display (`ufunc.reduceat`).
+
+A day is stored as a zlib-compressed blob (delta-encoded times; ~20 KiB for
+a 1-second series that is ~0.5 MiB as JSON) next to its stats, so scoring can take AZM from
+stored days without the separate Active Zone Minutes call.
+
+NumPy is optional (requirements-analytics.txt): import this module lazily,
+after `heartrate_ingest.analytics_available()`.
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any
+
+import numpy as np
+
+from app.models import HeartRateDayRecord
+
+# Fitbit's defaults for a ~30-year-old; replaced by the bounds sent with each series
+DEFAULT_ZONES = (98, 137, 166)  # lower bpm of Fat Burn, Cardio, Peak
+RESTING_PERCENTILE = 5.0
+ZONE_NAMES = ("fat_burn", "cardio", "peak")
+
+_BLOB_HEADER = struct.Struct("<4sIBBB")
+_BLOB_MAGIC = b"HRI1"
+
+
+@dataclass
+class HeartRateSeries:
+    seconds: np.ndarray  # uint32, seconds since midnight, ascending
+    bpm: np.ndarray  # uint8
+    zones: tuple[int, int, int] = DEFAULT_ZONES
+
+    def __len__(self) -> int:
+        return int(self.bpm.size)
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> HeartRateSeries:
+        """Parse a `/activities/heart/date/<day>/1d/<detail>.json` response."""
+        dataset = payload.get("activities-heart-intraday", {}).get("dataset", [])
+        if not dataset:
+            return cls(np.zeros(0, np.uint32), np.zeros(0, np.uint8), _zones(payload))
+        # "HH:MM:SS" is fixed width: decode all timestamps at once from one byte buffer
+        chars = np.frombuffer("".join(p["time"] for p in dataset).encode(), dtype=np.uint8)
+        digits = chars.reshape(-1, 8).astype(np.uint32) - ord("0")
+        seconds = (digits[:, 0] * 10 + digits[:, 1]) * 3600 + (
+            digits[:, 3] * 10 + digits[:, 4]
+        ) * 60
+        seconds += digits[:, 6] * 10 + digits[:, 7]
+        bpm = np.fromiter((p["value"] for p in dataset), dtype=np.int32, count=len(dataset))
+        order = np.argsort(seconds, kind="stable")
+        return cls(seconds[order], np.clip(bpm[order], 0, 255).astype(np.uint8), _zones(payload))
+
+    # -- analytics ------------------------------------------------------
+
+    def minute_means(self) -> tuple[np.ndarray, np.ndarray]:
+        """(minute of day, mean bpm) for every minute with at least one sample."""
+        minutes = self.seconds // 60
+        counts = np.bincount(minutes, minlength=1440)
+        sums = np.bincount(minutes, weights=self.bpm, minlength=1440)
+        present = np.flatnonzero(counts)
+        return present, sums[present] / counts[present]
+
+    def zone_minutes(self) -> dict[str, int]:
+        _, means = self.minute_means()
+        zone = np.searchsorted(np.asarray(self.zones), means, side="right")  # 0 = below Fat Burn
+        counts = np.bincount(zone, minlength=4)
+        return {name: int(counts[i + 1]) for i, name in enumerate(ZONE_NAMES)}
+
+    def resting_heart_rate(self) -> float | None:
+        _, means = self.minute_means()
+        if means.size == 0:
+            return None
+        return round(float(np.percentile(means, RESTING_PERCENTILE)), 1)
+
+    def downsample(self, bucket_s: int) -> dict[str, list[Any]]:
+        """Columns t (bucket start, seconds since midnight), mean, min and max bpm."""
+        if not len(self):
+            return {"t": [], "mean": [], "min": [], "max": []}
+        buckets = self.seconds // max(1, bucket_s)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        counts = np.diff(np.r_[starts, buckets.size])
+        means = np.add.reduceat(self.bpm.astype(np.uint32), starts) / counts
+        return {
+            "t": (buckets[starts] * max(1, bucket_s)).tolist(),
+            "mean": np.round(means, 1).tolist(),
+            "min": np.minimum.reduceat(self.bpm, starts).tolist(),
+            "max": np.maximum.reduceat(self.bpm, starts).tolist(),
+        }
+
+    # -- storage --------------------------------------------------------
+
+    def to_blob(self) -> bytes:
+        deltas = np.diff(self.seconds, prepend=np.uint32(0)).astype("<u4")
+        header = _BLOB_HEADER.pack(_BLOB_MAGIC, len(self), *self.zones)
+        return header + zlib.compress(deltas.tobytes() + self.bpm.tobytes())
+
+    @classmethod
+    def from_blob(cls, blob: bytes) -> HeartRateSeries:
+        magic, n, fat_burn, cardio, peak = _BLOB_HEADER.unpack_from(blob)
+        if magic != _BLOB_MAGIC:
+            raise ValueError("Not an intraday heart-rate blob")
+        raw = zlib.decompress(blob[_BLOB_HEADER.size :])
+        seconds = np.cumsum(np.frombuffer(raw, dtype="<u4", count=n), dtype=np.uint32)
+        bpm = np.frombuffer(raw, dtype=np.uint8, count=n, offset=4 * n).copy()
+        return cls(seconds, bpm, (fat_burn, cardio, peak))
+
+    def to_record(self, day: date) -> HeartRateDayRecord:
+        zones = self.zone_minutes()
+        return HeartRateDayRecord(
+            date=day,
+            samples=len(self),
+            series=self.to_blob(),
+            resting_heart_rate=self.resting_heart_rate(),
+            fat_burn_minutes=zones["fat_burn"],
+            cardio_minutes=zones["cardio"],
+            peak_minutes=zones["peak"],
+            active_zone_minutes=active_zone_minutes(zones),
+            fetched_at=datetime.utcnow(),
+        )
+
+
+def active_zone_minutes(zone_minutes: dict[str, int]) -> int:
+    return zone_minutes["fat_burn"] + 2 * (zone_minutes["cardio"] + zone_minutes["peak"])
+
+
+def _zones(payload: dict[str, Any]) -> tuple[int, int, int]:
+    days = payload.get("activities-heart") or [{}]
+    bounds = {
+        z.get("name"): z.get("min") for z in days[0].get("value", {}).get("heartRateZones", [])
+    }
+    fat_burn, cardio, peak = bounds.get("Fat Burn"), bounds.get("Cardio"), bounds.get("Peak")
+    if fat_burn is None or cardio is None or peak is None:
+        return DEFAULT_ZONES
+    return int(fat_burn), int(cardio), int(peak)
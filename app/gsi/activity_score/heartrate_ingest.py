@@ -0,0 +1,108 @@
+"""
+Intraday heart-rate ingestion: fetch a day's series from Fitbit, analyse it
+(app.gsi.activity_score.heartrate) and store the compressed series with its
+stats in `fitbit_heartrate_day`.
+
+Days at least FITBIT_FINALIZED_AFTER_DAYS old no longer change, so once stored
+they are served from the database; more recent days are re-fetched. With
+GSI_AZM_SOURCE=intraday the Fitbit provider takes Active Zone Minutes from
+here instead of calling the Active Zone Minutes endpoint.
+
+Needs NumPy (requirements-analytics.txt); check `analytics_available()`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.database import session_scope
+from app.integrations.fitbit_client import FitbitClient
+from app.models import HeartRateDayRecord
+
+
+def analytics_available() -> bool:
+    return importlib.util.find_spec("numpy") is not None
+
+
+@dataclass(frozen=True)
+class HeartRateDay:
+    date: date
+    samples: int
+    series: bytes  # HeartRateSeries.to_blob()
+    resting_heart_rate: float | None
+    fat_burn_minutes: int
+    cardio_minutes: int
+    peak_minutes: int
+    active_zone_minutes: int
+    fetched_at: datetime
+
+    @classmethod
+    def from_record(cls, r: HeartRateDayRecord) -> HeartRateDay:
+        return cls(
+            date=r.date,
+            samples=r.samples,
+            series=r.series,
+            resting_heart_rate=r.resting_heart_rate,
+            fat_burn_minutes=r.fat_burn_minutes,
+            cardio_minutes=r.cardio_minutes,
+            peak_minutes=r.peak_minutes,
+            active_zone_minutes=r.active_zone_minutes,
+            fetched_at=r.fetched_at,
+        )
+
+
+class HeartRateIngestor:
+    def __init__(
+        self,
+        fitbit: FitbitClient,
+        session_factory: Callable[[], AbstractContextManager[Session]] = session_scope,
+        *,
+        detail_level: str = "1sec",
+        finalized_after_days: int = 2,
+        today: Callable[[], date] = date.today,
+    ):
+        if not analytics_available():
+            raise RuntimeError(
+                "Intraday heart-rate analytics need numpy (requirements-analytics.txt)"
+            )
+        self._fitbit = fitbit
+        self._session_factory = session_factory
+        self.detail_level = detail_level
+        self.finalized_after_days = finalized_after_days
+        self._today = today
+
+    def _load(self, day: date) -> HeartRateDay | None:
+        with self._session_factory() as db:
+            record = db.get(HeartRateDayRecord, day)
+            return HeartRateDay.from_record(record) if record is not None else None
+
+    def _analyse_and_store(self, day: date, payload: dict[str, Any]) -> HeartRateDay:
+        from .heartrate import HeartRateSeries
+
+        record = HeartRateSeries.from_payload(payload).to_record(day)
+        stored = HeartRateDay.from_record(record)
+        with self._session_factory() as db:
+            db.merge(record)
+            db.commit()
+        return stored
+
+    async def ingest(self, access_token: str, day: date) -> HeartRateDay:
+        payload = await self._fitbit.get_heartrate_intraday(access_token, day, self.detail_level)
+        return await asyncio.to_thread(self._analyse_and_store, day, payload)
+
+    async def stored(self, day: date) -> HeartRateDay | None:
+        """The stored day if it is final (no longer changes upstream), else None."""
+        if day > self._today() - timedelta(days=self.finalized_after_days):
+            return None
+        return await asyncio.to_thread(self._load, day)
+
+    async def get(self, access_token: str, day: date) -> HeartRateDay:
+        return await self.stored(day) or await self.ingest(access_token, day)
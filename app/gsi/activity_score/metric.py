@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from app.gsi.pipeline import DayPayloads
+
+from .fitbit_mapper import map_fitbit_daily_summary
+from .models import FitbitDailySummary
+
+
+class ActivityScoreModule:
+    """
+    The activity score's module in the GSI pipeline (app.gsi.pipeline):
+    maps the day's activity summary and Active Zone Minutes into the
+    FitbitDailySummary the calculators score.
+    """
+
+    name = "activity_score"
+    resources: tuple[str, ...] = ("activity", "active_zone_minutes")
+
+    def row(
+        self, day: date, payloads: DayPayloads, *, active_zone_minutes: int | None = None
+    ) -> dict[str, Any]:
+        """The day's mapped summary, not yet validated (ranges validate all days in one call)."""
+        mapped = map_fitbit_daily_summary(
+            payloads["activity"],
+            payloads.get("active_zone_minutes"),
+            day,
+            active_zone_minutes=active_zone_minutes,
+        )
+        mapped["stale"] = payloads.is_stale(self.resources)
+        return mapped
+
+    def compute(
+        self, day: date, payloads: DayPayloads, *, active_zone_minutes: int | None = None
+    ) -> FitbitDailySummary:
+        """`active_zone_minutes` (e.g. from intraday heart rate) replaces the AZM payload."""
+        return FitbitDailySummary.model_validate(
+            self.row(day, payloads, active_zone_minutes=active_zone_minutes)
+        )
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+from collections.abc import Iterable, Mapping
 from datetime import date
-from typing import Literal, Optional
+from typing import Any, Literal
 
-from pydantic import BaseModel, Field, NonNegativeInt
+from pydantic import BaseModel, Field, NonNegativeInt, TypeAdapter
 
 
 class FitbitDailySummary(BaseModel):
@@ -11,12 +12,26 @@ class FitbitDailySummary(BaseModel):
 
     Map these from whichever Fitbit endpoint(s) you already ingest.
     """
+
     date: date
     steps: NonNegativeInt = 0
-    active_zone_minutes: NonNegativeInt = Field(default=0, description="Fitbit Active Zone Minutes (AZM).")
+    active_zone_minutes: NonNegativeInt = Field(
+        default=0, description="Fitbit Active Zone Minutes (AZM)."
+    )
 
     # Optional fields you may add later if you decide to extend scoring (not used in v2.1)
-    calories_out: Optional[NonNegativeInt] = None
+    calories_out: NonNegativeInt | None = None
+
+    # Set when served from an expired cache entry because Fitbit was unavailable
+    stale: bool = Field(default=False, exclude=True)
+
+
+_summaries = TypeAdapter(list[FitbitDailySummary])
+
+
+def validate_summaries(rows: Iterable[Mapping[str, Any]]) -> list[FitbitDailySummary]:
+    """Summaries for mapped rows (e.g. from `map_fitbit_daily_summary`), validated in one call."""
+    return _summaries.validate_python(list(rows))
 
 
 class ActivityScoreBreakdown(BaseModel):
@@ -31,3 +46,67 @@ class ActivityScoreResult(BaseModel):
     breakdown: ActivityScoreBreakdown
     steps: int
     active_zone_minutes: int
+    stale: bool = Field(
+        default=False, description="Last known value, served while Fitbit is unavailable."
+    )
+
+
+class VersionedScore(BaseModel):
+    score: float = Field(ge=0, le=10)
+    breakdown: ActivityScoreBreakdown
+
+
+class ActivityScoreComparison(BaseModel):
+    """One day scored by several calculator versions (`?versions=` on /day and /range)."""
+
+    date: date
+    steps: int
+    active_zone_minutes: int
+    scores: dict[str, VersionedScore]
+    stale: bool = Field(
+        default=False, description="Last known value, served while Fitbit is unavailable."
+    )
+
+
+RollupPeriod = Literal["week", "month"]
+
+
+class ActivityScoreRollup(BaseModel):
+    period: RollupPeriod
+    start_date: date
+    end_date: date
+    days: int = Field(description="Days with synced data in the period.")
+    mean_score: float
+    min_score: float
+    max_score: float
+    total_steps: int
+    total_active_zone_minutes: int
+    longest_streak: int = Field(
+        description="Most consecutive days scoring at least GSI_ROLLUP_STREAK_MIN_SCORE."
+    )
+    moving_avg_score: float = Field(
+        description="Mean daily score over this period and the `window - 1` before it."
+    )
+
+
+class HeartRateSeriesBuckets(BaseModel):
+    """Downsampled intraday heart rate, one entry per bucket in each list."""
+
+    bucket_s: int
+    t: list[int] = Field(description="Bucket start, seconds since midnight.")
+    mean: list[float]
+    min: list[int]
+    max: list[int]
+
+
+class HeartRateDaySummary(BaseModel):
+    date: date
+    samples: int
+    resting_heart_rate: float | None = Field(
+        description="Estimated from the lowest per-minute means."
+    )
+    fat_burn_minutes: int
+    cardio_minutes: int
+    peak_minutes: int
+    active_zone_minutes: int
+    series: HeartRateSeriesBuckets
@@ -0,0 +1,175 @@
+"""
+Predictive prefetch for the activity-score API.
+
+The UI asks for day D and then scrolls back through D-1..D-k, so after serving
+/day/{D} we warm those days into `summary_cache` in the background. Prefetch
+never competes with interactive traffic for quota: it only spends the Fitbit
+rate-limit budget above FITBIT_SYNC_MIN_REMAINING, skips days already cached or
+already being prefetched, and its upstream GETs go through the client's
+single-flight layer, so a foreground request for the same day shares the call.
+
+`snapshot()` reports how many prefetched days were later requested (hits) so
+GSI_PREFETCH_DAYS can be tuned.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+from app import deadline
+from app.cache import TTLCache
+from app.config import get_settings
+from app.integrations.fitbit_client import RateLimitState
+from app.integrations.fitbit_client import rate_limit as fitbit_rate_limit
+
+from . import deps
+from .cache import _missing_runs, summary_cache
+from .models import FitbitDailySummary
+from .provider import FitbitDailySummaryProvider
+
+logger = logging.getLogger("app.gsi.activity_score.prefetch")
+
+settings = get_settings()
+
+# Each summary costs two Fitbit calls: the activity summary and AZM
+CALLS_PER_DAY = 2
+
+
+@dataclass
+class PrefetchStats:
+    scheduled: int = 0
+    fetched: int = 0
+    hits: int = 0
+    skipped_cached: int = 0
+    skipped_budget: int = 0
+    deduplicated: int = 0
+    failures: int = 0
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        cache: TTLCache[date, FitbitDailySummary] = summary_cache,
+        *,
+        window_days: int,
+        min_remaining: int,
+        rate_limit: RateLimitState = fitbit_rate_limit,
+        provider_factory: Callable[[], FitbitDailySummaryProvider] | None = None,
+    ):
+        self.cache = cache
+        self.window_days = window_days
+        self.min_remaining = min_remaining
+        self.rate_limit = rate_limit
+        self._provider_factory = provider_factory or (
+            lambda: deps.get_upstream_daily_summary_provider()
+        )
+        self._pending: set[date] = set()
+        # Days warmed by prefetch and not requested yet; expire with the cache entry
+        self._unclaimed: TTLCache[date, None] = TTLCache(maxsize=cache.maxsize, ttl_s=cache.ttl_s)
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.stats = PrefetchStats()
+
+    def note_request(self, day: date) -> None:
+        """Call before serving `day`; counts a hit if prefetch warmed it."""
+        if self._unclaimed.peek(day) and self.cache.peek(day):
+            self.stats.hits += 1
+        self._unclaimed.delete(day)
+
+    def _affordable_days(self) -> int | None:
+        available = self.rate_limit.available()
+        if available is None:
+            return None
+        return max(0, (available - self.min_remaining) // CALLS_PER_DAY)
+
+    def schedule(self, day: date) -> list[date]:
+        """Start a background prefetch of the days before `day`; returns the days scheduled."""
+        if self.window_days <= 0:
+            return []
+        wanted: list[date] = []
+        for i in range(1, self.window_days + 1):
+            d = day - timedelta(days=i)
+            if self.cache.peek(d):
+                self.stats.skipped_cached += 1
+            elif d in self._pending:
+                self.stats.deduplicated += 1
+            else:
+                wanted.append(d)
+
+        affordable = self._affordable_days()
+        if affordable is not None and affordable < len(wanted):
+            # Nearest days first: they are the likeliest next requests
+            self.stats.skipped_budget += len(wanted) - affordable
+            wanted = wanted[:affordable]
+        if not wanted:
+            return []
+
+        self._pending.update(wanted)
+        self.stats.scheduled += len(wanted)
+        task = deadline.detached_task(self._fetch(wanted), name="gsi-prefetch")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return wanted
+
+    async def _fetch(self, days: list[date]) -> None:
+        try:
+            provider = self._provider_factory()
+            ascending = sorted(days)
+            # Contiguous runs share one token refresh; newest run first
+            for start, end in reversed(_missing_runs(ascending, set())):
+                affordable = self._affordable_days()
+                if affordable is not None and affordable < (end - start).days + 1:
+                    self.stats.skipped_budget += (end - start).days + 1
+                    continue
+                try:
+                    summaries = await provider.get_daily_activity_summaries(start, end)
+                except Exception as exc:
+                    self.stats.failures += 1
+                    logger.warning("Prefetch of %s..%s failed: %s", start, end, exc)
+                    continue
+                for summary in summaries:
+                    self.cache.set(summary.date, summary)
+                    self._unclaimed.set(summary.date, None)
+                    self.stats.fetched += 1
+        finally:
+            self._pending.difference_update(days)
+
+    async def drain(self) -> None:
+        """Wait for every prefetch scheduled so far."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def stop(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        s = self.stats
+        return {
+            "window_days": self.window_days,
+            "in_flight": len(self._pending),
+            "scheduled": s.scheduled,
+            "fetched": s.fetched,
+            "hits": s.hits,
+            "hit_rate": round(s.hits / s.fetched, 3) if s.fetched else None,
+            "skipped_cached": s.skipped_cached,
+            "skipped_budget": s.skipped_budget,
+            "deduplicated": s.deduplicated,
+            "failures": s.failures,
+        }
+
+
+# Prefetch only makes sense when /day reads through the summary cache
+prefetcher = Prefetcher(
+    window_days=(
+        settings.gsi_prefetch_days
+        if settings.gsi_summary_source == "fitbit" and settings.gsi_summary_cache_ttl_s > 0
+        else 0
+    ),
+    min_remaining=settings.fitbit_sync_min_remaining,
+)
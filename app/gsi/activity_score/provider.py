@@ -2,10 +2,14 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from datetime import date
-from typing import List
 
 from .models import FitbitDailySummary
 
+
+class SummaryNotAvailableError(LookupError):
+    """Raised when a provider has no summary for the requested date."""
+
+
 class FitbitDailySummaryProvider(ABC):
     """Abstract base class for providing Fitbit daily summaries."""
 
@@ -24,7 +28,9 @@ class FitbitDailySummaryProvider(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def get_daily_activity_summaries(self, start_date: date, end_date: date) -> List[FitbitDailySummary]:
+    async def get_daily_activity_summaries(
+        self, start_date: date, end_date: date
+    ) -> list[FitbitDailySummary]:
         """
         Retrieves a list of Fitbit daily summaries for a given user and date range.
 
@@ -36,4 +42,4 @@ class FitbitDailySummaryProvider(ABC):
         Returns:
             A list of FitbitDailySummary objects.
         """
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+from typing import Any
+
+from app.integrations.fitbit_archive import FitbitArchive
+from app.integrations.fitbit_client import (
+    ACTIVE_ZONE_MINUTES_PATH,
+    ACTIVITY_SUMMARY_PATH,
+    HEARTRATE_INTRADAY_PATH,
+)
+
+from .fitbit_mapper import map_fitbit_daily_summary
+from .heartrate_ingest import analytics_available
+from .models import FitbitDailySummary, validate_summaries
+from .provider import FitbitDailySummaryProvider, SummaryNotAvailableError
+
+
+class ArchiveDailySummaryProvider(FitbitDailySummaryProvider):
+    """
+    Maps raw payloads from the Fitbit archive (app.integrations.fitbit_archive)
+    with the current `map_fitbit_daily_summary`; never calls Fitbit. Days whose
+    Active Zone Minutes response was not archived take AZM from an archived
+    intraday heart-rate series when there is one (and numpy is installed).
+    """
+
+    def __init__(
+        self,
+        archive: FitbitArchive,
+        user_id: str | None = None,
+        *,
+        heartrate_detail_level: str = "1sec",
+    ):
+        self._archive = archive
+        self._user_id = user_id
+        self._heartrate_template = HEARTRATE_INTRADAY_PATH.replace(
+            "{detail_level}", heartrate_detail_level
+        )
+
+    def _azm_from_heartrate(self, day: date) -> int | None:
+        if not analytics_available():
+            return None
+        payload = self._archive.load(self._user_id, self._heartrate_template, day)
+        if payload is None:
+            return None
+        from .heartrate import HeartRateSeries, active_zone_minutes
+
+        return active_zone_minutes(HeartRateSeries.from_payload(payload).zone_minutes())
+
+    def _row(self, day: date) -> dict[str, Any] | None:
+        summary = self._archive.load(self._user_id, ACTIVITY_SUMMARY_PATH, day)
+        if summary is None:
+            return None
+        azm_payload = self._archive.load(self._user_id, ACTIVE_ZONE_MINUTES_PATH, day)
+        azm = self._azm_from_heartrate(day) if azm_payload is None else None
+        return map_fitbit_daily_summary(summary, azm_payload, day, active_zone_minutes=azm)
+
+    def map_day(self, day: date) -> FitbitDailySummary | None:
+        row = self._row(day)
+        return FitbitDailySummary.model_validate(row) if row is not None else None
+
+    def map_range(self, start_date: date, end_date: date) -> list[FitbitDailySummary]:
+        """Mapped days in order; days without an archived activity summary are omitted."""
+        rows = []
+        d = start_date
+        while d <= end_date:
+            row = self._row(d)
+            if row is not None:
+                rows.append(row)
+            d += timedelta(days=1)
+        return validate_summaries(rows)
+
+    async def get_daily_activity_summary(self, date: date) -> FitbitDailySummary:
+        mapped = await asyncio.to_thread(self.map_day, date)
+        if mapped is None:
+            raise SummaryNotAvailableError(f"No archived Fitbit data for {date.isoformat()}")
+        return mapped
+
+    async def get_daily_activity_summaries(
+        self, start_date: date, end_date: date
+    ) -> list[FitbitDailySummary]:
+        return await asyncio.to_thread(self.map_range, start_date, end_date)
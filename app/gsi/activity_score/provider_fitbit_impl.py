@@ -1,20 +1,56 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import List
+from collections.abc import Awaitable, Callable
+from datetime import date
+from typing import Any
 
-from .models import FitbitDailySummary
+from app.cache import TTLCache
+from app.gsi.pipeline import GsiPipeline, shared_token
+from app.integrations.fitbit_client import FitbitClient, get_fresh_access_token
+
+from .heartrate_ingest import HeartRateIngestor
+from .metric import ActivityScoreModule
+from .models import FitbitDailySummary, validate_summaries
 from .provider import FitbitDailySummaryProvider
-from .fitbit_mapper import map_fitbit_daily_summary
-from app.integrations.fitbit_client import get_fresh_access_token
+
 
 class ExistingFitbitIntegrationProvider(FitbitDailySummaryProvider):
     """
     This class provides an implementation of the FitbitDailySummaryProvider
     interface for existing Fitbit integrations.
+
+    `access_token` defaults to the single-account refresh flow; pass e.g.
+    `lambda: token_store.get_access_token(user_id)` to read a stored user's data.
+
+    Payloads are fetched through the GSI pipeline (app.gsi.pipeline); pass the
+    section cache as `cache` to share them with /fitbit/daily-summary (single
+    account only: its keys carry no user).
+
+    With a `heartrate` ingestor, Active Zone Minutes are computed from the
+    day's intraday heart rate (stored, or fetched and stored) instead of
+    calling the Active Zone Minutes endpoint.
     """
-    def __init__(self, fitbit: FitbitClient):
+
+    def __init__(
+        self,
+        fitbit: FitbitClient,
+        access_token: Callable[[], Awaitable[str]] = get_fresh_access_token,
+        *,
+        heartrate: HeartRateIngestor | None = None,
+        cache: TTLCache[tuple[str, date], dict[str, Any]] | None = None,
+    ):
         self._fitbit = fitbit
+        self._access_token = access_token
+        self._heartrate = heartrate
+        self._module = ActivityScoreModule()
+        self._pipeline = GsiPipeline(fitbit, access_token, [self._module], cache=cache)
+
+    async def _row(self, token: Callable[[], Awaitable[str]], day: date) -> dict[str, Any]:
+        if self._heartrate is None:
+            return self._module.row(day, await self._pipeline.fetch(day, access_token=token))
+        payloads = await self._pipeline.fetch(day, ["activity"], access_token=token)
+        azm = (await self._heartrate.get(await token(), day)).active_zone_minutes
+        return self._module.row(day, payloads, active_zone_minutes=azm)
 
     # async def _get_fresh_access_token() -> str:
     #     """
@@ -32,7 +68,7 @@ class ExistingFitbitIntegrationProvider(FitbitDailySummaryProvider):
     #     secrets_store.write_new_version("fitbit_refresh_token", tokens.refresh_token)
     #     return tokens.access_token
 
-    async def get_daily_activity_summary(self, date: datetime) -> FitbitDailySummary:
+    async def get_daily_activity_summary(self, date: date) -> FitbitDailySummary:
         """
         Retrieves a daily summary for a given user on a specific date.
 
@@ -43,18 +79,13 @@ class ExistingFitbitIntegrationProvider(FitbitDailySummaryProvider):
         Returns:
             A FitbitDailySummary object.
         """
-        token = await get_fresh_access_token()
-        summary = await self._fitbit.get_daily_activity_summary(token, date)
-        azmRes = await self._fitbit.get_active_zone_minutes(token, date)
-        print(f"AZM: {azmRes}")
-        
-        data = map_fitbit_daily_summary(summary, azmRes, date)
-
-        return FitbitDailySummary(**data)
+        return FitbitDailySummary.model_validate(
+            await self._row(shared_token(self._access_token), date)
+        )
 
     async def get_daily_activity_summaries(
-        self, start_date: datetime, end_date: datetime
-    ) -> List[FitbitDailySummary]:
+        self, start_date: date, end_date: date
+    ) -> list[FitbitDailySummary]:
         """
         Retrieves a list of daily summaries for a given user within a specified date range.
 
@@ -66,13 +97,6 @@ class ExistingFitbitIntegrationProvider(FitbitDailySummaryProvider):
         Returns:
             A list of FitbitDailySummary objects.
         """
-        results: List[FitbitDailySummary] = []
-        d = start_date
-        token = await get_fresh_access_token()
-        while d <= end_date:
-            payload = await self._fitbit.get_daily_activity_summary(token, d)
-            azmRes = await self._fitbit.get_active_zone_minutes(token, d)
-            mapped = map_fitbit_daily_summary(payload, azmRes, d)
-            results.append(FitbitDailySummary(**mapped))
-            d += timedelta(days=1)
-        return results
+        token = shared_token(self._access_token)
+        rows = await self._pipeline.map_days(start_date, end_date, lambda d: self._row(token, d))
+        return validate_summaries(rows)
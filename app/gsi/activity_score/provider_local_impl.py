@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from .models import FitbitDailySummary
+from .provider import FitbitDailySummaryProvider, SummaryNotAvailableError
+from .store import load_summaries
+
+
+class LocalDailySummaryProvider(FitbitDailySummaryProvider):
+    """
+    Serves summaries that app.workers.sync has stored in the database.
+    Never calls Fitbit, so request latency does not include upstream fetches.
+    """
+
+    def __init__(self, session_factory: Callable[[], AbstractContextManager[Session]]):
+        self._session_factory = session_factory
+
+    def _load(self, start_date: date, end_date: date) -> list[FitbitDailySummary]:
+        with self._session_factory() as db:
+            return load_summaries(db, start_date, end_date)
+
+    async def get_daily_activity_summary(self, date: date) -> FitbitDailySummary:
+        rows = await asyncio.to_thread(self._load, date, date)
+        if not rows:
+            raise SummaryNotAvailableError(f"No synced Fitbit data for {date.isoformat()}")
+        return rows[0]
+
+    async def get_daily_activity_summaries(
+        self, start_date: date, end_date: date
+    ) -> list[FitbitDailySummary]:
+        """Days the worker has not synced yet are omitted."""
+        return await asyncio.to_thread(self._load, start_date, end_date)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Protocol
+
+from app.config import get_settings
+
+from .models import ActivityScoreResult, FitbitDailySummary
+
+
+class ActivityScoreCalculator(Protocol):
+    @property
+    def version(self) -> str: ...
+
+    def calculate(self, day: FitbitDailySummary) -> ActivityScoreResult: ...
+
+    def calculate_many(self, days: Sequence[FitbitDailySummary]) -> list[ActivityScoreResult]: ...
+
+    def score(self, steps: int, azm: int) -> float: ...
+
+
+class UnknownCalculatorVersionError(LookupError):
+    """Raised for a requested score version that no calculator provides."""
+
+
+class CalculatorRegistry:
+    """Activity Score calculators keyed by their `version`."""
+
+    def __init__(self, calculators: list[ActivityScoreCalculator], *, default: str):
+        self._calculators = {c.version: c for c in calculators}
+        if default not in self._calculators:
+            raise UnknownCalculatorVersionError(default)
+        self.default = default
+
+    def versions(self) -> list[str]:
+        return sorted(self._calculators)
+
+    def get(self, version: str | None = None) -> ActivityScoreCalculator:
+        try:
+            return self._calculators[version or self.default]
+        except KeyError:
+            raise UnknownCalculatorVersionError(
+                f"Unknown score version {version!r}; available: {', '.join(self.versions())}"
+            ) from None
+
+    def resolve(self, versions: str) -> list[ActivityScoreCalculator]:
+        """Calculators for a comma-separated `versions` list, in the order given, without repeats."""
+        requested = dict.fromkeys(v.strip() for v in versions.split(",") if v.strip())
+        return [self.get(v) for v in requested]
+
+
+@lru_cache
+def get_calculator_registry() -> CalculatorRegistry:
+    """Every shipped calculator; the default is the version stored in activity_score_daily."""
+    from .calculator import ActivityScoreCalculatorV1, ActivityScoreCalculatorV2
+
+    return CalculatorRegistry(
+        [ActivityScoreCalculatorV1(), ActivityScoreCalculatorV2()],
+        default=get_settings().gsi_score_version,
+    )
@@ -0,0 +1,213 @@
+"""
+Materialized weekly/monthly activity-score rollups.
+
+Every write to the local summary store (app.workers.sync, subscription
+re-fetches) goes through `store.upsert_summaries`, which calls
+`apply_summaries`: each day is scored with the GSI_SCORE_VERSION calculator
+(ActivityScoreCalculatorV2 by default) into
+`activity_score_daily`, and only the week/month buckets containing a day whose
+score or totals actually changed are re-aggregated (from at most 31 daily rows)
+into `activity_score_rollup`. Reads never touch the daily table.
+
+Weeks start on Monday. Moving averages are computed when reading, from the
+rollups of the preceding periods.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import ActivityScoreDailyRecord, ActivityScoreRollupRecord
+
+from .models import ActivityScoreRollup, FitbitDailySummary, RollupPeriod
+from .registry import get_calculator_registry
+
+PERIODS: tuple[RollupPeriod, ...] = ("week", "month")
+
+
+def period_start(period: str, day: date) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown rollup period {period!r}")
+
+
+def period_end(period: str, start: date) -> date:
+    if period == "week":
+        return start + timedelta(days=6)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def previous_start(period: str, start: date) -> date:
+    return period_start(period, start - timedelta(days=1))
+
+
+def _longest_streak(rows: list[ActivityScoreDailyRecord], min_score: float) -> int:
+    longest = current = 0
+    previous: date | None = None
+    for row in rows:
+        if row.score >= min_score:
+            consecutive = previous is not None and row.date - previous == timedelta(days=1)
+            current = current + 1 if consecutive else 1
+            longest = max(longest, current)
+            previous = row.date
+        else:
+            current = 0
+            previous = None
+    return longest
+
+
+def buckets_for(dates: Iterable[date]) -> set[tuple[str, date]]:
+    return {(period, period_start(period, d)) for d in dates for period in PERIODS}
+
+
+def rebuild_buckets(db: Session, buckets: Iterable[tuple[str, date]]) -> None:
+    """Re-aggregate `buckets` from activity_score_daily (flush pending daily rows first; no commit)."""
+    for period, start in sorted(buckets):
+        _rebuild_bucket(db, period, start)
+
+
+def _rebuild_bucket(db: Session, period: str, start: date) -> None:
+    rows = list(
+        db.scalars(
+            select(ActivityScoreDailyRecord)
+            .where(ActivityScoreDailyRecord.date.between(start, period_end(period, start)))
+            .order_by(ActivityScoreDailyRecord.date)
+        )
+    )
+    key = (period, start)
+    if not rows:
+        existing = db.get(ActivityScoreRollupRecord, key)
+        if existing is not None:
+            db.delete(existing)
+        return
+    scores = [r.score for r in rows]
+    db.merge(
+        ActivityScoreRollupRecord(
+            period=period,
+            period_start=start,
+            days=len(rows),
+            score_sum=sum(scores),
+            score_min=min(scores),
+            score_max=max(scores),
+            steps_total=sum(r.steps for r in rows),
+            active_zone_minutes_total=sum(r.active_zone_minutes for r in rows),
+            longest_streak=_longest_streak(rows, get_settings().gsi_rollup_streak_min_score),
+            updated_at=datetime.utcnow(),
+        )
+    )
+
+
+def apply_summaries(db: Session, summaries: list[FitbitDailySummary]) -> int:
+    """
+    Score `summaries` into activity_score_daily and refresh the rollup buckets
+    of the days that changed (no commit). Returns the number of changed days.
+    """
+    if not summaries:
+        return 0
+    dates = [s.date for s in summaries]
+    existing = {
+        r.date: r
+        for r in db.scalars(
+            select(ActivityScoreDailyRecord).where(ActivityScoreDailyRecord.date.in_(dates))
+        )
+    }
+    calculator = get_calculator_registry().get()
+    changed: list[date] = []
+    for summary in summaries:
+        # Only the score is stored, so skip building result models
+        steps, azm = int(summary.steps), int(summary.active_zone_minutes)
+        score = float(calculator.score(steps, azm))
+        row = existing.get(summary.date)
+        current = (score, steps, azm, calculator.version)
+        if (
+            row is not None
+            and (row.score, row.steps, row.active_zone_minutes, row.version) == current
+        ):
+            continue
+        db.merge(
+            ActivityScoreDailyRecord(
+                date=summary.date,
+                score=score,
+                steps=steps,
+                active_zone_minutes=azm,
+                version=calculator.version,
+            )
+        )
+        changed.append(summary.date)
+    if changed:
+        db.flush()
+        rebuild_buckets(db, buckets_for(changed))
+    return len(changed)
+
+
+def rebuild_all(db: Session) -> int:
+    """Recompute every bucket from the daily table (after a calculator change or a restore; no commit)."""
+    buckets = buckets_for(db.scalars(select(ActivityScoreDailyRecord.date)))
+    # Existing buckets without daily rows any more are deleted by _rebuild_bucket
+    buckets.update(
+        db.execute(
+            select(ActivityScoreRollupRecord.period, ActivityScoreRollupRecord.period_start)
+        ).tuples()
+    )
+    rebuild_buckets(db, buckets)
+    return len(buckets)
+
+
+def load_rollups(
+    db: Session, period: RollupPeriod, start_date: date, end_date: date, window: int
+) -> list[ActivityScoreRollup]:
+    """
+    Rollups for the periods overlapping [start_date, end_date], oldest first,
+    with `moving_avg_score` over the period and the `window - 1` before it.
+    """
+    first = period_start(period, start_date)
+    lookback = first
+    for _ in range(max(0, window - 1)):
+        lookback = previous_start(period, lookback)
+    rows = {
+        r.period_start: r
+        for r in db.scalars(
+            select(ActivityScoreRollupRecord).where(
+                ActivityScoreRollupRecord.period == period,
+                ActivityScoreRollupRecord.period_start.between(lookback, end_date),
+            )
+        )
+    }
+
+    results: list[ActivityScoreRollup] = []
+    start = first
+    while start <= end_date:
+        row = rows.get(start)
+        if row is not None:
+            window_rows = [row]
+            prev = start
+            for _ in range(max(0, window - 1)):
+                prev = previous_start(period, prev)
+                if prev in rows:
+                    window_rows.append(rows[prev])
+            window_days = sum(r.days for r in window_rows)
+            results.append(
+                ActivityScoreRollup(
+                    period=period,
+                    start_date=start,
+                    end_date=period_end(period, start),
+                    days=row.days,
+                    mean_score=round(row.score_sum / row.days, 2),
+                    min_score=row.score_min,
+                    max_score=row.score_max,
+                    total_steps=row.steps_total,
+                    total_active_zone_minutes=row.active_zone_minutes_total,
+                    longest_streak=row.longest_streak,
+                    moving_avg_score=round(sum(r.score_sum for r in window_rows) / window_days, 2),
+                )
+            )
+        start = period_end(period, start) + timedelta(days=1)
+    return results
@@ -1,43 +1,236 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import List
+from typing import Literal
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
 
-from .calculator import ActivityScoreCalculatorV1, ActivityScoreCalculatorV2
-from .deps import get_activity_score_calculator_v1, get_activity_score_calculator_v2, get_fitbit_daily_summary_provider
-from .models import ActivityScoreResult
-from .provider import FitbitDailySummaryProvider
+from app.config import get_settings
+from app.database import get_read_db
+from app.deadline import route_deadline
+from app.responses import model_response
+
+from . import export, formats
+from .deps import (
+    get_calculator_registry,
+    get_fitbit_daily_summary_provider,
+    get_heartrate_ingestor,
+)
+from .heartrate_ingest import HeartRateIngestor
+from .models import (
+    ActivityScoreComparison,
+    ActivityScoreResult,
+    ActivityScoreRollup,
+    FitbitDailySummary,
+    HeartRateDaySummary,
+    HeartRateSeriesBuckets,
+    RollupPeriod,
+    VersionedScore,
+)
+from .prefetch import prefetcher
+from .provider import FitbitDailySummaryProvider, SummaryNotAvailableError
+from .registry import ActivityScoreCalculator, CalculatorRegistry, UnknownCalculatorVersionError
+from .rollup import load_rollups
 
 router = APIRouter(prefix="/gsi/activity-score", tags=["GSI"])
 
+VERSIONS_QUERY = Query(
+    None,
+    description="Comma-separated calculator versions (e.g. 1.0.0,2.0.0) to score the same Fitbit data with.",
+)
+
+
+def _calculators(
+    versions: str | None, registry: CalculatorRegistry
+) -> list[ActivityScoreCalculator]:
+    try:
+        calculators = registry.resolve(versions or "")
+    except UnknownCalculatorVersionError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if not calculators:
+        raise HTTPException(status_code=400, detail="versions must name at least one calculator")
+    return calculators
+
+
+def _compare(
+    summary: FitbitDailySummary, calculators: list[ActivityScoreCalculator]
+) -> ActivityScoreComparison:
+    scores = {}
+    for calculator in calculators:
+        result = calculator.calculate(summary)
+        scores[calculator.version] = VersionedScore(score=result.score, breakdown=result.breakdown)
+    return ActivityScoreComparison(
+        date=summary.date,
+        steps=result.steps,
+        active_zone_minutes=result.active_zone_minutes,
+        scores=scores,
+        stale=summary.stale,
+    )
 
-@router.get("/day/{day}", response_model=ActivityScoreResult)
+
+@router.get("/day/{day}", response_model=ActivityScoreResult | ActivityScoreComparison)
 async def get_activity_score(
     day: date,
-    calculator: ActivityScoreCalculatorV2 = Depends(get_activity_score_calculator_v2),
-    provider: FitbitDailySummaryProvider = Depends(get_fitbit_daily_summary_provider)
-) -> ActivityScoreResult: 
-    summary = await provider.get_daily_activity_summary(day)
-    return calculator.calculate(summary)
+    prefetch: bool = Query(
+        True, description="Warm the preceding days into the cache in the background."
+    ),
+    versions: str | None = VERSIONS_QUERY,
+    registry: CalculatorRegistry = Depends(get_calculator_registry),
+    provider: FitbitDailySummaryProvider = Depends(get_fitbit_daily_summary_provider),
+) -> Response:
+    calculators = _calculators(versions, registry) if versions is not None else None
+    prefetcher.note_request(day)
+    try:
+        summary = await provider.get_daily_activity_summary(day)
+    except SummaryNotAvailableError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    if prefetch and not summary.stale:
+        prefetcher.schedule(day)
+    if calculators is not None:
+        return model_response(_compare(summary, calculators), ActivityScoreComparison)
+    return model_response(registry.get().calculate(summary), ActivityScoreResult)
 
 
-@router.get("/range", response_model=None)
+@router.get(
+    "/range",
+    response_model=list[ActivityScoreResult] | list[ActivityScoreComparison],
+    dependencies=[Depends(route_deadline(get_settings().gsi_range_deadline_s))],
+)
 async def get_range_scores(
     start_date: date = Query(..., description="The start date of the range."),
     end_date: date = Query(..., description="The end date of the range."),
-    calculator: ActivityScoreCalculatorV2 = Depends(get_activity_score_calculator_v2),
-    provider: FitbitDailySummaryProvider = Depends(get_fitbit_daily_summary_provider)
-) -> list[ActivityScoreResult]:
+    versions: str | None = VERSIONS_QUERY,
+    format: str | None = Query(
+        None,
+        description="json (per-day objects), columns, msgpack or arrow; overrides the Accept header.",
+    ),
+    accept: str | None = Header(None, include_in_schema=False),
+    registry: CalculatorRegistry = Depends(get_calculator_registry),
+    provider: FitbitDailySummaryProvider = Depends(get_fitbit_daily_summary_provider),
+) -> Response:
+    """
+    Per-day score objects by default. Columnar layouts (one array per field,
+    see `formats`) are negotiated via Accept or `?format=`:
+    application/vnd.activity-score.columns+json, application/msgpack,
+    application/vnd.apache.arrow.stream.
+    """
+    try:
+        fmt = formats.negotiate(format, accept)
+    except formats.UnsupportedFormatError as exc:
+        raise HTTPException(status_code=406, detail=str(exc)) from exc
+    calculators = _calculators(versions, registry) if versions is not None else None
+    calculator = registry.get()
     days = await provider.get_daily_activity_summaries(start_date, end_date)
-    results = []
-    for day in days:
-        print(f"Day: {day}")
-        result = calculator.calculate(day)
-        print(f"Result: {result}")
-        results.append(result)
-    return results
+    if fmt != formats.JSON:
+        columns = formats.ScoreColumns.build(days, calculators or [calculator])
+        return Response(
+            formats.encode(columns, fmt, keyed_scores=calculators is not None),
+            media_type=formats.MEDIA_TYPES[fmt],
+            headers={"Vary": "Accept"},
+        )
+    if calculators is not None:
+        return model_response(
+            [_compare(day, calculators) for day in days], list[ActivityScoreComparison]
+        )
+    return model_response(calculator.calculate_many(days), list[ActivityScoreResult])
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_scores(
+    start_date: date = Query(..., description="First day to export."),
+    end_date: date = Query(..., description="Last day to export."),
+    format: Literal["csv", "parquet"] = Query("csv"),
+    versions: str | None = VERSIONS_QUERY,
+    registry: CalculatorRegistry = Depends(get_calculator_registry),
+    provider: FitbitDailySummaryProvider = Depends(get_fitbit_daily_summary_provider),
+) -> StreamingResponse:
+    """
+    Daily summaries and scores (GSI_SCORE_VERSION, or one column per `versions`)
+    for any range, streamed EXPORT_CHUNK_DAYS at a time. CSV rows arrive per
+    chunk, so an interrupted download resumes with start_date set to the day
+    after its last complete row. Days without data are omitted.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    try:
+        export.check_format(format)
+    except formats.UnsupportedFormatError as exc:
+        raise HTTPException(status_code=406, detail=str(exc)) from exc
+    calculators = _calculators(versions, registry) if versions is not None else [registry.get()]
+    settings = get_settings()
+    body = export.stream_export(
+        provider,
+        calculators,
+        start_date,
+        end_date,
+        format,
+        chunk_days=settings.export_chunk_days,
+        chunk_timeout_s=settings.gsi_range_deadline_s,
+    )
+    filename = f"activity-scores_{start_date.isoformat()}_{end_date.isoformat()}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/heartrate/{day}", response_model=HeartRateDaySummary)
+async def get_heartrate_day(
+    day: date,
+    bucket_s: int = Query(
+        300, ge=1, le=3600, description="Downsampling bucket for the series, in seconds."
+    ),
+    ingestor: HeartRateIngestor = Depends(get_heartrate_ingestor),
+) -> Response:
+    """
+    Time in heart-rate zones, Active Zone Minutes and resting heart rate computed
+    from the day's intraday series, plus the series downsampled for display.
+    Final days are served from the stored series; others are fetched and stored.
+    """
+    from app.integrations.fitbit_client import get_fresh_access_token
+
+    from .heartrate import HeartRateSeries
+
+    stored = await ingestor.stored(day) or await ingestor.ingest(
+        await get_fresh_access_token(), day
+    )
+    if not stored.samples:
+        raise HTTPException(status_code=404, detail=f"No intraday heart rate for {day.isoformat()}")
+    series = HeartRateSeries.from_blob(stored.series).downsample(bucket_s)
+    summary = HeartRateDaySummary(
+        date=day,
+        samples=stored.samples,
+        resting_heart_rate=stored.resting_heart_rate,
+        fat_burn_minutes=stored.fat_burn_minutes,
+        cardio_minutes=stored.cardio_minutes,
+        peak_minutes=stored.peak_minutes,
+        active_zone_minutes=stored.active_zone_minutes,
+        series=HeartRateSeriesBuckets(bucket_s=bucket_s, **series),
+    )
+    return model_response(summary, HeartRateDaySummary)
+
+
+@router.get("/rollup", response_model=list[ActivityScoreRollup])
+def get_rollups(
+    period: RollupPeriod = Query("week"),
+    start_date: date = Query(..., description="First day of the first period to include."),
+    end_date: date = Query(..., description="Last day of the last period to include."),
+    window: int = Query(4, ge=1, le=52, description="Periods averaged into moving_avg_score."),
+    db: Session = Depends(get_read_db),
+) -> list[ActivityScoreRollup]:
+    """
+    Weekly (Monday-based) or monthly V2 score aggregates, read from the
+    materialized rollups the sync worker maintains. Periods without synced
+    days are omitted.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    return load_rollups(db, period, start_date, end_date, window)
+
+
 # async def get_range_scores(
 #     start_date: Query(...),
 #     end_date: Query(...),
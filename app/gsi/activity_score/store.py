@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import FitbitDailySummaryRecord, SyncCheckpoint
+
+from .models import FitbitDailySummary, validate_summaries
+from .rollup import apply_summaries
+
+
+def upsert_summaries(db: Session, summaries: list[FitbitDailySummary]) -> None:
+    """Insert or overwrite the stored rows for each summary's date, then update their score rollups (no commit)."""
+    now = datetime.utcnow()
+    for s in summaries:
+        db.merge(
+            FitbitDailySummaryRecord(
+                date=s.date,
+                steps=s.steps,
+                active_zone_minutes=s.active_zone_minutes,
+                calories_out=s.calories_out,
+                fetched_at=now,
+            )
+        )
+    apply_summaries(db, summaries)
+
+
+def load_summaries(db: Session, start_date: date, end_date: date) -> list[FitbitDailySummary]:
+    rows = db.scalars(
+        select(FitbitDailySummaryRecord)
+        .where(FitbitDailySummaryRecord.date.between(start_date, end_date))
+        .order_by(FitbitDailySummaryRecord.date)
+    )
+    return validate_summaries(
+        {
+            "date": r.date,
+            "steps": r.steps,
+            "active_zone_minutes": r.active_zone_minutes,
+            "calories_out": r.calories_out,
+        }
+        for r in rows
+    )
+
+
+def get_checkpoint(db: Session, name: str) -> date | None:
+    row = db.get(SyncCheckpoint, name)
+    return row.cursor_date if row else None
+
+
+def set_checkpoint(db: Session, name: str, cursor_date: date | None) -> None:
+    db.merge(SyncCheckpoint(name=name, cursor_date=cursor_date, updated_at=datetime.utcnow()))
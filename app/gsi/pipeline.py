@@ -0,0 +1,195 @@
+"""
+Multi-metric GSI pipeline: each Fitbit resource is fetched once per day.
+
+Metric modules (the activity score now; sleep and recovery next) declare the
+per-day Fitbit resources they need, by name from
+`app.integrations.fitbit_daily.RESOURCES`, and compute their result from the
+fetched payloads. The pipeline fetches the union of its modules' resources
+once per day, concurrently, and hands every module the same payloads.
+
+Fetches go through `fetch_daily_sections`, so with the single-account section
+cache (`section_cache`, as the upstream activity-score provider uses) a day's
+activity summary is downloaded once whether the score or /fitbit/daily-summary
+asks for it first. Days of a range are fetched GSI_PIPELINE_CONCURRENCY at a
+time, with one access token for the whole range.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Protocol, TypeVar
+
+from app import deadline
+from app.cache import TTLCache
+from app.config import get_settings
+from app.integrations.fitbit_client import FitbitClient
+from app.integrations.fitbit_daily import RESOURCES, fetch_daily_sections
+
+T = TypeVar("T")
+
+AccessToken = Callable[[], Awaitable[str]]
+
+
+@dataclass(frozen=True)
+class DayPayloads:
+    """The fetched Fitbit payloads of one day, by resource name."""
+
+    day: date
+    data: Mapping[str, dict[str, Any]]
+    # Resources served from an expired cache entry because Fitbit was unavailable
+    stale: tuple[str, ...] = ()
+
+    def __getitem__(self, resource: str) -> dict[str, Any]:
+        return self.data[resource]
+
+    def get(self, resource: str) -> dict[str, Any] | None:
+        return self.data.get(resource)
+
+    def is_stale(self, resources: Iterable[str]) -> bool:
+        return any(r in self.stale for r in resources)
+
+
+class MetricModule(Protocol):
+    name: str
+    resources: tuple[str, ...]  # names from RESOURCES
+
+    def compute(self, day: date, payloads: DayPayloads) -> Any: ...
+
+
+@dataclass
+class DayResult:
+    day: date
+    results: dict[str, Any] = field(default_factory=dict)  # module name -> computed result
+    errors: dict[str, str] = field(default_factory=dict)  # module name -> why it has no result
+    stale: list[str] = field(default_factory=list)  # modules computed from stale payloads
+
+
+def shared_token(access_token: AccessToken) -> AccessToken:
+    """`access_token`, obtained at most once however often (and concurrently) it is awaited."""
+    task: asyncio.Future[str] | None = None
+
+    async def _token() -> str:
+        nonlocal task
+        if task is None:
+            task = asyncio.ensure_future(access_token())
+        return await asyncio.shield(task)
+
+    return _token
+
+
+class UpstreamTimeoutError(TimeoutError):
+    """A Fitbit resource did not answer within its section timeout (a 502, not a 504)."""
+
+
+def _raise_failure(resource: str, day: date, exc: BaseException) -> None:
+    if isinstance(exc, TimeoutError):
+        left = deadline.remaining()
+        message = f"Fitbit {resource} for {day.isoformat()} timed out"
+        if left is not None and left <= 0:
+            raise deadline.DeadlineExceeded(message) from exc
+        raise UpstreamTimeoutError(message) from exc
+    raise exc
+
+
+class GsiPipeline:
+    def __init__(
+        self,
+        client: FitbitClient,
+        access_token: AccessToken,
+        modules: Sequence[MetricModule] = (),
+        *,
+        cache: TTLCache[tuple[str, date], dict[str, Any]] | None = None,
+        concurrency: int | None = None,
+        timeout_s: float | None = None,
+    ):
+        unknown = {r for m in modules for r in m.resources} - RESOURCES.keys()
+        if unknown:
+            raise ValueError(f"Unknown Fitbit resources: {', '.join(sorted(unknown))}")
+        self.client = client
+        self.modules = list(modules)
+        self.cache = cache
+        self.concurrency = max(
+            1, get_settings().gsi_pipeline_concurrency if concurrency is None else concurrency
+        )
+        self.timeout_s = timeout_s
+        self._access_token = access_token
+
+    @property
+    def resources(self) -> list[str]:
+        """The union of the modules' resources, in RESOURCES order."""
+        needed = {r for m in self.modules for r in m.resources}
+        return [r for r in RESOURCES if r in needed]
+
+    async def fetch(
+        self,
+        day: date,
+        resources: Sequence[str] | None = None,
+        *,
+        access_token: AccessToken | None = None,
+    ) -> DayPayloads:
+        """
+        Payloads for `resources` (default: every module's) on `day`. Raises the
+        upstream error of the first resource that is neither fetched nor cached.
+        """
+        names = list(self.resources if resources is None else resources)
+        fetched = await fetch_daily_sections(
+            self.client,
+            access_token or self._access_token,
+            day,
+            names,
+            timeout_s=self.timeout_s,
+            cache=self.cache,
+        )
+        for resource in names:
+            if resource in fetched.failures:
+                _raise_failure(resource, day, fetched.failures[resource])
+        return DayPayloads(day, fetched.data, tuple(fetched.stale))
+
+    async def run(self, day: date, *, access_token: AccessToken | None = None) -> DayResult:
+        """Every module's result for `day`; a module whose resources failed is listed in `errors` instead."""
+        fetched = await fetch_daily_sections(
+            self.client,
+            access_token or self._access_token,
+            day,
+            self.resources,
+            timeout_s=self.timeout_s,
+            cache=self.cache,
+        )
+        payloads = DayPayloads(day, fetched.data, tuple(fetched.stale))
+        out = DayResult(day)
+        for module in self.modules:
+            failed = [r for r in module.resources if r in fetched.errors]
+            if failed:
+                out.errors[module.name] = ", ".join(f"{r}: {fetched.errors[r]}" for r in failed)
+                continue
+            out.results[module.name] = module.compute(day, payloads)
+            if payloads.is_stale(module.resources):
+                out.stale.append(module.name)
+        return out
+
+    async def map_days(
+        self, start_date: date, end_date: date, fn: Callable[[date], Awaitable[T]]
+    ) -> list[T]:
+        """`fn` for each day of the range, `concurrency` days at a time; results in date order."""
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def _one(day: date) -> T:
+            async with limit:
+                return await fn(day)
+
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        tasks = [asyncio.ensure_future(_one(d)) for d in days]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            # One failed day fails the range: stop spending rate-limit budget on the rest
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def run_range(self, start_date: date, end_date: date) -> list[DayResult]:
+        token = shared_token(self._access_token)
+        return await self.map_days(start_date, end_date, lambda d: self.run(d, access_token=token))
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str, retry_after_s: float):
+        super().__init__(f"Upstream {name!r} is unavailable (circuit open)")
+        self.name = name
+        self.retry_after_s = retry_after_s
+
+
+def is_upstream_failure(exc: BaseException) -> bool | None:
+    """
+    True if `exc` means the upstream is unhealthy (timeouts, connection errors,
+    5xx), False if it answered (4xx, including 429: that is rate limiting, not
+    an outage), None if the call never completed (e.g. it was cancelled).
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    if isinstance(exc, (httpx.TransportError, TimeoutError)):
+        return True
+    return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast with CircuitOpenError. Once `reset_timeout_s` has passed it goes
+    half-open and lets a single probe through: success closes the circuit,
+    failure re-opens it for another `reset_timeout_s`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout_s:
+                return HALF_OPEN
+            return self._state
+
+    def _before_call(self) -> bool:
+        """Admit or reject a call; returns True if the call is the half-open probe."""
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            waited = self._clock() - self._opened_at
+            if waited >= self.reset_timeout_s and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            raise CircuitOpenError(self.name, max(0.0, self.reset_timeout_s - waited))
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def _on_failure(self, probe: bool) -> None:
+        with self._lock:
+            self._failures += 1
+            if probe or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                if self._state == CLOSED:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+            if probe:
+                self._probing = False
+
+    async def call(self, fn: Callable[[], Awaitable[T]], *, timeout_s: float | None = None) -> T:
+        """
+        Run `fn` through the breaker. A call still running after `timeout_s`
+        is cancelled and counted as a failure (raises TimeoutError); a timeout
+        applied outside the breaker would only show up here as a cancellation.
+        """
+        probe = self._before_call()
+        try:
+            result = await (fn() if timeout_s is None else asyncio.wait_for(fn(), timeout_s))
+        except BaseException as exc:
+            failed = is_upstream_failure(exc)
+            if failed:
+                self._on_failure(probe)
+            elif failed is False:
+                self._on_success()
+            elif probe:
+                with self._lock:
+                    self._probing = False
+            raise
+        self._on_success()
+        return result
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class BreakerRegistry:
+    """One CircuitBreaker per upstream endpoint family, created on first use."""
+
+    def __init__(self, *, failure_threshold: int, reset_timeout_s: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name,
+                    failure_threshold=self.failure_threshold,
+                    reset_timeout_s=self.reset_timeout_s,
+                )
+                self._breakers[name] = breaker
+            return breaker
+
+    def reset(self) -> None:
+        with self._lock:
+            self._breakers.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {b.name: b.snapshot() for b in breakers}
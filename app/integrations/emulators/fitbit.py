@@ -0,0 +1,294 @@
+"""
+Local Fitbit Web API emulator for load tests.
+
+Serves the token endpoint plus the activity, AZM, sleep, heart-rate (daily and
+intraday) and profile resources that FitbitClient calls, with deterministic
+per-date data.
+Latency, error rate and the rate-limit window are configurable so the app can
+be exercised under realistic upstream behaviour without touching Fitbit.
+
+Run it with:
+    FITBIT_EMULATOR_LATENCY_MS=80 uvicorn app.integrations.emulators.fitbit:app --port 8090
+
+and start the API with FITBIT_API_BASE=http://127.0.0.1:8090.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import random
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from fastapi import FastAPI, Form, Request, Response
+from fastapi.responses import JSONResponse
+
+EMULATOR_USER_ID = "EMU0001"
+
+
+@dataclass
+class EmulatorConfig:
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0  # fraction of API calls answered with a 5xx
+    rate_limit: int = 150  # Fitbit's default per-user hourly quota
+    rate_limit_window_s: int = 3600
+    seed: int | None = None
+
+    @classmethod
+    def from_env(cls) -> EmulatorConfig:
+        seed = os.getenv("FITBIT_EMULATOR_SEED", "")
+        return cls(
+            latency_ms=float(os.getenv("FITBIT_EMULATOR_LATENCY_MS", "0")),
+            latency_jitter_ms=float(os.getenv("FITBIT_EMULATOR_JITTER_MS", "0")),
+            error_rate=float(os.getenv("FITBIT_EMULATOR_ERROR_RATE", "0")),
+            rate_limit=int(os.getenv("FITBIT_EMULATOR_RATE_LIMIT", "150")),
+            rate_limit_window_s=int(os.getenv("FITBIT_EMULATOR_RATE_WINDOW_S", "3600")),
+            seed=int(seed) if seed else None,
+        )
+
+
+class _RateLimiter:
+    """Fixed-window counter mirroring Fitbit's hourly rate-limit headers."""
+
+    def __init__(self, limit: int, window_s: int):
+        self.limit = limit
+        self.window_s = window_s
+        self._window_start = time.monotonic()
+        self._used = 0
+
+    def hit(self) -> tuple[bool, int, int]:
+        """Consume one call; returns (allowed, remaining, seconds_until_reset)."""
+        now = time.monotonic()
+        if now - self._window_start >= self.window_s:
+            self._window_start = now
+            self._used = 0
+        reset = max(0, int(self._window_start + self.window_s - now))
+        if self._used >= self.limit:
+            return False, 0, reset
+        self._used += 1
+        return True, self.limit - self._used, reset
+
+
+def _day_rng(day: str, salt: str) -> random.Random:
+    # Stable data per (date, resource) so repeated fetches agree with each other
+    digest = hashlib.sha256(f"{day}:{salt}".encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _activity_payload(day: str) -> dict[str, Any]:
+    rng = _day_rng(day, "activity")
+    steps = rng.randint(1_500, 18_000)
+    return {
+        "activities": [],
+        "goals": {"steps": 10_000, "activeZoneMinutes": 22, "caloriesOut": 2_600},
+        "summary": {
+            "steps": steps,
+            "caloriesOut": 1_700 + steps // 12,
+            "sedentaryMinutes": rng.randint(500, 900),
+            "lightlyActiveMinutes": rng.randint(60, 300),
+            "fairlyActiveMinutes": rng.randint(0, 60),
+            "veryActiveMinutes": rng.randint(0, 90),
+            "restingHeartRate": rng.randint(52, 70),
+        },
+    }
+
+
+def _azm_payload(day: str) -> dict[str, Any]:
+    rng = _day_rng(day, "azm")
+    fat_burn = rng.randint(0, 70)
+    cardio = rng.randint(0, 40)
+    peak = rng.randint(0, 10)
+    return {
+        "activities-active-zone-minutes": [
+            {
+                "dateTime": day,
+                "value": {
+                    "activeZoneMinutes": fat_burn + 2 * (cardio + peak),
+                    "fatBurnActiveZoneMinutes": fat_burn,
+                    "cardioActiveZoneMinutes": 2 * cardio,
+                    "peakActiveZoneMinutes": 2 * peak,
+                },
+            }
+        ]
+    }
+
+
+def _sleep_payload(day: str) -> dict[str, Any]:
+    rng = _day_rng(day, "sleep")
+    asleep = rng.randint(300, 520)
+    return {
+        "sleep": [
+            {
+                "dateOfSleep": day,
+                "duration": (asleep + 30) * 60_000,
+                "efficiency": rng.randint(80, 98),
+                "isMainSleep": True,
+                "minutesAsleep": asleep,
+                "minutesAwake": 30,
+                "type": "stages",
+            }
+        ],
+        "summary": {
+            "totalMinutesAsleep": asleep,
+            "totalSleepRecords": 1,
+            "totalTimeInBed": asleep + 30,
+        },
+    }
+
+
+def _heartrate_payload(day: str) -> dict[str, Any]:
+    rng = _day_rng(day, "heart")
+    return {
+        "activities-heart": [
+            {
+                "dateTime": day,
+                "value": {
+                    "restingHeartRate": rng.randint(52, 70),
+                    "heartRateZones": [
+                        {
+                            "name": "Out of Range",
+                            "min": 30,
+                            "max": 98,
+                            "minutes": rng.randint(900, 1300),
+                        },
+                        {
+                            "name": "Fat Burn",
+                            "min": 98,
+                            "max": 137,
+                            "minutes": rng.randint(20, 200),
+                        },
+                        {"name": "Cardio", "min": 137, "max": 166, "minutes": rng.randint(0, 40)},
+                        {"name": "Peak", "min": 166, "max": 220, "minutes": rng.randint(0, 10)},
+                    ],
+                },
+            }
+        ]
+    }
+
+
+def _heartrate_intraday_payload(day: str, detail_level: str) -> dict[str, Any]:
+    """A resting night, an active day and one workout; a sample every 1-10 s ("1sec") or per minute."""
+    rng = _day_rng(day, "heart-intraday")
+    resting = rng.randint(52, 70)
+    workout_start = rng.randint(7 * 3600, 19 * 3600)
+    workout_end = workout_start + rng.randint(20, 75) * 60
+    workout_peak = rng.randint(130, 175)
+    dataset = []
+    t = 0
+    while t < 86_400:
+        if workout_start <= t < workout_end:
+            bpm = workout_peak - rng.randint(0, 25)
+        elif 7 * 3600 <= t < 23 * 3600:
+            bpm = resting + 15 + rng.randint(-8, 20)
+        else:
+            bpm = resting + rng.randint(-4, 6)
+        dataset.append({"time": f"{t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d}", "value": bpm})
+        t += 60 if detail_level == "1min" else rng.randint(1, 10)
+    payload = _heartrate_payload(day)
+    payload["activities-heart-intraday"] = {
+        "dataset": dataset,
+        "datasetInterval": 1,
+        "datasetType": "minute" if detail_level == "1min" else "second",
+    }
+    return payload
+
+
+def create_app(config: EmulatorConfig | None = None) -> FastAPI:
+    cfg = config or EmulatorConfig.from_env()
+    rng = random.Random(cfg.seed)
+    limiter = _RateLimiter(cfg.rate_limit, cfg.rate_limit_window_s)
+    emulator = FastAPI(title="Fitbit emulator")
+    emulator.state.config = cfg
+
+    @emulator.middleware("http")
+    async def _upstream_behaviour(request: Request, call_next: Any) -> Response:
+        if cfg.latency_ms or cfg.latency_jitter_ms:
+            delay = cfg.latency_ms + rng.uniform(0, cfg.latency_jitter_ms)
+            await asyncio.sleep(delay / 1000)
+
+        if request.url.path.startswith("/oauth2/"):
+            return await call_next(request)
+
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme != "Bearer" or not token.strip():
+            return JSONResponse({"errors": [{"errorType": "invalid_token"}]}, status_code=401)
+
+        allowed, remaining, reset = limiter.hit()
+        headers = {
+            "Fitbit-Rate-Limit-Limit": str(cfg.rate_limit),
+            "Fitbit-Rate-Limit-Remaining": str(remaining),
+            "Fitbit-Rate-Limit-Reset": str(reset),
+        }
+        if not allowed:
+            headers["Retry-After"] = str(reset)
+            return JSONResponse(
+                {"errors": [{"errorType": "request", "message": "Too Many Requests"}]},
+                status_code=429,
+                headers=headers,
+            )
+        if cfg.error_rate and rng.random() < cfg.error_rate:
+            return JSONResponse(
+                {"errors": [{"errorType": "system", "message": "Emulated upstream failure"}]},
+                status_code=rng.choice((500, 502, 503)),
+                headers=headers,
+            )
+
+        response: Response = await call_next(request)
+        response.headers.update(headers)
+        return response
+
+    @emulator.post("/oauth2/token")
+    async def token(
+        grant_type: str = Form(...),
+        code: str | None = Form(None),
+        refresh_token: str | None = Form(None),
+    ) -> JSONResponse:
+        if grant_type == "authorization_code" and not code:
+            return JSONResponse({"errors": [{"errorType": "invalid_grant"}]}, status_code=400)
+        if grant_type == "refresh_token" and not refresh_token:
+            return JSONResponse({"errors": [{"errorType": "invalid_grant"}]}, status_code=400)
+        return JSONResponse(
+            {
+                "access_token": secrets.token_urlsafe(24),
+                "refresh_token": secrets.token_urlsafe(24),
+                "expires_in": 28_800,
+                "scope": "activity heartrate sleep profile weight",
+                "token_type": "Bearer",
+                "user_id": EMULATOR_USER_ID,
+            }
+        )
+
+    @emulator.get("/1/user/-/profile.json")
+    async def profile() -> dict[str, Any]:
+        return {"user": {"encodedId": EMULATOR_USER_ID, "displayName": "Emulated User"}}
+
+    @emulator.get("/1/user/-/activities/date/{day}.json")
+    async def activity(day: date) -> dict[str, Any]:
+        return _activity_payload(day.isoformat())
+
+    @emulator.get("/1/user/-/activities/active-zone-minutes/date/{day}/1d.json")
+    async def active_zone_minutes(day: date) -> dict[str, Any]:
+        return _azm_payload(day.isoformat())
+
+    @emulator.get("/1.2/user/-/sleep/date/{day}.json")
+    async def sleep(day: date) -> dict[str, Any]:
+        return _sleep_payload(day.isoformat())
+
+    @emulator.get("/1/user/-/activities/heart/date/{day}/1d.json")
+    async def heartrate(day: date) -> dict[str, Any]:
+        return _heartrate_payload(day.isoformat())
+
+    @emulator.get("/1/user/-/activities/heart/date/{day}/1d/{detail_level}.json")
+    async def heartrate_intraday(day: date, detail_level: str) -> dict[str, Any]:
+        return _heartrate_intraday_payload(day.isoformat(), detail_level)
+
+    return emulator
+
+
+app = create_app()
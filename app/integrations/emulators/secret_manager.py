@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from google.api_core.exceptions import NotFound
+
+from app.config import get_settings
+
+
+@dataclass(frozen=True)
+class _Payload:
+    data: bytes
+
+
+@dataclass(frozen=True)
+class _AccessResponse:
+    name: str
+    payload: _Payload
+
+
+class FakeSecretManagerClient:
+    """
+    In-memory stand-in for ``secretmanager.SecretManagerServiceClient``.
+
+    Implements only the two calls SecretStore makes. Secrets are keyed by
+    secret id (the project part of the resource name is ignored), so every
+    SecretStore in the process shares the same values.
+    """
+
+    def __init__(self, seed: dict[str, str] | None = None):
+        self._lock = threading.Lock()
+        self._versions: dict[str, list[bytes]] = {
+            k: [v.encode("utf-8")] for k, v in (seed or {}).items()
+        }
+
+    @classmethod
+    def from_seed_file(cls, path: str) -> FakeSecretManagerClient:
+        if not path:
+            return cls()
+        with open(path, encoding="utf-8") as fh:
+            return cls({str(k): str(v) for k, v in json.load(fh).items()})
+
+    @staticmethod
+    def _secret_id(name: str) -> str:
+        # projects/{project}/secrets/{secret_id}[/versions/{version}]
+        parts = name.split("/")
+        if len(parts) < 4 or parts[0] != "projects" or parts[2] != "secrets":
+            raise ValueError(f"Malformed secret resource name: {name}")
+        return parts[3]
+
+    def access_secret_version(self, request: dict[str, Any]) -> _AccessResponse:
+        name = request["name"]
+        secret_id = self._secret_id(name)
+        version = name.rsplit("/", 1)[-1]
+        with self._lock:
+            versions = self._versions.get(secret_id)
+            if not versions:
+                raise NotFound(f"Secret [{name}] not found or has no versions.")
+            if version == "latest":
+                data = versions[-1]
+            else:
+                idx = int(version) - 1
+                if idx < 0 or idx >= len(versions):
+                    raise NotFound(f"Secret Version [{name}] not found.")
+                data = versions[idx]
+        return _AccessResponse(name=name, payload=_Payload(data=data))
+
+    def add_secret_version(self, request: dict[str, Any]) -> None:
+        secret_id = self._secret_id(request["parent"])
+        data = request["payload"]["data"]
+        with self._lock:
+            self._versions.setdefault(secret_id, []).append(bytes(data))
+
+
+@lru_cache(maxsize=1)
+def get_fake_secret_manager() -> FakeSecretManagerClient:
+    return FakeSecretManagerClient.from_seed_file(get_settings().secret_store_seed_file)
@@ -0,0 +1,210 @@
+"""
+Append-only archive of raw Fitbit API responses.
+
+With FITBIT_ARCHIVE_DIR set, FitbitClient appends the body of every
+successful per-day GET (any path with `/date/YYYY-MM-DD`) here, so mapping
+changes can be replayed over history (`python -m app.workers.replay`) instead
+of re-downloading it. Layout, one pair of files per month of the data's date:
+
+    2025-01.seg  records, appended only: header, key, compressed body
+    2025-01.idx  fixed-size entries (day, key hash, offset, length, fetched_at)
+
+Lookups memory-map the .idx file and fold its entries into a dict, re-reading
+only entries appended since the last lookup; the newest entry for a
+(key, day) wins, so re-fetched days simply supersede older versions. Keys are
+the request path with its date replaced by `{day}` (plus the user id), e.g.
+"-:/1/user/-/activities/date/{day}.json".
+
+Bodies are compressed with zstd when `zstandard` is installed
+(requirements-analytics.txt), else zlib; the codec is stored per record.
+Appends are serialized with a thread lock and an flock on the segment, so the
+API and the workers can share a directory; a record whose index entry was
+never written (crash mid-append) is simply unreachable.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import importlib.util
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from app.config import get_settings
+
+_DATE = re.compile(r"/date/(\d{4}-\d{2}-\d{2})")
+_RECORD = struct.Struct("<4sBHI")  # magic, codec, key length, body length
+_RECORD_MAGIC = b"FBA1"
+_ENTRY = struct.Struct("<IQQId")  # day ordinal, key hash, record offset, record length, fetched_at
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+
+def _zstd_available() -> bool:
+    return importlib.util.find_spec("zstandard") is not None
+
+
+def archive_key(user_id: str | None, template: str) -> str:
+    return f"{user_id or '-'}:{template}"
+
+
+def _key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def split_path(path: str, params: dict[str, Any] | None = None) -> tuple[str, date] | None:
+    """(template, day) for a per-day resource path, or None when it has no date."""
+    match = _DATE.search(path)
+    if match is None:
+        return None
+    template = path[: match.start(1)] + "{day}" + path[match.end(1) :]
+    if params:
+        template += "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+    return template, date.fromisoformat(match.group(1))
+
+
+class _MonthIndex:
+    """Memory-mapped .idx file plus a dict of its newest entry per (key hash, day)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[tuple[int, int], tuple[int, int]] = {}
+        self._parsed = 0  # bytes of the file folded into `entries`
+
+    def refresh(self) -> None:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        complete = size - size % _ENTRY.size  # ignore a torn trailing entry
+        if complete <= self._parsed:
+            return
+        with (
+            self.path.open("rb") as f,
+            mmap.mmap(f.fileno(), complete, access=mmap.ACCESS_READ) as mm,
+        ):
+            for ordinal, key_hash, offset, length, _ in _ENTRY.iter_unpack(
+                mm[self._parsed : complete]
+            ):
+                self.entries[(key_hash, ordinal)] = (offset, length)
+        self._parsed = complete
+
+
+class FitbitArchive:
+    def __init__(self, root: Path | str, *, compression_level: int = 3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.codec = CODEC_ZSTD if _zstd_available() else CODEC_ZLIB
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._indexes: dict[str, _MonthIndex] = {}
+
+    def _files(self, day: date) -> tuple[Path, Path]:
+        month = f"{day.year:04d}-{day.month:02d}"
+        return self.root / f"{month}.seg", self.root / f"{month}.idx"
+
+    def _index(self, day: date) -> _MonthIndex:
+        _, idx = self._files(day)
+        index = self._indexes.get(idx.name)
+        if index is None:
+            index = self._indexes[idx.name] = _MonthIndex(idx)
+        index.refresh()
+        return index
+
+    # -- codecs ---------------------------------------------------------
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.codec == CODEC_ZSTD:
+            import zstandard
+
+            return zstandard.ZstdCompressor(level=self.compression_level).compress(body)
+        return zlib.compress(body, min(9, self.compression_level + 3))
+
+    @staticmethod
+    def _decompress(codec: int, data: bytes) -> bytes:
+        if codec == CODEC_ZSTD:
+            import zstandard
+
+            return zstandard.ZstdDecompressor().decompress(data)
+        if codec == CODEC_ZLIB:
+            return zlib.decompress(data)
+        raise ValueError(f"Unknown archive codec {codec}")
+
+    # -- writing --------------------------------------------------------
+
+    def append(
+        self, user_id: str | None, path: str, body: bytes, params: dict[str, Any] | None = None
+    ) -> bool:
+        """Archive one response body; False (nothing stored) for paths without a date."""
+        split = split_path(path, params)
+        if split is None:
+            return False
+        template, day = split
+        key = archive_key(user_id, template).encode()
+        compressed = self._compress(body)
+        record = (
+            _RECORD.pack(_RECORD_MAGIC, self.codec, len(key), len(compressed)) + key + compressed
+        )
+        seg, idx = self._files(day)
+        with self._lock, seg.open("ab") as s:
+            fcntl.flock(s, fcntl.LOCK_EX)
+            try:
+                offset = s.seek(0, os.SEEK_END)
+                s.write(record)
+                s.flush()
+                with idx.open("ab") as i:
+                    end = i.seek(0, os.SEEK_END)
+                    if end % _ENTRY.size:  # drop a torn entry from a crashed writer
+                        i.truncate(end - end % _ENTRY.size)
+                    i.write(
+                        _ENTRY.pack(
+                            day.toordinal(),
+                            _key_hash(key.decode()),
+                            offset,
+                            len(record),
+                            time.time(),
+                        )
+                    )
+            finally:
+                fcntl.flock(s, fcntl.LOCK_UN)
+        return True
+
+    # -- reading --------------------------------------------------------
+
+    def get(self, user_id: str | None, template: str, day: date) -> bytes | None:
+        """Newest archived body for `template` (a path with `{day}`) on `day`."""
+        key = archive_key(user_id, template)
+        found = self._index(day).entries.get((_key_hash(key), day.toordinal()))
+        if found is None:
+            return None
+        offset, length = found
+        seg, _ = self._files(day)
+        with seg.open("rb") as f:
+            f.seek(offset)
+            record = f.read(length)
+        magic, codec, key_len, body_len = _RECORD.unpack_from(record)
+        if magic != _RECORD_MAGIC or record[_RECORD.size : _RECORD.size + key_len].decode() != key:
+            raise ValueError(f"Corrupt archive record at {seg.name}:{offset}")
+        start = _RECORD.size + key_len
+        return self._decompress(codec, record[start : start + body_len])
+
+    def load(self, user_id: str | None, template: str, day: date) -> dict[str, Any] | None:
+        body = self.get(user_id, template, day)
+        return json.loads(body) if body is not None else None
+
+
+@lru_cache(maxsize=1)
+def get_archive() -> FitbitArchive | None:
+    """The archive under FITBIT_ARCHIVE_DIR, or None when archiving is off."""
+    root = get_settings().fitbit_archive_dir
+    return FitbitArchive(root) if root else None
@@ -1,20 +1,62 @@
 from __future__ import annotations
 
-import os
+import asyncio
 import base64
 import hashlib
+import logging
+import os
 import secrets
-from dataclasses import dataclass
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
 from datetime import date
-from typing import Any, Dict, Optional
-from app.integrations.secret_store import SecretStore
+from typing import Any
 
 import httpx
+from fastapi import HTTPException
+
+from app import deadline
+from app.config import get_settings
+from app.integrations.circuit_breaker import BreakerRegistry
+from app.integrations.fitbit_archive import FitbitArchive, get_archive
+from app.integrations.secret_store import SecretStore
+from app.integrations.singleflight import SingleFlight
 
+logger = logging.getLogger("app.fitbit.client")
 
 FITBIT_AUTH_URL = "https://www.fitbit.com/oauth2/authorize"
-FITBIT_TOKEN_URL = "https://api.fitbit.com/oauth2/token"
-FITBIT_API_BASE = "https://api.fitbit.com"
+FITBIT_API_BASE = get_settings().fitbit_api_base.rstrip("/")
+FITBIT_TOKEN_URL = f"{FITBIT_API_BASE}/oauth2/token"
+FITBIT_TIMEOUT_S = 20
+
+# Per-day resources; the "{day}" form is also their key in the raw payload archive
+ACTIVITY_SUMMARY_PATH = "/1/user/-/activities/date/{day}.json"
+ACTIVE_ZONE_MINUTES_PATH = "/1/user/-/activities/active-zone-minutes/date/{day}/1d.json"
+HEARTRATE_INTRADAY_PATH = "/1/user/-/activities/heart/date/{day}/1d/{detail_level}.json"
+
+# One pooled client per event loop keeps TLS connections to Fitbit alive across requests
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            timeout=FITBIT_TIMEOUT_S,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def aclose_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 def _b64url_no_pad(raw: bytes) -> str:
@@ -40,24 +82,116 @@ class FitbitTokens:
     user_id: str
 
 
+@dataclass
+class RateLimitState:
+    """Last Fitbit-Rate-Limit-* headers seen; Fitbit's quota is per user per hour."""
+
+    limit: int | None = None
+    remaining: int | None = None
+    reset_at: float | None = None  # time.monotonic() when the window resets
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def update(self, status_code: int, headers: httpx.Headers) -> None:
+        remaining = headers.get("Fitbit-Rate-Limit-Remaining")
+        reset = headers.get("Fitbit-Rate-Limit-Reset") or headers.get("Retry-After")
+        limit = headers.get("Fitbit-Rate-Limit-Limit")
+        with self._lock:
+            if limit is not None and limit.isdigit():
+                self.limit = int(limit)
+            if remaining is not None and remaining.isdigit():
+                self.remaining = int(remaining)
+            elif status_code == 429:
+                self.remaining = 0
+            if reset is not None and reset.isdigit():
+                self.reset_at = time.monotonic() + int(reset)
+
+    def seconds_until_reset(self) -> float:
+        if self.reset_at is None:
+            return 0.0
+        return max(0.0, self.reset_at - time.monotonic())
+
+    def available(self) -> int | None:
+        """Calls left in the current window, or None when unknown."""
+        if self.remaining is None or self.seconds_until_reset() == 0.0:
+            return None
+        return self.remaining
+
+
+# Shared by every FitbitClient: there is one Fitbit user/app behind this service
+rate_limit = RateLimitState()
+
+# Identical in-flight GETs (same base, path and params) share one upstream call
+inflight: SingleFlight[dict[str, Any]] = SingleFlight()
+
+# Fail fast while an endpoint family is down instead of waiting out FITBIT_TIMEOUT_S
+breakers = BreakerRegistry(
+    failure_threshold=get_settings().fitbit_breaker_failure_threshold,
+    reset_timeout_s=get_settings().fitbit_breaker_reset_s,
+)
+
+
+async def _within_deadline(send: Callable[[float], Awaitable[httpx.Response]]) -> httpx.Response:
+    """
+    Run `send(timeout)` with FITBIT_TIMEOUT_S capped to the request deadline.
+    A timeout caused by the deadline is raised as DeadlineExceeded, so it is not
+    counted against Fitbit by the circuit breaker.
+    """
+    timeout = deadline.timeout_for(FITBIT_TIMEOUT_S)
+    try:
+        return await send(timeout)
+    except httpx.TimeoutException as exc:
+        if timeout < FITBIT_TIMEOUT_S:
+            raise deadline.DeadlineExceeded("Request deadline exceeded waiting for Fitbit") from exc
+        raise
+
+
+async def _archive_response(
+    archive: FitbitArchive,
+    user_id: str | None,
+    path: str,
+    params: dict[str, Any] | None,
+    body: bytes,
+) -> None:
+    # Archiving is best effort: a full disk must not fail the API call
+    try:
+        await asyncio.to_thread(archive.append, user_id, path, body, params)
+    except Exception:
+        logger.exception("Could not archive Fitbit response for %s", path)
+
+
+def endpoint_family(path: str) -> str:
+    """
+    Breaker name for an API path, e.g. "/1/user/-/activities/heart/date/..." ->
+    "activities/heart", "/1.2/user/-/sleep/date/..." -> "sleep".
+    """
+    parts = [p for p in path.split("/") if p]
+    if "-" in parts:
+        parts = parts[parts.index("-") + 1 :]
+    family = [parts[0].removesuffix(".json")] if parts else ["unknown"]
+    if len(parts) > 1 and parts[1] != "date":
+        family.append(parts[1].removesuffix(".json"))
+    return "/".join(family)
+
 
 PROJECT_ID = os.environ["PROJECT_ID"]
 REDIRECT_URI = os.environ["FITBIT_REDIRECT_URI"]
 secrets_store = SecretStore(PROJECT_ID)
 
 
-def get_fitbit_client() -> FitbitClient:
+def get_fitbit_client(user_id: str | None = None) -> FitbitClient:
     client_id = secrets_store.read("fitbit_client_id").strip()
     if not client_id:
         raise HTTPException(status_code=500, detail="fitbit_client_id secret is empty")
-    return FitbitClient(client_id=client_id, redirect_uri=REDIRECT_URI)
+    return FitbitClient(client_id=client_id, redirect_uri=REDIRECT_URI, user_id=user_id)
+
 
 async def get_fresh_access_token() -> str:
     """
     Always refresh using the stored refresh token.
     This avoids having to persist an access token at all.
     """
-    refresh_token = secrets_store.read("fitbit_refresh_token").strip()
+    # Never cached: other instances rotate it
+    refresh_token = secrets_store.read("fitbit_refresh_token", cache=False).strip()
     if not refresh_token:
         raise HTTPException(status_code=400, detail="Fitbit not connected yet. Run /auth/start.")
 
@@ -74,11 +208,53 @@ class FitbitClient:
     Fitbit API client for a Personal app type using OAuth2 + PKCE.
     - Token exchange/refresh via form POST
     - API calls via Bearer access token
+
+    `api_base` defaults to FITBIT_API_BASE; `transport` lets tests route
+    requests to an in-process app (e.g. the Fitbit emulator). `user_id` names
+    the Fitbit user whose token the caller passes; API paths address "-" (the
+    token's owner), so it keeps different users' requests from being coalesced.
     """
 
-    def __init__(self, client_id: str, redirect_uri: str):
+    def __init__(
+        self,
+        client_id: str,
+        redirect_uri: str,
+        api_base: str = FITBIT_API_BASE,
+        transport: httpx.AsyncBaseTransport | None = None,
+        user_id: str | None = None,
+    ):
         self.client_id = client_id
+        self.user_id = user_id
         self.redirect_uri = redirect_uri
+        self.api_base = api_base.rstrip("/")
+        self.token_url = f"{self.api_base}/oauth2/token"
+        self._transport = transport
+        self._own_http: httpx.AsyncClient | None = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._transport is None:
+            return get_http_client()
+        if self._own_http is None:
+            self._own_http = httpx.AsyncClient(timeout=FITBIT_TIMEOUT_S, transport=self._transport)
+        return self._own_http
+
+    async def _post_token(self, data: dict[str, str]) -> dict[str, Any]:
+        async def _post() -> dict[str, Any]:
+            resp = await _within_deadline(
+                lambda timeout: self._http().post(
+                    self.token_url,
+                    data=data,
+                    headers={
+                        "Content-Type": "application/x-www-form-urlencoded",
+                        "Accept": "application/json",
+                    },
+                    timeout=timeout,
+                )
+            )
+            resp.raise_for_status()
+            return resp.json()
+
+        return await breakers.get("oauth2").call(_post)
 
     async def exchange_code_for_tokens(self, code: str, code_verifier: str) -> FitbitTokens:
         data = {
@@ -89,17 +265,7 @@ class FitbitClient:
             "code_verifier": code_verifier,
         }
 
-        async with httpx.AsyncClient(timeout=20) as client:
-            resp = await client.post(
-                FITBIT_TOKEN_URL,
-                data=data,
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded",
-                    "Accept": "application/json",
-                },
-            )
-        resp.raise_for_status()
-        j = resp.json()
+        j = await self._post_token(data)
         return FitbitTokens(
             access_token=j["access_token"],
             refresh_token=j["refresh_token"],
@@ -115,17 +281,7 @@ class FitbitClient:
             "refresh_token": refresh_token,
         }
 
-        async with httpx.AsyncClient(timeout=20) as client:
-            resp = await client.post(
-                FITBIT_TOKEN_URL,
-                data=data,
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded",
-                    "Accept": "application/json",
-                },
-            )
-        resp.raise_for_status()
-        j = resp.json()
+        j = await self._post_token(data)
         return FitbitTokens(
             access_token=j["access_token"],
             refresh_token=j["refresh_token"],
@@ -134,30 +290,108 @@ class FitbitClient:
             user_id=j.get("user_id", ""),
         )
 
-    async def api_get(self, access_token: str, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        url = f"{FITBIT_API_BASE}{path}"
-        async with httpx.AsyncClient(timeout=20) as client:
-            resp = await client.get(
-                url,
-                params=params,
-                headers={"Authorization": f"Bearer {access_token}", "Accept": "application/json"},
+    async def api_get(
+        self,
+        access_token: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        *,
+        timeout_s: float | None = None,
+    ) -> dict[str, Any]:
+        """
+        GET a Fitbit resource. Concurrent requests for the same (user, path, params,
+        timeout_s) are coalesced into one upstream call whose parsed JSON is shared
+        by all callers, so callers must not mutate the returned payload.
+
+        `timeout_s` bounds the whole call (shorter than FITBIT_TIMEOUT_S, e.g. a
+        per-section budget); running out counts against the endpoint's breaker.
+        The shared call runs without any caller's request deadline; each caller
+        waits for it only until its own deadline.
+        """
+        deadline.check()
+        key = (
+            self.api_base,
+            self.user_id,
+            path,
+            tuple(sorted((params or {}).items())),
+            timeout_s,
+        )
+        return await deadline.bounded(
+            inflight.do(key, lambda: self._api_get(access_token, path, params, timeout_s=timeout_s))
+        )
+
+    async def _api_get(
+        self,
+        access_token: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        *,
+        timeout_s: float | None = None,
+    ) -> dict[str, Any]:
+        url = f"{self.api_base}{path}"
+
+        async def _get() -> dict[str, Any]:
+            resp = await _within_deadline(
+                lambda timeout: self._http().get(
+                    url,
+                    params=params,
+                    headers={
+                        "Authorization": f"Bearer {access_token}",
+                        "Accept": "application/json",
+                    },
+                    timeout=timeout,
+                )
             )
-        resp.raise_for_status()
-        return resp.json()
+            rate_limit.update(resp.status_code, resp.headers)
+            resp.raise_for_status()
+            payload = resp.json()
+            if archive is not None:
+                await _archive_response(archive, self.user_id, path, params, resp.content)
+            return payload
+
+        archive = get_archive()
+        return await breakers.get(endpoint_family(path)).call(_get, timeout_s=timeout_s)
 
     # Convenience endpoints
 
-    async def get_profile(self, access_token: str) -> Dict[str, Any]:
+    async def get_profile(self, access_token: str) -> dict[str, Any]:
         return await self.api_get(access_token, "/1/user/-/profile.json")
 
-    async def get_daily_activity_summary(self, access_token: str, day: date) -> Dict[str, Any]:
-        return await self.api_get(access_token, f"/1/user/-/activities/date/{day.isoformat()}.json")
+    async def get_daily_activity_summary(
+        self, access_token: str, day: date, *, timeout_s: float | None = None
+    ) -> dict[str, Any]:
+        return await self.api_get(
+            access_token, ACTIVITY_SUMMARY_PATH.format(day=day.isoformat()), timeout_s=timeout_s
+        )
 
-    async def get_sleep(self, access_token: str, day: date) -> Dict[str, Any]:
-        return await self.api_get(access_token, f"/1.2/user/-/sleep/date/{day.isoformat()}.json")
+    async def get_sleep(
+        self, access_token: str, day: date, *, timeout_s: float | None = None
+    ) -> dict[str, Any]:
+        return await self.api_get(
+            access_token, f"/1.2/user/-/sleep/date/{day.isoformat()}.json", timeout_s=timeout_s
+        )
 
-    async def get_active_zone_minutes(self, access_token: str, day: date) -> Dict[str, Any]:
-        return await self.api_get(access_token, f"/1/user/-/activities/active-zone-minutes/date/{day.isoformat()}/1d.json")
+    async def get_active_zone_minutes(
+        self, access_token: str, day: date, *, timeout_s: float | None = None
+    ) -> dict[str, Any]:
+        return await self.api_get(
+            access_token, ACTIVE_ZONE_MINUTES_PATH.format(day=day.isoformat()), timeout_s=timeout_s
+        )
+
+    async def get_heartrate_day(
+        self, access_token: str, day: date, *, timeout_s: float | None = None
+    ) -> dict[str, Any]:
+        return await self.api_get(
+            access_token,
+            f"/1/user/-/activities/heart/date/{day.isoformat()}/1d.json",
+            timeout_s=timeout_s,
+        )
 
-    async def get_heartrate_day(self, access_token: str, day: date) -> Dict[str, Any]:
-        return await self.api_get(access_token, f"/1/user/-/activities/heart/date/{day.isoformat()}/1d.json")
+    async def get_heartrate_intraday(
+        self, access_token: str, day: date, detail_level: str = "1sec"
+    ) -> dict[str, Any]:
+        """Heart-rate zones plus the intraday series ("1sec" or "1min" resolution)."""
+        return await self.api_get(
+            access_token,
+            HEARTRATE_INTRADAY_PATH.format(day=day.isoformat(), detail_level=detail_level),
+        )
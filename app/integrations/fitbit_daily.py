@@ -0,0 +1,190 @@
+"""
+Composite per-day Fitbit payloads for /api/v1/fitbit/daily-summary and the
+GSI pipeline (app.gsi.pipeline).
+
+Each section (activity, active_zone_minutes, sleep, heartrate) is an
+independent Fitbit resource: the selected ones are fetched concurrently, each
+under its own timeout (enforced inside the endpoint's circuit breaker, so slow
+responses count as failures), and a failing section is reported instead of
+failing the whole response.
+
+Sections are cached per (section, day). Once a day is FITBIT_FINALIZED_AFTER_DAYS
+old its payload no longer changes, so it is kept until evicted; more recent days
+use FITBIT_SECTION_CACHE_TTL_S. FITBIT_SECTION_CACHE_TTL_S=0 turns the cache off
+for every day. Subscription notifications for a day drop its
+entries, which covers late device syncs of otherwise final days. When Fitbit is
+unavailable, expired entries are served and listed under "stale".
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Protocol
+
+import httpx
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.integrations.circuit_breaker import CircuitOpenError
+from app.integrations.fitbit_client import FitbitClient
+from app.integrations.fitbit_subscriptions import refresh_queue
+
+logger = logging.getLogger("app.fitbit.daily")
+
+settings = get_settings()
+
+
+class SectionFetcher(Protocol):
+    def __call__(
+        self, client: FitbitClient, access_token: str, day: date, /, *, timeout_s: float | None
+    ) -> Awaitable[dict[str, Any]]: ...
+
+
+RESOURCES: dict[str, SectionFetcher] = {
+    "activity": FitbitClient.get_daily_activity_summary,
+    "active_zone_minutes": FitbitClient.get_active_zone_minutes,
+    "sleep": FitbitClient.get_sleep,
+    "heartrate": FitbitClient.get_heartrate_day,
+}
+
+# The sections /daily-summary serves
+SECTIONS: dict[str, SectionFetcher] = {
+    name: RESOURCES[name] for name in ("activity", "sleep", "heartrate")
+}
+
+# Subscription collection type -> sections it invalidates (AZM and heart rate are part of "activities")
+_COLLECTION_SECTIONS: dict[str, tuple[str, ...]] = {
+    "activities": ("activity", "active_zone_minutes", "heartrate"),
+    "sleep": ("sleep",),
+}
+
+section_cache: TTLCache[tuple[str, date], dict[str, Any]] = TTLCache(
+    maxsize=settings.fitbit_section_cache_maxsize,
+    ttl_s=settings.fitbit_section_cache_ttl_s,
+    keep_stale=True,
+)
+
+
+@dataclass
+class SectionResults:
+    data: dict[str, Any] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    # Sections served from an expired cache entry because the fetch failed
+    stale: list[str] = field(default_factory=list)
+    # The exception behind each entry in `errors`
+    failures: dict[str, BaseException] = field(default_factory=dict, repr=False)
+
+
+def parse_include(include: str) -> list[str]:
+    """Comma-separated section names, in SECTIONS order; raises ValueError on unknown names."""
+    requested = {s.strip() for s in include.split(",") if s.strip()}
+    unknown = requested - SECTIONS.keys()
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))}")
+    if not requested:
+        raise ValueError("No sections requested")
+    return [s for s in SECTIONS if s in requested]
+
+
+def _cache_ttl(day: date, today: date) -> float | None:
+    if settings.fitbit_section_cache_ttl_s <= 0:
+        return 0
+    if day <= today - timedelta(days=settings.fitbit_finalized_after_days):
+        return None
+    return settings.fitbit_section_cache_ttl_s
+
+
+def _describe(exc: BaseException) -> str:
+    if isinstance(exc, TimeoutError):
+        return "timeout"
+    if isinstance(exc, CircuitOpenError):
+        return "circuit open"
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"upstream status {exc.response.status_code}"
+    return exc.__class__.__name__
+
+
+async def fetch_daily_sections(
+    client: FitbitClient,
+    get_access_token: Callable[[], Awaitable[str]],
+    day: date,
+    sections: list[str],
+    *,
+    timeout_s: float | None = None,
+    today: date | None = None,
+    cache: TTLCache[tuple[str, date], dict[str, Any]] | None = section_cache,
+) -> SectionResults:
+    """
+    Fetch the requested sections (names from RESOURCES), each independently.
+
+    The access token is only obtained when at least one section misses the
+    cache, so fully cached days cost no token refresh. A section that fails
+    falls back to its expired cache entry if there is one, else to an error.
+    Cache keys carry no user, so pass `cache=None` for per-user clients.
+    """
+    timeout = settings.fitbit_section_timeout_s if timeout_s is None else timeout_s
+    ttl = _cache_ttl(day, today or date.today())
+
+    out = SectionResults()
+    missing: list[str] = []
+    for section in sections:
+        cached = cache.get((section, day)) if cache is not None and ttl != 0 else None
+        if cached is not None:
+            out.data[section] = cached
+        else:
+            missing.append(section)
+    if not missing:
+        return out
+
+    async def _one(section: str, access_token: str) -> dict[str, Any]:
+        return await RESOURCES[section](client, access_token, day, timeout_s=timeout)
+
+    outcomes: list[Any]
+    try:
+        access_token = await get_access_token()
+    except (CircuitOpenError, httpx.HTTPError) as exc:
+        outcomes = [exc] * len(missing)
+    else:
+        outcomes = await asyncio.gather(
+            *(_one(s, access_token) for s in missing), return_exceptions=True
+        )
+
+    for section, outcome in zip(missing, outcomes, strict=True):
+        if isinstance(outcome, BaseException):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            stale = cache.get_stale((section, day)) if cache is not None else None
+            if stale is not None:
+                out.data[section] = stale
+                out.stale.append(section)
+            else:
+                out.errors[section] = _describe(outcome)
+                out.failures[section] = outcome
+            logger.warning("Fitbit %s for %s failed: %s", section, day, _describe(outcome))
+            continue
+        out.data[section] = outcome
+        if cache is not None and ttl != 0:
+            cache.set((section, day), outcome, ttl_s=ttl)
+    return out
+
+
+def invalidate_sections(collection_type: str, days: list[date]) -> None:
+    """Drop cached sections a subscription notification for `collection_type` makes outdated."""
+    for day in days:
+        for section in _COLLECTION_SECTIONS.get(collection_type, ()):
+            section_cache.delete((section, day))
+
+
+def _invalidator(collection_type: str) -> Callable[[list[date]], Awaitable[None]]:
+    async def _invalidate(days: list[date]) -> None:
+        invalidate_sections(collection_type, days)
+
+    return _invalidate
+
+
+for _collection in _COLLECTION_SECTIONS:
+    refresh_queue.register(_collection, _invalidator(_collection))
@@ -0,0 +1,168 @@
+"""
+Fitbit Subscription API (webhook) support.
+
+Fitbit POSTs a JSON list of notifications such as
+    [{"collectionType": "activities", "date": "2025-01-15", "ownerId": "ABC123",
+      "ownerType": "user", "subscriptionId": "1"}]
+signed with X-Fitbit-Signature = base64(HMAC-SHA1(body, client_secret + "&")),
+and expects a 204 within a few seconds. The handler therefore only verifies and
+enqueues; a background RefreshQueue dedupes the (collection, owner, date)
+notifications and runs the handlers registered for each collection type.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+from app import deadline
+
+logger = logging.getLogger("app.fitbit.subscriptions")
+
+
+class FitbitNotification(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    collection_type: str = Field(alias="collectionType")
+    date: date
+    owner_id: str = Field(default="", alias="ownerId")
+    owner_type: str = Field(default="user", alias="ownerType")
+    subscription_id: str = Field(default="", alias="subscriptionId")
+
+
+_notifications = TypeAdapter(list[FitbitNotification])
+
+
+def sign_payload(body: bytes, client_secret: str) -> str:
+    digest = hmac.new(f"{client_secret}&".encode(), body, hashlib.sha1).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def verify_signature(body: bytes, signature: str | None, client_secret: str) -> bool:
+    if not signature or not client_secret:
+        return False
+    return hmac.compare_digest(sign_payload(body, client_secret), signature)
+
+
+def parse_notifications(body: bytes) -> list[FitbitNotification]:
+    return _notifications.validate_json(body)
+
+
+# Handlers receive every pending date of one owner for their collection in one call
+RefreshHandler = Callable[[list[date]], Awaitable[None]]
+
+
+@dataclass
+class QueueStats:
+    received: int = 0
+    enqueued: int = 0
+    deduplicated: int = 0
+    processed: int = 0
+    failures: int = 0
+
+
+class RefreshQueue:
+    """
+    Deduplicating background queue of (collection type, owner, date) refresh jobs.
+
+    The consumer task starts lazily on the first enqueue in a running loop.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[RefreshHandler]] = {}
+        self._pending: dict[tuple[str, str, date], None] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._idle: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.stats = QueueStats()
+
+    def register(self, collection_type: str, handler: RefreshHandler) -> None:
+        self._handlers.setdefault(collection_type, []).append(handler)
+
+    def _ensure_consumer(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._idle = asyncio.Event()
+            # Not tied to the request that happened to start it (nor its deadline)
+            self._task = deadline.detached_task(self._consume(), name="fitbit-refresh-queue")
+
+    def enqueue(self, notifications: list[FitbitNotification]) -> int:
+        """Queue refresh work; returns how many new (collection, owner, date) jobs were added."""
+        self._ensure_consumer()
+        assert self._wakeup is not None and self._idle is not None
+        added = 0
+        for n in notifications:
+            self.stats.received += 1
+            key = (n.collection_type, n.owner_id, n.date)
+            if key in self._pending:
+                self.stats.deduplicated += 1
+                continue
+            self._pending[key] = None
+            added += 1
+        self.stats.enqueued += added
+        if self._pending:
+            self._idle.clear()
+            self._wakeup.set()
+        return added
+
+    async def _consume(self) -> None:
+        assert self._wakeup is not None and self._idle is not None
+        while True:
+            if not self._pending:
+                self._idle.set()
+                await self._wakeup.wait()
+            self._wakeup.clear()
+            batch, self._pending = self._pending, {}
+            by_owner: dict[tuple[str, str], list[date]] = {}
+            for collection_type, owner_id, day in batch:
+                by_owner.setdefault((collection_type, owner_id), []).append(day)
+            for (collection_type, owner_id), days in by_owner.items():
+                for handler in self._handlers.get(collection_type, []):
+                    try:
+                        await handler(sorted(days))
+                    except Exception:
+                        self.stats.failures += 1
+                        logger.exception(
+                            "Refresh of %s %s for %s failed", collection_type, days, owner_id
+                        )
+                self.stats.processed += len(days)
+
+    async def drain(self) -> None:
+        """Wait until everything enqueued so far has been handled."""
+        if self._task is None or self._idle is None:
+            return
+        await self._idle.wait()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict[str, int]:
+        s = self.stats
+        return {
+            "pending": len(self._pending),
+            "received": s.received,
+            "enqueued": s.enqueued,
+            "deduplicated": s.deduplicated,
+            "processed": s.processed,
+            "failures": s.failures,
+        }
+
+
+refresh_queue = RefreshQueue()
@@ -0,0 +1,221 @@
+"""
+Per-user Fitbit OAuth tokens.
+
+Tokens live in the `fitbit_token` table (encrypted at rest, see
+app.db_types.EncryptedString). Request paths call
+`token_store.get_access_token(user_id)`, which serves the access token from
+memory until it is within FITBIT_TOKEN_REFRESH_SKEW_S of expiring and only then
+refreshes it. app.workers.token_sweeper refreshes tokens ahead of that point in
+batches, so interactive requests rarely pay for a token round trip.
+
+The `expires_at` index serves `due_for_refresh`: the sweeper pages through
+due tokens in (expires_at, user_id) order without scanning the table.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import literal, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.config import get_settings
+from app.database import session_scope
+from app.integrations.fitbit_client import FitbitClient, FitbitTokens, get_fitbit_client
+from app.integrations.singleflight import SingleFlight
+from app.models import FitbitToken
+
+logger = logging.getLogger("app.integrations.fitbit_tokens")
+
+
+class TokenNotFoundError(LookupError):
+    """Raised when a user has no stored Fitbit tokens (they never connected)."""
+
+
+@dataclass(frozen=True)
+class StoredToken:
+    user_id: str
+    access_token: str
+    refresh_token: str
+    scope: str
+    expires_at: datetime  # naive UTC, like every other timestamp in the schema
+
+
+def _stored(row: FitbitToken) -> StoredToken:
+    return StoredToken(
+        user_id=row.user_id,
+        access_token=row.access_token,
+        refresh_token=row.refresh_token,
+        scope=row.scope,
+        expires_at=row.expires_at,
+    )
+
+
+class FitbitTokenStore:
+    def __init__(
+        self,
+        session_factory: Callable[[], AbstractContextManager[Session]] = session_scope,
+        client_factory: Callable[[], FitbitClient] = get_fitbit_client,
+        *,
+        refresh_skew_s: float = 300.0,
+        cache_maxsize: int = 10_000,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self._session_factory = session_factory
+        self._client_factory = client_factory
+        self.refresh_skew_s = refresh_skew_s
+        self._clock = clock
+        # user_id -> access token, kept until refresh_skew_s before it expires
+        self._access: TTLCache[str, str] = TTLCache(
+            maxsize=cache_maxsize, ttl_s=None, clock=time.monotonic
+        )
+        self._refreshing: SingleFlight[StoredToken] = SingleFlight()
+        self.refreshed = 0
+        self.refresh_failed = 0
+
+    def now(self) -> datetime:
+        return self._clock()
+
+    # -- storage (blocking; call through asyncio.to_thread) --------------
+
+    def save(self, user_id: str, tokens: FitbitTokens) -> StoredToken:
+        """Insert or replace the user's tokens (e.g. after the OAuth callback)."""
+        stored = StoredToken(
+            user_id=user_id,
+            access_token=tokens.access_token,
+            refresh_token=tokens.refresh_token,
+            scope=tokens.scope,
+            expires_at=self._clock() + timedelta(seconds=tokens.expires_in),
+        )
+        with self._session_factory() as db:
+            db.merge(
+                FitbitToken(
+                    user_id=user_id,
+                    access_token=stored.access_token,
+                    refresh_token=stored.refresh_token,
+                    scope=stored.scope,
+                    expires_at=stored.expires_at,
+                    refresh_failures=0,
+                    updated_at=self._clock(),
+                )
+            )
+            db.commit()
+        self._remember(stored)
+        return stored
+
+    def load(self, user_id: str) -> StoredToken:
+        with self._session_factory() as db:
+            row = db.get(FitbitToken, user_id)
+            if row is None:
+                raise TokenNotFoundError(user_id)
+            return _stored(row)
+
+    def due_for_refresh(
+        self, cutoff: datetime, limit: int, after: tuple[datetime, str] | None = None
+    ) -> list[tuple[datetime, str]]:
+        """
+        (expires_at, user_id) of up to `limit` tokens expiring before `cutoff`,
+        oldest first. Pass the last key of a page as `after` for the next one.
+        """
+        stmt = select(FitbitToken.expires_at, FitbitToken.user_id).where(
+            FitbitToken.expires_at < cutoff
+        )
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(FitbitToken.expires_at, FitbitToken.user_id) > tuple_(*map(literal, after))
+            )
+        stmt = stmt.order_by(FitbitToken.expires_at, FitbitToken.user_id).limit(limit)
+        with self._session_factory() as db:
+            return [(expires_at, user_id) for expires_at, user_id in db.execute(stmt)]
+
+    def _record_failure(self, user_id: str) -> None:
+        with self._session_factory() as db:
+            db.execute(
+                update(FitbitToken)
+                .where(FitbitToken.user_id == user_id)
+                .values(refresh_failures=FitbitToken.refresh_failures + 1)
+            )
+            db.commit()
+
+    # -- access tokens ------------------------------------------------------
+
+    def _fresh_for_s(self, token: StoredToken) -> float:
+        return (token.expires_at - self._clock()).total_seconds() - self.refresh_skew_s
+
+    def _remember(self, token: StoredToken) -> None:
+        fresh_for = self._fresh_for_s(token)
+        if fresh_for > 0:
+            self._access.set(token.user_id, token.access_token, ttl_s=fresh_for)
+        else:
+            self._access.delete(token.user_id)
+
+    async def get_access_token(self, user_id: str) -> str:
+        """A usable access token for `user_id`, refreshing it first if it is about to expire."""
+        cached = self._access.get(user_id)
+        if cached is not None:
+            return cached
+        token = await asyncio.to_thread(self.load, user_id)
+        if self._fresh_for_s(token) <= 0:
+            token = await self.refresh(user_id)
+        else:
+            self._remember(token)
+        return token.access_token
+
+    async def refresh(self, user_id: str, *, min_fresh_s: float = 0.0) -> StoredToken:
+        """
+        Refresh the user's tokens unless they are still fresh for `min_fresh_s`
+        beyond the skew. Concurrent refreshes for one user share a single call:
+        Fitbit rotates the refresh token, so a second call with the old one fails.
+        """
+        return await self._refreshing.do(user_id, lambda: self._refresh(user_id, min_fresh_s))
+
+    async def _refresh(self, user_id: str, min_fresh_s: float) -> StoredToken:
+        current = await asyncio.to_thread(self.load, user_id)
+        if self._fresh_for_s(current) > min_fresh_s:
+            # Another instance (or the sweeper) refreshed it since we looked
+            self._remember(current)
+            return current
+        try:
+            tokens = await self._client_factory().refresh_tokens(current.refresh_token)
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code in (400, 401):
+                # The refresh token may have been rotated by another instance meanwhile
+                latest = await asyncio.to_thread(self.load, user_id)
+                if latest.refresh_token != current.refresh_token:
+                    self._remember(latest)
+                    return latest
+            self.refresh_failed += 1
+            await asyncio.to_thread(self._record_failure, user_id)
+            raise
+        except Exception:
+            self.refresh_failed += 1
+            await asyncio.to_thread(self._record_failure, user_id)
+            raise
+        self.refreshed += 1
+        return await asyncio.to_thread(self.save, user_id, tokens)
+
+    def forget(self, user_id: str | None = None) -> None:
+        """Drop cached access tokens (one user, or all)."""
+        if user_id is None:
+            self._access.clear()
+        else:
+            self._access.delete(user_id)
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "cached_access_tokens": len(self._access),
+            "refreshed": self.refreshed,
+            "refresh_failed": self.refresh_failed,
+            "refreshing_now": self._refreshing.in_flight(),
+        }
+
+
+token_store = FitbitTokenStore(refresh_skew_s=get_settings().fitbit_token_refresh_skew_s)
@@ -1,7 +1,21 @@
 from __future__ import annotations
 
+from typing import Any
+
 from google.cloud import secretmanager
 
+from app.cache import TTLCache
+from app.config import get_settings
+
+
+def _make_client() -> Any:
+    settings = get_settings()
+    if settings.secret_store_backend == "memory":
+        from app.integrations.emulators.secret_manager import get_fake_secret_manager
+
+        return get_fake_secret_manager()
+    return secretmanager.SecretManagerServiceClient()
+
 
 class SecretStore:
     """
@@ -9,19 +23,42 @@ class SecretStore:
 
     - read(secret_id): reads latest secret value
     - write_new_version(secret_id, value): creates a new version (rotation-friendly)
+
+    The backing client is picked from SECRET_STORE_BACKEND unless one is passed in.
+    Reads are cached for SECRET_CACHE_TTL_S; pass cache=False for secrets that
+    other instances rotate (e.g. the Fitbit refresh token).
     """
 
-    def __init__(self, project_id: str):
+    def __init__(
+        self, project_id: str, client: Any | None = None, cache_ttl_s: float | None = None
+    ):
         self.project_id = project_id
-        self.client = secretmanager.SecretManagerServiceClient()
+        self.client = client if client is not None else _make_client()
+        ttl = get_settings().secret_cache_ttl_s if cache_ttl_s is None else cache_ttl_s
+        self._cache: TTLCache[tuple[str, str], str] = TTLCache(maxsize=64, ttl_s=ttl)
 
-    def read(self, secret_id: str, version_id: str = "latest") -> str:
+    def read(self, secret_id: str, version_id: str = "latest", cache: bool = True) -> str:
+        key = (secret_id, version_id)
+        if cache and self._cache.ttl_s:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
         name = f"projects/{self.project_id}/secrets/{secret_id}/versions/{version_id}"
         resp = self.client.access_secret_version(request={"name": name})
-        return resp.payload.data.decode("utf-8")
+        value = resp.payload.data.decode("utf-8")
+        if self._cache.ttl_s:
+            self._cache.set(key, value)
+        return value
 
     def write_new_version(self, secret_id: str, value: str) -> None:
         parent = f"projects/{self.project_id}/secrets/{secret_id}"
         self.client.add_secret_version(
             request={"parent": parent, "payload": {"data": value.encode("utf-8")}}
         )
+        if self._cache.ttl_s:
+            self._cache.set((secret_id, "latest"), value)
+
+    def warm(self, *secret_ids: str) -> None:
+        """Pre-load secrets into the cache (e.g. at startup)."""
+        for secret_id in secret_ids:
+            self.read(secret_id, cache=False)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from collections.abc import Callable, Coroutine, Hashable
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    task: asyncio.Future[T]
+    loop: asyncio.AbstractEventLoop
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The work runs in its own task, so cancelling the caller that started it
+    (e.g. its client disconnected) does not fail the other waiters; the work is
+    only cancelled once every waiter has gone. All waiters receive the same
+    result object (treat it as read-only) or the same exception.
+
+    The task runs in an empty context rather than the first caller's, so the
+    shared work is not bound by that caller's request state (e.g. its deadline).
+    Callers bound their own wait instead.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _Call[T]] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def _forget(self, key: Hashable, call: _Call[T], _task: object = None) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Waiters that left before the call failed never see its exception
+        if call.task.done() and not call.task.cancelled():
+            call.task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        loop = asyncio.get_running_loop()
+        call = self._calls.get(key)
+        if call is None or call.loop is not loop or call.task.done():
+            task: asyncio.Future[T] = loop.create_task(fn(), context=contextvars.Context())
+            call = _Call(task=task, loop=loop)
+            self._calls[key] = call
+            task.add_done_callback(partial(self._forget, key, call))
+            self.leaders += 1
+        else:
+            self.followers += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to use the result: stop the upstream work and
+                # make sure later callers start a fresh call instead of joining it.
+                self._forget(key, call)
+                call.task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def snapshot(self) -> dict[str, Any]:
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.followers,
+            "coalesced_ratio": round(self.followers / total, 3) if total else None,
+        }
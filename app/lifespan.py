@@ -0,0 +1,107 @@
+# app/lifespan.py
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from app import database
+from app.config import get_settings
+from app.greeting_cache import build_listener
+from app.gsi.activity_score.prefetch import prefetcher
+from app.integrations import fitbit_client
+from app.integrations.fitbit_subscriptions import refresh_queue
+from app.readiness import ReadinessProber
+
+logger = logging.getLogger("app.lifespan")
+
+settings = get_settings()
+
+prober = ReadinessProber(interval_s=settings.readiness_probe_interval_s)
+prober.add_check("database", database.ping)
+prober.add_check(
+    "secret_manager", lambda: fitbit_client.secrets_store.read("fitbit_client_id", cache=False)
+)
+
+
+async def _warm_database() -> None:
+    opened = await asyncio.to_thread(database.warm_pool, settings.db_warmup_connections)
+    logger.info("Warmed %d database connections", opened)
+
+
+async def _warm_fitbit() -> None:
+    # Secret cache first: get_fitbit_client() reads fitbit_client_id on every request
+    await asyncio.to_thread(fitbit_client.secrets_store.warm, "fitbit_client_id")
+    client = fitbit_client.get_fitbit_client()
+    # Open (and keep alive) a TLS connection to the API host; the status is irrelevant
+    await fitbit_client.get_http_client().head(f"{client.api_base}/")
+
+
+async def warm_up() -> None:
+    """
+    Best effort: a failed warm-up step is logged, never fatal. Each step gets
+    WARMUP_TIMEOUT_S; past that startup goes on without it (a database
+    connect already under way finishes in its thread in the background).
+    """
+    timeout_s = settings.warmup_timeout_s if settings.warmup_timeout_s > 0 else None
+    results = await asyncio.gather(
+        asyncio.wait_for(_warm_database(), timeout_s),
+        asyncio.wait_for(_warm_fitbit(), timeout_s),
+        return_exceptions=True,
+    )
+    for step, result in zip(("database", "fitbit"), results, strict=True):
+        if isinstance(result, TimeoutError):
+            logger.warning("Warm-up of %s timed out after %ss", step, timeout_s)
+        elif isinstance(result, BaseException):
+            logger.warning("Warm-up of %s failed: %s", step, result)
+
+
+async def _cancel(task: asyncio.Task[None] | None) -> None:
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if settings.warmup_enabled:
+        await warm_up()
+    prober.start()
+
+    sync_task = None
+    if settings.fitbit_sync_in_process:
+        from app.workers.sync import build_worker
+
+        sync_task = asyncio.create_task(
+            build_worker().run_forever(settings.fitbit_sync_interval_s), name="fitbit-sync"
+        )
+    sweeper_task = None
+    if settings.fitbit_token_sweeper_in_process:
+        from app.workers.token_sweeper import build_sweeper
+
+        sweeper_task = asyncio.create_task(
+            build_sweeper().run_forever(settings.fitbit_token_sweep_interval_s),
+            name="fitbit-token-sweeper",
+        )
+    greeting_listener_task = None
+    if settings.greeting_cache_ttl_s > 0 and settings.greeting_cache_channel:
+        greeting_listener_task = asyncio.create_task(
+            build_listener().run_forever(), name="greeting-cache-listener"
+        )
+    try:
+        yield
+    finally:
+        await _cancel(sync_task)
+        await _cancel(sweeper_task)
+        await _cancel(greeting_listener_task)
+        await refresh_queue.stop()
+        await prefetcher.stop()
+        await prober.stop()
+        await fitbit_client.aclose_http_client()
@@ -1,19 +1,70 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app.admission import AdmissionMiddleware, build_policy
 from app.api.v1 import api_v1
-from app.gsi.activity_score.router import router as activity_score_router
 from app.config import get_settings
+from app.db_instrumentation import QueryStatsMiddleware
+from app.deadline import DeadlineExceeded, DeadlineMiddleware
+from app.deadline import stats as deadline_stats
+from app.greeting_cache import greeting_cache
+from app.gsi.activity_score.cache import summary_cache
+from app.gsi.activity_score.prefetch import prefetcher
+from app.gsi.activity_score.router import router as activity_score_router
+from app.gsi.pipeline import UpstreamTimeoutError
+from app.integrations.circuit_breaker import CircuitOpenError
+from app.integrations.fitbit_client import breakers as fitbit_breakers
+from app.integrations.fitbit_client import inflight as fitbit_inflight
+from app.integrations.fitbit_daily import section_cache as fitbit_section_cache
+from app.integrations.fitbit_subscriptions import refresh_queue
+from app.integrations.fitbit_tokens import token_store as fitbit_token_store
+from app.lifespan import lifespan, prober
+from app.metrics import collect, register_collector
 
 settings = get_settings()
 
-app = FastAPI(title=settings.project_name, version=settings.app_version)
+app = FastAPI(title=settings.project_name, version=settings.app_version, lifespan=lifespan)
 app.include_router(api_v1, prefix="/api/v1")
 app.include_router(activity_score_router, prefix="/api/v1")
 
+register_collector("fitbit_webhook", refresh_queue.snapshot)
+register_collector("gsi_summary_cache", summary_cache.snapshot)
+register_collector("fitbit_singleflight", fitbit_inflight.snapshot)
+register_collector("gsi_prefetch", prefetcher.snapshot)
+register_collector("fitbit_section_cache", fitbit_section_cache.snapshot)
+register_collector("fitbit_breakers", fitbit_breakers.snapshot)
+register_collector("fitbit_tokens", fitbit_token_store.snapshot)
+register_collector("request_deadlines", deadline_stats.snapshot)
+register_collector("greeting_cache", greeting_cache.snapshot)
+
+admission_policy = build_policy(settings)
+register_collector("admission", admission_policy.snapshot)
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError) -> JSONResponse:
+    # Routes without a stale fallback fail fast while an upstream is down
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=503,
+        headers={"Retry-After": str(max(1, round(exc.retry_after_s)))},
+    )
+
+
+@app.exception_handler(UpstreamTimeoutError)
+async def upstream_timeout_handler(request: Request, exc: UpstreamTimeoutError) -> JSONResponse:
+    # Fitbit was slow; the request's own deadline (504) had not run out
+    return JSONResponse({"detail": str(exc)}, status_code=502)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    return JSONResponse({"detail": str(exc)}, status_code=504)
+
+
 allow_origins = [o.strip() for o in settings.allow_origins.split(",") if o.strip()]
 print(f"Allowing origins: {allow_origins}")
 
@@ -28,6 +79,20 @@ app.add_middleware(
     max_age=86400,  # cache preflight for 1 day
 )
 
+if settings.env != "prod":
+    # Per-request X-DB-Query-Count / X-DB-Time-Ms headers for local debugging
+    app.add_middleware(QueryStatsMiddleware)
+
+if settings.admission_enabled:
+    # Inside the deadline middleware: queueing time counts against the deadline,
+    # and a disconnected client leaves the queue
+    app.add_middleware(AdmissionMiddleware, policy=admission_policy)
+
+# Outermost, so a timeout or client disconnect cancels everything below it
+app.add_middleware(
+    DeadlineMiddleware, default_s=settings.request_deadline_s, max_s=settings.request_deadline_max_s
+)
+
 
 @app.get("/info")
 async def info() -> JSONResponse:
@@ -38,3 +103,15 @@ async def info() -> JSONResponse:
             "app_name": settings.project_name,
         }
     )
+
+
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    # Served from the background prober's last result; never touches dependencies
+    state = prober.state
+    return JSONResponse(state.as_dict(), status_code=200 if state.ready else 503)
+
+
+@app.get("/metrics")
+async def metrics() -> JSONResponse:
+    return JSONResponse(collect())
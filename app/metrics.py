@@ -0,0 +1,27 @@
+# app/metrics.py
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+# Named snapshot functions, rendered together by GET /metrics
+_collectors: dict[str, Callable[[], dict[str, Any]]] = {}
+
+
+def register_collector(name: str, collector: Callable[[], dict[str, Any]]) -> None:
+    """Register (or replace) a snapshot function under `name`."""
+    _collectors[name] = collector
+
+
+def unregister_collector(name: str) -> None:
+    _collectors.pop(name, None)
+
+
+def collect() -> dict[str, Any]:
+    snapshot: dict[str, Any] = {}
+    for name, collector in list(_collectors.items()):
+        try:
+            snapshot[name] = collector()
+        except Exception as exc:  # a broken collector must not break the endpoint
+            snapshot[name] = {"error": str(exc)}
+    return snapshot
@@ -2,12 +2,12 @@
 from __future__ import annotations
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import DateTime, String, text
+from sqlalchemy import Date, DateTime, Float, Integer, LargeBinary, String, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
-from app.db_types import GUID
+from app.db_types import GUID, EncryptedString
 
 
 # ---------- Base ----------
@@ -31,4 +31,98 @@ class Greeting(Base):
     message: Mapped[str] = mapped_column(String(50), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=False), server_default=text("CURRENT_TIMESTAMP"), nullable=False
-    )
\ No newline at end of file
+    )
+
+
+class FitbitDailySummaryRecord(Base):
+    """Fitbit daily activity data synced by app.workers.sync."""
+
+    __tablename__ = "fitbit_daily_summary"
+
+    date: Mapped[date] = mapped_column(Date(), primary_key=True)
+    steps: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    active_zone_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    calories_out: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    fetched_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), server_default=text("CURRENT_TIMESTAMP"), nullable=False
+    )
+
+
+class HeartRateDayRecord(Base):
+    """Intraday heart rate per day: the compressed series plus stats derived from it (app.gsi.activity_score.heartrate)."""
+
+    __tablename__ = "fitbit_heartrate_day"
+
+    date: Mapped[date] = mapped_column(Date(), primary_key=True)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    series: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    resting_heart_rate: Mapped[float | None] = mapped_column(Float, nullable=True)
+    fat_burn_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cardio_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    peak_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    active_zone_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    fetched_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), server_default=text("CURRENT_TIMESTAMP"), nullable=False
+    )
+
+
+class ActivityScoreDailyRecord(Base):
+    """ActivityScoreCalculatorV2 output per synced day; the input to activity_score_rollup."""
+
+    __tablename__ = "activity_score_daily"
+
+    date: Mapped[date] = mapped_column(Date(), primary_key=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    steps: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    active_zone_minutes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    version: Mapped[str] = mapped_column(String(16), nullable=False)
+
+
+class ActivityScoreRollupRecord(Base):
+    """Weekly/monthly aggregates of activity_score_daily, kept current per changed day."""
+
+    __tablename__ = "activity_score_rollup"
+
+    period: Mapped[str] = mapped_column(String(8), primary_key=True)  # "week" | "month"
+    period_start: Mapped[date] = mapped_column(Date(), primary_key=True)
+    days: Mapped[int] = mapped_column(Integer, nullable=False)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    score_min: Mapped[float] = mapped_column(Float, nullable=False)
+    score_max: Mapped[float] = mapped_column(Float, nullable=False)
+    steps_total: Mapped[int] = mapped_column(Integer, nullable=False)
+    active_zone_minutes_total: Mapped[int] = mapped_column(Integer, nullable=False)
+    longest_streak: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), server_default=text("CURRENT_TIMESTAMP"), nullable=False
+    )
+
+
+class SyncCheckpoint(Base):
+    """Resume point for long-running jobs (e.g. the Fitbit history backfill)."""
+
+    __tablename__ = "sync_checkpoint"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    cursor_date: Mapped[date | None] = mapped_column(Date(), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), server_default=text("CURRENT_TIMESTAMP"), nullable=False
+    )
+
+
+class FitbitToken(Base):
+    """Per-user Fitbit OAuth tokens, encrypted at rest; refreshed ahead of expiry by app.workers.token_sweeper."""
+
+    __tablename__ = "fitbit_token"
+
+    user_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    access_token: Mapped[str] = mapped_column(EncryptedString(), nullable=False)
+    refresh_token: Mapped[str] = mapped_column(EncryptedString(), nullable=False)
+    scope: Mapped[str] = mapped_column(String(255), nullable=False, default="")
+    # Access-token expiry (UTC); the sweeper scans this index for tokens about to expire
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), nullable=False, index=True
+    )
+    refresh_failures: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), server_default=text("CURRENT_TIMESTAMP"), nullable=False
+    )
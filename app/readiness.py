@@ -0,0 +1,99 @@
+# app/readiness.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger("app.readiness")
+
+# A check is a blocking callable that returns truthy when the dependency is usable
+Check = Callable[[], Any]
+
+
+@dataclass
+class CheckResult:
+    ok: bool
+    latency_ms: float
+    error: str | None = None
+
+
+@dataclass
+class ReadinessState:
+    ready: bool = False
+    checked_at: float | None = None  # unix time of the last completed probe
+    checks: dict[str, CheckResult] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "status": (
+                "ready" if self.ready else ("starting" if self.checked_at is None else "unready")
+            ),
+            "checked_at": self.checked_at,
+            "checks": {
+                name: {"ok": r.ok, "latency_ms": round(r.latency_ms, 2), "error": r.error}
+                for name, r in self.checks.items()
+            },
+        }
+
+
+class ReadinessProber:
+    """
+    Runs dependency checks on a fixed interval in the background and keeps the
+    latest result, so /ready answers from memory and health-check traffic never
+    reaches the database or Secret Manager.
+    """
+
+    def __init__(self, interval_s: float = 10.0, timeout_s: float = 5.0):
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.state = ReadinessState()
+        self._checks: dict[str, Check] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def add_check(self, name: str, check: Check) -> None:
+        self._checks[name] = check
+
+    async def _run_check(self, check: Check) -> CheckResult:
+        started = time.perf_counter()
+        try:
+            ok = await asyncio.wait_for(asyncio.to_thread(check), self.timeout_s)
+            error = None if ok else "check returned false"
+        except Exception as exc:
+            ok, error = False, f"{type(exc).__name__}: {exc}"
+        return CheckResult(
+            ok=bool(ok), latency_ms=(time.perf_counter() - started) * 1000, error=error
+        )
+
+    async def run_once(self) -> ReadinessState:
+        names = list(self._checks)
+        results = await asyncio.gather(*(self._run_check(self._checks[n]) for n in names))
+        checks = dict(zip(names, results, strict=True))
+        self.state = ReadinessState(
+            ready=all(r.ok for r in results), checked_at=time.time(), checks=checks
+        )
+        return self.state
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:  # keep probing whatever happens
+                logger.exception("Readiness probe failed")
+            await asyncio.sleep(self.interval_s)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(), name="readiness-prober")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
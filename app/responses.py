@@ -0,0 +1,59 @@
+"""
+Fast JSON responses for high-volume routes.
+
+By default FastAPI validates a route's return value against its
+`response_model` and then serializes it again (`jsonable_encoder` + json on
+older releases, pydantic on newer ones). For payloads we built ourselves that
+first pass is pure overhead. Routes opt in by returning one of these
+responses; FastAPI sends a returned Response as is, while the declared
+`response_model` still documents the schema:
+
+- `model_response(value, type_)` serializes trusted pydantic models (or lists
+  of them) with pydantic-core's `dump_json`, without re-validating them;
+  `from_attributes=True` converts ORM rows in the same single pass,
+- `FastJSONResponse(payload)` renders plain dict/list payloads (e.g. Fitbit
+  passthrough) with orjson instead of `jsonable_encoder` + `json.dumps`.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from typing import Any
+
+import orjson
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse, Response
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@cache
+def _adapter(type_: Any) -> TypeAdapter[Any]:
+    return TypeAdapter(type_)
+
+
+def model_response(
+    content: Any,
+    type_: Any,
+    *,
+    from_attributes: bool = False,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """
+    JSON response for `content` of type `type_` (e.g. `list[ActivityScoreResult]`).
+    Content must already be valid: models are dumped as they are. With
+    `from_attributes=True` `content` may be ORM objects, validated once on the way.
+    """
+    adapter = _adapter(type_)
+    if from_attributes:
+        content = adapter.validate_python(content, from_attributes=True)
+    return Response(
+        adapter.dump_json(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
@@ -1,11 +1,11 @@
 # app/schemas.py
 from __future__ import annotations
 
-from datetime import datetime, date
+from datetime import datetime
 from typing import Generic, TypeVar
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field, NonNegativeInt
+from pydantic import BaseModel, ConfigDict, Field
 
 # ---------------------------------------------------------
 # Common base config
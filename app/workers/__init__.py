@@ -0,0 +1 @@
+"""Background jobs; each module is runnable with `python -m app.workers.<name>`."""
@@ -0,0 +1,201 @@
+"""
+Bulk export of Fitbit history and activity scores (app.gsi.activity_score.export).
+
+Streams daily summaries and their scores for any date range to CSV or
+Parquet, EXPORT_CHUNK_DAYS at a time, reading from the stored history
+(--source local, default) or from Fitbit (--source fitbit):
+
+- CSV goes to one file, flushed after every chunk,
+- Parquet goes to a directory of part files covering --part-days each
+  (readable together as one dataset, e.g. `pyarrow.parquet.read_table(dir)`),
+  one row group per chunk; a part is renamed into place only once complete.
+
+--resume continues an interrupted export after its last complete day instead
+of starting over; without it an existing output is left alone.
+
+    python -m app.workers.export --start 2019-01-01 --end 2025-12-31 -o history.csv
+    python -m app.workers.export --start 2019-01-01 --end 2025-12-31 -o history/ --format parquet --resume
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+from app.config import get_settings
+from app.gsi.activity_score import export
+from app.gsi.activity_score.formats import UnsupportedFormatError
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.gsi.activity_score.registry import (
+    ActivityScoreCalculator,
+    UnknownCalculatorVersionError,
+    get_calculator_registry,
+)
+
+logger = logging.getLogger("app.workers.export")
+
+
+class ExportExistsError(FileExistsError):
+    """Raised when the output already exists and the export was not asked to resume."""
+
+
+@dataclass
+class ExportReport:
+    output: Path
+    start_date: date
+    end_date: date
+    resumed_after: date | None = None
+    bytes_written: int = 0
+    parts: int = 0
+
+    def __str__(self) -> str:
+        resumed = f" (resumed after {self.resumed_after})" if self.resumed_after else ""
+        return f"Exported {self.start_date}..{self.end_date} to {self.output}{resumed}: {self.bytes_written} bytes"
+
+
+class ScoreExporter:
+    def __init__(
+        self,
+        provider: FitbitDailySummaryProvider,
+        calculators: Sequence[ActivityScoreCalculator],
+        *,
+        chunk_days: int = 31,
+        part_days: int = 366,
+    ):
+        self.provider = provider
+        self.calculators = list(calculators)
+        self.chunk_days = max(1, chunk_days)
+        self.part_days = max(1, part_days)
+
+    async def to_csv(
+        self, path: Path, start_date: date, end_date: date, *, resume: bool = False
+    ) -> ExportReport:
+        export.check_format(export.CSV)
+        report = ExportReport(path, start_date, end_date)
+        if path.exists() and path.stat().st_size > 0:
+            if not resume:
+                raise ExportExistsError(f"{path} exists; pass --resume to continue it")
+            report.resumed_after = export.csv_resume_after(path)
+        begin = not path.exists() or path.stat().st_size == 0
+        if report.resumed_after is not None:
+            start_date = max(start_date, report.resumed_after + timedelta(days=1))
+        with path.open("ab") as f:
+            async for data in export.stream_export(
+                self.provider,
+                self.calculators,
+                start_date,
+                end_date,
+                export.CSV,
+                chunk_days=self.chunk_days,
+                begin=begin,
+            ):
+                f.write(data)
+                f.flush()
+                report.bytes_written += len(data)
+        return report
+
+    async def to_parquet(
+        self, directory: Path, start_date: date, end_date: date, *, resume: bool = False
+    ) -> ExportReport:
+        export.check_format(export.PARQUET)
+        report = ExportReport(directory, start_date, end_date)
+        directory.mkdir(parents=True, exist_ok=True)
+        if any(directory.glob("part-*.parquet")):
+            if not resume:
+                raise ExportExistsError(
+                    f"{directory} already holds part files; pass --resume to continue it"
+                )
+            report.resumed_after = export.parquet_resume_after(directory)
+        if report.resumed_after is not None:
+            start_date = max(start_date, report.resumed_after + timedelta(days=1))
+        for part_start, part_end in export.date_chunks(start_date, end_date, self.part_days):
+            path = directory / export.parquet_part_name(part_start, part_end)
+            tmp = path.with_suffix(".tmp")
+            with tmp.open("wb") as f:
+                async for data in export.stream_export(
+                    self.provider,
+                    self.calculators,
+                    part_start,
+                    part_end,
+                    export.PARQUET,
+                    chunk_days=self.chunk_days,
+                ):
+                    f.write(data)
+                    report.bytes_written += len(data)
+            tmp.replace(path)
+            report.parts += 1
+            logger.info("Wrote %s", path)
+        return report
+
+
+def build_provider(source: str) -> FitbitDailySummaryProvider:
+    if source == "local":
+        from app.database import session_scope
+        from app.gsi.activity_score.provider_local_impl import LocalDailySummaryProvider
+
+        return LocalDailySummaryProvider(session_scope)
+    from app.gsi.activity_score.deps import get_upstream_daily_summary_provider
+
+    return get_upstream_daily_summary_provider()
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description="Export Fitbit daily summaries and activity scores."
+    )
+    parser.add_argument(
+        "--start", type=date.fromisoformat, required=True, help="first day (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--end", type=date.fromisoformat, default=date.today(), help="last day (default: today)"
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, required=True, help="CSV file, or directory for Parquet parts"
+    )
+    parser.add_argument("--format", choices=sorted(export.MEDIA_TYPES), default=export.CSV)
+    parser.add_argument(
+        "--versions",
+        default="",
+        help="comma-separated calculator versions (default: GSI_SCORE_VERSION)",
+    )
+    parser.add_argument(
+        "--source", choices=("local", "fitbit"), default="local", help="stored history or Fitbit"
+    )
+    parser.add_argument("--chunk-days", type=int, default=settings.export_chunk_days)
+    parser.add_argument("--part-days", type=int, default=366, help="days per Parquet part file")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue after the last complete day already exported",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=settings.log_level)
+
+    registry = get_calculator_registry()
+    try:
+        calculators = registry.resolve(args.versions) if args.versions else [registry.get()]
+        export.check_format(args.format)
+    except (UnknownCalculatorVersionError, UnsupportedFormatError) as exc:
+        parser.error(str(exc))
+    exporter = ScoreExporter(
+        build_provider(args.source),
+        calculators,
+        chunk_days=args.chunk_days,
+        part_days=args.part_days,
+    )
+    run = exporter.to_parquet if args.format == export.PARQUET else exporter.to_csv
+    try:
+        report = asyncio.run(run(args.output, args.start, args.end, resume=args.resume))
+    except ExportExistsError as exc:
+        parser.error(str(exc))
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
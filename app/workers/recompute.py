@@ -0,0 +1,224 @@
+"""
+Activity-score recompute job.
+
+Re-scores the stored Fitbit history (`fitbit_daily_summary`) with one
+calculator version, for when a new version ships (set GSI_SCORE_VERSION) or
+stored scores are otherwise out of date:
+
+- summaries are streamed in date order, RECOMPUTE_BATCH_SIZE rows at a time,
+  through a server-side cursor (never the whole table in memory),
+- batches are scored in-process or, with --workers N, in a process pool with
+  a bounded number of batches in flight,
+- each batch is written to `activity_score_daily` with one bulk INSERT and
+  one bulk UPDATE, its week/month rollups are rebuilt, and the last date done
+  is checkpointed in the same transaction, so an interrupted run resumes
+  where it stopped (--restart starts over).
+
+    python -m app.workers.recompute                      # GSI_SCORE_VERSION
+    python -m app.workers.recompute --version 1.0.0 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import date
+from typing import TypedDict
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import session_scope
+from app.gsi.activity_score.registry import get_calculator_registry
+from app.gsi.activity_score.rollup import buckets_for, rebuild_buckets
+from app.gsi.activity_score.store import get_checkpoint, set_checkpoint
+from app.models import ActivityScoreDailyRecord, FitbitDailySummaryRecord
+
+logger = logging.getLogger("app.workers.recompute")
+
+Row = tuple[date, int, int]  # date, steps, active_zone_minutes
+
+
+class ScoreRow(TypedDict):
+    """An activity_score_daily row, as bulk INSERT/UPDATE parameters."""
+
+    date: date
+    score: float
+    steps: int
+    active_zone_minutes: int
+    version: str
+
+
+def checkpoint_name(version: str) -> str:
+    return f"score_recompute:{version}"
+
+
+def score_batch(version: str, rows: list[Row]) -> list[ScoreRow]:
+    """Score one batch; module-level so process-pool workers can run it."""
+    calculator = get_calculator_registry().get(version)
+    # Stored rows are already valid summaries: score them without building models
+    return [
+        {
+            "date": day,
+            "score": float(calculator.score(steps, azm)),
+            "steps": steps,
+            "active_zone_minutes": azm,
+            "version": version,
+        }
+        for day, steps, azm in rows
+    ]
+
+
+@dataclass
+class RecomputeReport:
+    version: str
+    days: int = 0
+    batches: int = 0
+    elapsed_s: float = 0.0
+    resumed_after: date | None = None
+
+    @property
+    def days_per_s(self) -> float:
+        return self.days / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"Recomputed {self.days} days with {self.version} in {self.batches} batches, "
+            f"{self.elapsed_s:.1f}s ({self.days_per_s:.0f} days/s)"
+        )
+
+
+class ScoreRecomputeJob:
+    def __init__(
+        self,
+        version: str,
+        session_factory: Callable[[], AbstractContextManager[Session]] = session_scope,
+        *,
+        batch_size: int = 1000,
+        workers: int = 1,
+    ):
+        get_calculator_registry().get(version)  # fail fast on an unknown version
+        self.version = version
+        self._session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.workers = workers
+
+    def _batches(self, after: date | None) -> Iterator[list[Row]]:
+        stmt = select(
+            FitbitDailySummaryRecord.date,
+            FitbitDailySummaryRecord.steps,
+            FitbitDailySummaryRecord.active_zone_minutes,
+        ).order_by(FitbitDailySummaryRecord.date)
+        if after is not None:
+            stmt = stmt.where(FitbitDailySummaryRecord.date > after)
+        with self._session_factory() as db:
+            result = db.execute(stmt.execution_options(yield_per=self.batch_size))
+            for partition in result.partitions():
+                yield [tuple(row) for row in partition]
+
+    def _scored(self, batches: Iterator[list[Row]]) -> Iterator[list[ScoreRow]]:
+        if self.workers <= 1:
+            for batch in batches:
+                yield score_batch(self.version, batch)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # Enough batches in flight to keep every worker busy, without reading ahead unboundedly
+            pending: deque[Future[list[ScoreRow]]] = deque()
+            for batch in batches:
+                pending.append(pool.submit(score_batch, self.version, batch))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _write(self, scored: list[ScoreRow]) -> None:
+        dates = [row["date"] for row in scored]
+        with self._session_factory() as db:
+            existing = set(
+                db.scalars(
+                    select(ActivityScoreDailyRecord.date).where(
+                        ActivityScoreDailyRecord.date.in_(dates)
+                    )
+                )
+            )
+            updates = [row for row in scored if row["date"] in existing]
+            inserts = [row for row in scored if row["date"] not in existing]
+            if inserts:
+                db.execute(insert(ActivityScoreDailyRecord), inserts)
+            if updates:
+                db.execute(update(ActivityScoreDailyRecord), updates)
+            rebuild_buckets(db, buckets_for(dates))
+            set_checkpoint(db, checkpoint_name(self.version), max(dates))
+            db.commit()
+
+    def restart(self) -> None:
+        with self._session_factory() as db:
+            set_checkpoint(db, checkpoint_name(self.version), None)
+            db.commit()
+
+    def run(self) -> RecomputeReport:
+        report = RecomputeReport(version=self.version)
+        with self._session_factory() as db:
+            report.resumed_after = get_checkpoint(db, checkpoint_name(self.version))
+        started = time.perf_counter()
+        for scored in self._scored(self._batches(report.resumed_after)):
+            self._write(scored)
+            report.batches += 1
+            report.days += len(scored)
+            report.elapsed_s = time.perf_counter() - started
+            logger.info(
+                "Batch %d: %d days up to %s (%.0f days/s)",
+                report.batches,
+                report.days,
+                scored[-1]["date"],
+                report.days_per_s,
+            )
+        report.elapsed_s = time.perf_counter() - started
+        logger.info("%s", report)
+        return report
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description="Re-score stored Fitbit days with a calculator version."
+    )
+    parser.add_argument(
+        "--version",
+        default=settings.gsi_score_version,
+        help="calculator version (default: GSI_SCORE_VERSION)",
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.recompute_batch_size)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="score in a process pool of this size (large backfills)",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore the checkpoint and start from the oldest day"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=settings.log_level)
+
+    if args.version != settings.gsi_score_version:
+        logger.warning(
+            "Scoring with %s while GSI_SCORE_VERSION is %s: the sync worker re-scores days it touches",
+            args.version,
+            settings.gsi_score_version,
+        )
+    job = ScoreRecomputeJob(args.version, batch_size=args.batch_size, workers=args.workers)
+    if args.restart:
+        job.restart()
+    print(job.run())
+
+
+if __name__ == "__main__":
+    main()
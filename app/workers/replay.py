@@ -0,0 +1,126 @@
+"""
+Replay archived Fitbit responses through the current mapping and calculators.
+
+After a change to `fitbit_mapper.py` (or a calculator), stored history can be
+rebuilt from the raw payload archive (FITBIT_ARCHIVE_DIR) instead of being
+re-downloaded: every archived day in the range is re-mapped with
+`map_fitbit_daily_summary`, compared with `fitbit_daily_summary`, and changed
+days are written back in batches of --batch-days, which also re-scores them
+and updates their rollups (`upsert_summaries`). Nothing calls Fitbit.
+
+    python -m app.workers.replay --start 2023-01-01 --end 2025-12-31 --dry-run
+    python -m app.workers.replay --start 2023-01-01 --end 2025-12-31
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import session_scope
+from app.gsi.activity_score.export import date_chunks
+from app.gsi.activity_score.provider_archive_impl import ArchiveDailySummaryProvider
+from app.gsi.activity_score.store import load_summaries, upsert_summaries
+from app.integrations.fitbit_archive import FitbitArchive
+
+logger = logging.getLogger("app.workers.replay")
+
+
+@dataclass
+class ReplayReport:
+    days: int = 0  # archived days re-mapped
+    missing: int = 0  # days in the range without an archived activity summary
+    changed: int = 0  # mapped differently from the stored row (or not stored yet)
+    elapsed_s: float = 0.0
+    dry_run: bool = False
+    changed_dates: list[date] = field(default_factory=list, repr=False)
+
+    def __str__(self) -> str:
+        rate = self.days / self.elapsed_s if self.elapsed_s > 0 else 0.0
+        verb = "would change" if self.dry_run else "changed"
+        return (
+            f"Replayed {self.days} archived days ({self.missing} missing), {verb} {self.changed}, "
+            f"{self.elapsed_s:.1f}s ({rate:.0f} days/s)"
+        )
+
+
+class ArchiveReplay:
+    def __init__(
+        self,
+        provider: ArchiveDailySummaryProvider,
+        session_factory: Callable[[], AbstractContextManager[Session]] = session_scope,
+        *,
+        batch_days: int = 31,
+    ):
+        self.provider = provider
+        self._session_factory = session_factory
+        self.batch_days = max(1, batch_days)
+
+    def run(self, start_date: date, end_date: date, *, dry_run: bool = False) -> ReplayReport:
+        report = ReplayReport(dry_run=dry_run)
+        started = time.perf_counter()
+        for start, end in date_chunks(start_date, end_date, self.batch_days):
+            mapped = self.provider.map_range(start, end)
+            report.days += len(mapped)
+            report.missing += (end - start).days + 1 - len(mapped)
+            with self._session_factory() as db:
+                stored = {s.date: s for s in load_summaries(db, start, end)}
+                changed = [s for s in mapped if stored.get(s.date) != s]
+                if changed and not dry_run:
+                    upsert_summaries(db, changed)
+                    db.commit()
+            report.changed += len(changed)
+            report.changed_dates.extend(s.date for s in changed)
+            logger.info(
+                "Replayed %s..%s: %d days, %d changed", start, end, len(mapped), len(changed)
+            )
+        report.elapsed_s = time.perf_counter() - started
+        return report
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        description="Re-map archived Fitbit responses into fitbit_daily_summary."
+    )
+    parser.add_argument(
+        "--start", type=date.fromisoformat, required=True, help="first day (YYYY-MM-DD)"
+    )
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today() - timedelta(days=1))
+    parser.add_argument(
+        "--archive-dir", default=settings.fitbit_archive_dir, help="default: FITBIT_ARCHIVE_DIR"
+    )
+    parser.add_argument(
+        "--user", default=None, help="Fitbit user id the payloads were archived under"
+    )
+    parser.add_argument("--batch-days", type=int, default=31)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only report which days would change"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=settings.log_level)
+
+    if not args.archive_dir:
+        parser.error("no archive: set FITBIT_ARCHIVE_DIR or pass --archive-dir")
+    provider = ArchiveDailySummaryProvider(
+        FitbitArchive(args.archive_dir),
+        args.user,
+        heartrate_detail_level=settings.fitbit_heartrate_detail_level,
+    )
+    print(
+        ArchiveReplay(provider, batch_days=args.batch_days).run(
+            args.start, args.end, dry_run=args.dry_run
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
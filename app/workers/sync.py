@@ -0,0 +1,228 @@
+"""
+Fitbit daily-data sync worker.
+
+Keeps `fitbit_daily_summary` current so request handlers can read local data
+only (GSI_SUMMARY_SOURCE=local):
+
+- every run re-syncs the most recent FITBIT_SYNC_RECENT_DAYS (today is not final),
+- then backfills history backwards, FITBIT_SYNC_CHUNK_DAYS at a time, down to
+  FITBIT_SYNC_BACKFILL_DAYS ago. The oldest synced date is checkpointed after
+  every chunk, so a restarted worker resumes where it stopped.
+
+Chunks are sized from the remaining Fitbit rate-limit budget, keeping
+FITBIT_SYNC_MIN_REMAINING calls for interactive traffic.
+
+Stored days also update the weekly/monthly score rollups
+(app.gsi.activity_score.rollup).
+
+Run in-process (FITBIT_SYNC_IN_PROCESS=true) or standalone:
+    python -m app.workers.sync                    # loop forever
+    python -m app.workers.sync --once             # one pass, then exit
+    python -m app.workers.sync --rebuild-rollups  # re-score stored days, rebuild rollups, exit
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import session_scope
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.gsi.activity_score.rollup import apply_summaries, rebuild_all
+from app.gsi.activity_score.store import (
+    get_checkpoint,
+    load_summaries,
+    set_checkpoint,
+    upsert_summaries,
+)
+from app.integrations import fitbit_client
+from app.integrations.fitbit_client import RateLimitState
+
+logger = logging.getLogger("app.workers.sync")
+
+BACKFILL_CHECKPOINT = "fitbit_backfill"
+CALLS_PER_DAY = 2  # activity summary + active zone minutes
+
+
+@dataclass
+class SyncReport:
+    recent_days: int = 0
+    backfilled_days: int = 0
+    backfill_complete: bool = False
+    paused_for_rate_limit: bool = False
+
+
+class FitbitSyncWorker:
+    def __init__(
+        self,
+        provider: FitbitDailySummaryProvider,
+        session_factory: Callable[[], AbstractContextManager[Session]] = session_scope,
+        *,
+        recent_days: int = 3,
+        backfill_days: int = 365,
+        chunk_days: int = 7,
+        min_remaining: int = 30,
+        rate_limit: RateLimitState | None = None,
+        today: Callable[[], date] = date.today,
+    ):
+        self.provider = provider
+        self._session_factory = session_factory
+        self.recent_days = max(1, recent_days)
+        self.backfill_days = backfill_days
+        self.chunk_days = max(1, chunk_days)
+        self.min_remaining = min_remaining
+        self._rate_limit = rate_limit or fitbit_client.rate_limit
+        self._today = today
+
+    # -- budget ---------------------------------------------------------
+
+    def budget_days(self) -> int | None:
+        """Days we may fetch before hitting the reserve; None when the quota is unknown."""
+        available = self._rate_limit.available()
+        if available is None:
+            return None
+        return max(0, (available - self.min_remaining) // CALLS_PER_DAY)
+
+    # -- storage --------------------------------------------------------
+
+    def _store(self, summaries: list[FitbitDailySummary], checkpoint: date | None) -> None:
+        with self._session_factory() as db:
+            upsert_summaries(db, summaries)
+            if checkpoint is not None:
+                set_checkpoint(db, BACKFILL_CHECKPOINT, checkpoint)
+            db.commit()
+
+    def _read_checkpoint(self) -> date | None:
+        with self._session_factory() as db:
+            return get_checkpoint(db, BACKFILL_CHECKPOINT)
+
+    async def _fetch_and_store(self, start: date, end: date, checkpoint: date | None) -> int:
+        summaries = await self.provider.get_daily_activity_summaries(start, end)
+        await asyncio.to_thread(self._store, summaries, checkpoint)
+        return len(summaries)
+
+    # -- passes ---------------------------------------------------------
+
+    async def sync_recent(self) -> int:
+        today = self._today()
+        days = self.recent_days
+        budget = self.budget_days()
+        if budget is not None:
+            days = min(days, budget)
+        if days == 0:
+            return 0
+        return await self._fetch_and_store(today - timedelta(days=days - 1), today, None)
+
+    async def next_backfill_range(self) -> tuple[date, date] | None:
+        """Next (start, end) chunk to backfill, or None when history is complete."""
+        today = self._today()
+        oldest_allowed = today - timedelta(days=self.backfill_days)
+        cursor = await asyncio.to_thread(self._read_checkpoint)
+        if cursor is None:
+            cursor = today - timedelta(days=self.recent_days - 1)
+        end = cursor - timedelta(days=1)
+        if end < oldest_allowed:
+            return None
+        start = max(oldest_allowed, end - timedelta(days=self.chunk_days - 1))
+        return start, end
+
+    async def backfill_chunk(self, max_days: int | None = None) -> int:
+        rng = await self.next_backfill_range()
+        if rng is None:
+            return 0
+        start, end = rng
+        if max_days is not None:
+            start = max(start, end - timedelta(days=max_days - 1))
+        return await self._fetch_and_store(start, end, checkpoint=start)
+
+    async def run_once(self) -> SyncReport:
+        report = SyncReport()
+        try:
+            report.recent_days = await self.sync_recent()
+            while True:
+                if await self.next_backfill_range() is None:
+                    report.backfill_complete = True
+                    break
+                budget = self.budget_days()
+                if budget == 0:
+                    report.paused_for_rate_limit = True
+                    break
+                report.backfilled_days += await self.backfill_chunk(max_days=budget)
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code != 429:
+                raise
+            report.paused_for_rate_limit = True
+        logger.info("Fitbit sync pass: %s", report)
+        return report
+
+    async def run_forever(self, interval_s: float) -> None:
+        while True:
+            delay = interval_s
+            try:
+                report = await self.run_once()
+                if report.paused_for_rate_limit:
+                    # Resume as soon as the hourly window resets rather than a full interval later
+                    delay = min(interval_s, self._rate_limit.seconds_until_reset() + 1)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Fitbit sync pass failed")
+            await asyncio.sleep(delay)
+
+
+def build_worker() -> FitbitSyncWorker:
+    from app.gsi.activity_score.deps import get_upstream_daily_summary_provider
+
+    settings = get_settings()
+    return FitbitSyncWorker(
+        get_upstream_daily_summary_provider(),
+        recent_days=settings.fitbit_sync_recent_days,
+        backfill_days=settings.fitbit_sync_backfill_days,
+        chunk_days=settings.fitbit_sync_chunk_days,
+        min_remaining=settings.fitbit_sync_min_remaining,
+    )
+
+
+def rebuild_rollups() -> int:
+    """Score every stored day and rebuild all rollup buckets; returns the bucket count."""
+    with session_scope() as db:
+        apply_summaries(db, load_summaries(db, date.min, date.max))
+        return rebuild_all(db)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Sync Fitbit daily data into the database.")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--interval", type=float, default=settings.fitbit_sync_interval_s)
+    parser.add_argument(
+        "--rebuild-rollups",
+        action="store_true",
+        help="rebuild score rollups from stored days and exit",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=settings.log_level)
+
+    if args.rebuild_rollups:
+        print(f"Rebuilt {rebuild_rollups()} rollup periods")
+        return
+
+    worker = build_worker()
+    if args.once:
+        print(asyncio.run(worker.run_once()))
+    else:
+        asyncio.run(worker.run_forever(args.interval))
+
+
+if __name__ == "__main__":
+    main()
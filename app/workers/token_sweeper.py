@@ -0,0 +1,139 @@
+"""
+Fitbit token refresh sweeper.
+
+Refreshes stored per-user tokens (app.integrations.fitbit_tokens) before they
+expire, so request handlers find a valid access token and never wait on the
+OAuth endpoint:
+
+- each pass pages through tokens expiring within FITBIT_TOKEN_SWEEP_HORIZON_S,
+  FITBIT_TOKEN_SWEEP_BATCH_SIZE at a time, in `expires_at` index order,
+- each batch is refreshed with at most FITBIT_TOKEN_SWEEP_CONCURRENCY calls in
+  flight; one user's failure is counted and logged, never fatal to the pass.
+
+Run in-process (FITBIT_TOKEN_SWEEPER_IN_PROCESS=true) or standalone:
+    python -m app.workers.token_sweeper            # loop forever
+    python -m app.workers.token_sweeper --once     # one pass, then exit
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from app.config import get_settings
+from app.integrations.circuit_breaker import CircuitOpenError
+from app.integrations.fitbit_tokens import FitbitTokenStore, TokenNotFoundError, token_store
+
+logger = logging.getLogger("app.workers.token_sweeper")
+
+
+@dataclass
+class SweepReport:
+    due: int = 0
+    refreshed: int = 0
+    failed: int = 0
+    batches: int = 0
+    stopped_circuit_open: bool = False
+
+
+class TokenSweeper:
+    def __init__(
+        self,
+        store: FitbitTokenStore,
+        *,
+        horizon_s: float = 900.0,
+        batch_size: int = 200,
+        concurrency: int = 8,
+    ):
+        self.store = store
+        self.horizon_s = horizon_s
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+
+    async def _refresh_one(
+        self, user_id: str, limit: asyncio.Semaphore, report: SweepReport
+    ) -> None:
+        async with limit:
+            if report.stopped_circuit_open:
+                return
+            try:
+                # Tokens another instance refreshed since the page was read are skipped
+                await self.store.refresh(
+                    user_id, min_fresh_s=self.horizon_s - self.store.refresh_skew_s
+                )
+            except TokenNotFoundError:
+                return  # disconnected since the page was read
+            except CircuitOpenError:
+                report.stopped_circuit_open = True
+                report.failed += 1
+                return
+            except Exception as exc:
+                report.failed += 1
+                logger.warning("Token refresh for user %s failed: %s", user_id, exc)
+                return
+            report.refreshed += 1
+
+    async def sweep_once(self) -> SweepReport:
+        report = SweepReport()
+        limit = asyncio.Semaphore(self.concurrency)
+        cutoff = self.store.now() + timedelta(seconds=self.horizon_s)
+        after = None
+        while not report.stopped_circuit_open:
+            page = await asyncio.to_thread(
+                self.store.due_for_refresh, cutoff, self.batch_size, after
+            )
+            if not page:
+                break
+            report.batches += 1
+            report.due += len(page)
+            await asyncio.gather(
+                *(self._refresh_one(user_id, limit, report) for _, user_id in page)
+            )
+            if len(page) < self.batch_size:
+                break
+            # Refreshed rows moved past the cutoff; failed ones stay behind the cursor until the next pass
+            after = page[-1]
+        logger.info("Fitbit token sweep: %s", report)
+        return report
+
+    async def run_forever(self, interval_s: float) -> None:
+        while True:
+            try:
+                await self.sweep_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Fitbit token sweep failed")
+            await asyncio.sleep(interval_s)
+
+
+def build_sweeper() -> TokenSweeper:
+    settings = get_settings()
+    return TokenSweeper(
+        token_store,
+        horizon_s=settings.fitbit_token_sweep_horizon_s,
+        batch_size=settings.fitbit_token_sweep_batch_size,
+        concurrency=settings.fitbit_token_sweep_concurrency,
+    )
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Refresh Fitbit tokens that are about to expire.")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--interval", type=float, default=settings.fitbit_token_sweep_interval_s)
+    args = parser.parse_args()
+    logging.basicConfig(level=settings.log_level)
+
+    sweeper = build_sweeper()
+    if args.once:
+        print(asyncio.run(sweeper.sweep_once()))
+    else:
+        asyncio.run(sweeper.run_forever(args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Provider-to-calculator cost of a /gsi/activity-score/range, in-process.
+
+For 365- and 3650-day ranges of mapped Fitbit rows (`map_fitbit_daily_summary`
+output), compares:
+
+- per-day:   FitbitDailySummary(**row) and calculate() per day, each result
+             built and validated as its own nested models,
+- batch:     validate_summaries(rows) and calculate_many(), one TypeAdapter
+             call each,
+- construct: the same with model_construct() for summaries and results
+             (skips validation; for reference only, it is slower on
+             pydantic 2.x, where model_construct is pure Python),
+- score:     calculator.score() only (what rollups and recompute store).
+
+    python scripts/bench_score_batch.py
+    python scripts/bench_score_batch.py --days 365 3650 30000 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("PROJECT_ID", "bench")
+os.environ.setdefault("FITBIT_REDIRECT_URI", "http://localhost/cb")
+
+from app.gsi.activity_score.calculator import ActivityScoreCalculatorV2  # noqa: E402
+from app.gsi.activity_score.fitbit_mapper import map_fitbit_daily_summary  # noqa: E402
+from app.gsi.activity_score.models import (  # noqa: E402
+    ActivityScoreBreakdown,
+    ActivityScoreResult,
+    FitbitDailySummary,
+    validate_summaries,
+)
+
+
+def rows(days: int) -> list[dict[str, Any]]:
+    start = date(2016, 1, 1)
+    return [
+        map_fitbit_daily_summary(
+            {"summary": {"steps": (i * 389) % 16_000, "caloriesOut": 2_000 + i % 700}},
+            {"activities-active-zone-minutes": [{"value": {"activeZoneMinutes": i % 130}}]},
+            start + timedelta(days=i),
+        )
+        for i in range(days)
+    ]
+
+
+def bench(days: int, repeat: int) -> None:
+    calc = ActivityScoreCalculatorV2()
+    mapped = rows(days)
+
+    def per_day() -> list[ActivityScoreResult]:
+        out = []
+        for row in mapped:
+            day = FitbitDailySummary(**row)
+            steps_score, azm_score, _, final = calc._points(day.steps, day.active_zone_minutes)
+            out.append(
+                ActivityScoreResult(
+                    date=day.date,
+                    score=final,
+                    breakdown=ActivityScoreBreakdown(
+                        version=calc.version, steps_points=steps_score, azm_points=azm_score
+                    ),
+                    steps=day.steps,
+                    active_zone_minutes=day.active_zone_minutes,
+                )
+            )
+        return out
+
+    def batch() -> list[ActivityScoreResult]:
+        return calc.calculate_many(validate_summaries(mapped))
+
+    def construct() -> list[ActivityScoreResult]:
+        out = []
+        for row in mapped:
+            day = FitbitDailySummary.model_construct(**row)
+            steps_score, azm_score, _, final = calc._points(day.steps, day.active_zone_minutes)
+            out.append(
+                ActivityScoreResult.model_construct(
+                    date=day.date,
+                    score=float(final),
+                    breakdown=ActivityScoreBreakdown.model_construct(
+                        version=calc.version,
+                        steps_points=float(steps_score),
+                        azm_points=float(azm_score),
+                    ),
+                    steps=day.steps,
+                    active_zone_minutes=day.active_zone_minutes,
+                )
+            )
+        return out
+
+    def score() -> list[float]:
+        return [calc.score(r["steps"], r["active_zone_minutes"]) for r in mapped]
+
+    assert per_day() == batch() == construct()
+    print(f"range, {days} days")
+    baseline = None
+    for label, fn in (
+        ("per-day", per_day),
+        ("batch", batch),
+        ("construct", construct),
+        ("score", score),
+    ):
+        ms = min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+        baseline = baseline or ms
+        print(f"  {label:<10} {ms:8.2f} ms  {baseline / ms:5.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--days", type=int, nargs="+", default=[365, 3650])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    for days in args.days:
+        bench(days, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Serialization cost of high-volume responses, per request, in-process.
+
+Compares, for a 365-day /gsi/activity-score/range and a 10k-row /greetings
+list:
+
+- encoder:   validate against response_model + jsonable_encoder + json.dumps
+             (FastAPI's path before it serialized with pydantic directly),
+- validate:  validate against response_model + pydantic dump_json
+             (FastAPI's path on current releases),
+- fast:      app.responses.model_response (dump_json, no re-validation;
+             ORM rows are validated once with from_attributes).
+
+    python scripts/bench_serialization.py
+    python scripts/bench_serialization.py --days 730 --greetings 50000 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("PROJECT_ID", "bench")
+os.environ.setdefault("FITBIT_REDIRECT_URI", "http://localhost/cb")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.gsi.activity_score.calculator import ActivityScoreCalculatorV2  # noqa: E402
+from app.gsi.activity_score.models import ActivityScoreResult, FitbitDailySummary  # noqa: E402
+from app.models import Greeting  # noqa: E402
+from app.responses import model_response  # noqa: E402
+from app.schemas import GreetingRead  # noqa: E402
+
+
+def scores(days: int) -> list[ActivityScoreResult]:
+    calc = ActivityScoreCalculatorV2()
+    start = date(2024, 1, 1)
+    return [
+        calc.calculate(
+            FitbitDailySummary(
+                date=start + timedelta(days=i),
+                steps=(i * 389) % 16_000,
+                active_zone_minutes=i % 130,
+            )
+        )
+        for i in range(days)
+    ]
+
+
+def greetings(n: int) -> list[Greeting]:
+    now = datetime(2025, 1, 1)
+    return [
+        Greeting(
+            id=uuid.uuid4(),
+            sender=f"sender{i}",
+            recipient=f"recipient{i}",
+            message="hello there",
+            created_at=now,
+        )
+        for i in range(n)
+    ]
+
+
+def bench(name: str, content: object, type_: object, from_attributes: bool, repeat: int) -> None:
+    adapter = TypeAdapter(type_)
+
+    def encoder() -> bytes:
+        valid = adapter.validate_python(content, from_attributes=from_attributes)
+        return json.dumps(jsonable_encoder(valid), separators=(",", ":")).encode()
+
+    def validate() -> bytes:
+        return adapter.dump_json(adapter.validate_python(content, from_attributes=from_attributes))
+
+    def fast() -> bytes:
+        return model_response(content, type_, from_attributes=from_attributes).body
+
+    assert json.loads(encoder()) == json.loads(fast())
+    size_kb = len(fast()) / 1024
+    print(f"{name} ({size_kb:.0f} KiB)")
+    baseline = None
+    for label, fn in (("encoder", encoder), ("validate", validate), ("fast", fast)):
+        ms = min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+        baseline = baseline or ms
+        print(f"  {label:<9} {ms:8.2f} ms  {baseline / ms:5.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--greetings", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    bench(
+        f"range, {args.days} days", scores(args.days), list[ActivityScoreResult], False, args.repeat
+    )
+    bench(
+        f"greetings, {args.greetings} rows",
+        greetings(args.greetings),
+        list[GreetingRead],
+        True,
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Send a signed Fitbit subscription notification to a local subscriber endpoint.
+
+    python scripts/fitbit_notify.py --secret "$FITBIT_CLIENT_SECRET" \\
+        --date 2025-01-15 --date 2025-01-16 --collection activities
+    python scripts/fitbit_notify.py --secret s --print   # just print body and signature
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.integrations.fitbit_subscriptions import sign_payload  # noqa: E402
+
+
+def build_body(collection: str, days: list[str], owner_id: str) -> bytes:
+    payload = [
+        {
+            "collectionType": collection,
+            "date": d,
+            "ownerId": owner_id,
+            "ownerType": "user",
+            "subscriptionId": "1",
+        }
+        for d in days
+    ]
+    return json.dumps(payload).encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/v1/fitbit/webhook")
+    parser.add_argument("--secret", required=True, help="Fitbit client secret used for signing")
+    parser.add_argument("--collection", default="activities")
+    parser.add_argument("--date", action="append", dest="dates", help="YYYY-MM-DD (repeatable)")
+    parser.add_argument("--owner-id", default="EMU0001")
+    parser.add_argument("--print", action="store_true", help="print instead of sending")
+    args = parser.parse_args()
+
+    body = build_body(args.collection, args.dates or [date.today().isoformat()], args.owner_id)
+    signature = sign_payload(body, args.secret)
+    if args.print:
+        print(body.decode())
+        print(f"X-Fitbit-Signature: {signature}")
+        return
+    resp = httpx.post(
+        args.url,
+        content=body,
+        headers={"Content-Type": "application/json", "X-Fitbit-Signature": signature},
+    )
+    print(resp.status_code, resp.text)
+
+
+if __name__ == "__main__":
+    main()
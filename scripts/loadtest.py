@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+"""
+Closed-loop load driver for the API.
+
+Each worker picks a route from the scenario mix, fires it, records latency and
+loops until the duration elapses. Prints throughput and latency percentiles per
+route group.
+
+    python scripts/loadtest.py --base-url http://127.0.0.1:8000 --concurrency 32 --duration 30
+    python scripts/loadtest.py --routes activity-day,greetings-list
+    python scripts/loadtest.py --routes greetings-list --dedicated activity-range=64
+
+`--dedicated route=N` adds N extra workers that only hit that route, e.g. to
+saturate an expensive route while measuring the latency of cheap ones. To
+judge admission control, measure a cheap route that goes through a gate
+(greetings-list); `info` is on ADMISSION_CRITICAL_PATHS and never queues.
+
+Start the API against the emulators first (see README "Load testing").
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import httpx
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: dict[int, int] = field(default_factory=dict)
+
+    @property
+    def shed(self) -> int:
+        return self.statuses.get(503, 0)
+
+
+def _random_day(rng: random.Random, span_days: int) -> date:
+    return date.today() - timedelta(days=rng.randint(1, span_days))
+
+
+def _week_ending(end: date) -> str:
+    return f"/api/v1/gsi/activity-score/range?start_date={end - timedelta(days=6)}&end_date={end}"
+
+
+# name -> (method, path factory, json body factory)
+ROUTES: dict[str, tuple[str, Callable[[random.Random, int], str], Callable[[], dict] | None]] = {
+    "activity-day": (
+        "GET",
+        lambda rng, span: f"/api/v1/gsi/activity-score/day/{_random_day(rng, span)}",
+        None,
+    ),
+    "activity-range": (
+        "GET",
+        lambda rng, span: _week_ending(_random_day(rng, span)),
+        None,
+    ),
+    "fitbit-profile": ("GET", lambda rng, span: "/api/v1/fitbit/profile", None),
+    "fitbit-daily-summary": (
+        "GET",
+        lambda rng, span: f"/api/v1/fitbit/daily-summary?day={_random_day(rng, span)}",
+        None,
+    ),
+    "greetings-list": ("GET", lambda rng, span: "/api/v1/greetings/", None),
+    "greetings-create": (
+        "POST",
+        lambda rng, span: "/api/v1/greetings/",
+        lambda: {"sender": "load", "recipient": "test", "message": "hello"},
+    ),
+    # Critical path: bypasses admission control, so it only shows raw event-loop latency
+    "info": ("GET", lambda rng, span: "/info", None),
+}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    routes: list[str],
+    stats: dict[str, RouteStats],
+    deadline: float,
+    rng: random.Random,
+    span_days: int,
+    honor_retry_after: bool = True,
+) -> None:
+    while time.perf_counter() < deadline:
+        name = rng.choice(routes)
+        method, path_for, body_for = ROUTES[name]
+        started = time.perf_counter()
+        retry_after = 0.0
+        try:
+            resp = await client.request(
+                method, path_for(rng, span_days), json=body_for() if body_for else None
+            )
+            status = resp.status_code
+            if status == 503 and honor_retry_after:
+                retry_after = float(resp.headers.get("Retry-After", "0") or 0)
+        except httpx.HTTPError:
+            status = 0
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        s = stats[name]
+        s.latencies_ms.append(elapsed_ms)
+        s.statuses[status] = s.statuses.get(status, 0) + 1
+        if status == 0 or status >= 500:
+            s.errors += 1
+        if retry_after:
+            # Back off like a well-behaved client instead of hammering a shedding server
+            await asyncio.sleep(min(retry_after, max(0.0, deadline - time.perf_counter())))
+
+
+def report(stats: dict[str, RouteStats], elapsed_s: float) -> str:
+    header = f"{'route':<22}{'reqs':>8}{'err':>6}{'shed':>6}{'rps':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+    lines = [header, "-" * len(header)]
+    total = 0
+    for name, s in sorted(stats.items()):
+        lat = sorted(s.latencies_ms)
+        total += len(lat)
+        lines.append(
+            f"{name:<22}{len(lat):>8}{s.errors:>6}{s.shed:>6}{len(lat) / elapsed_s:>9.1f}"
+            f"{percentile(lat, 50):>9.1f}{percentile(lat, 90):>9.1f}"
+            f"{percentile(lat, 99):>9.1f}{(lat[-1] if lat else 0):>9.1f}"
+        )
+    lines.append("-" * len(header))
+    lines.append(
+        f"total {total} requests in {elapsed_s:.1f}s ({total / elapsed_s:.1f} req/s), latency in ms"
+    )
+    return "\n".join(lines)
+
+
+def _parse_dedicated(spec: str) -> dict[str, int]:
+    dedicated: dict[str, int] = {}
+    for item in (i.strip() for i in spec.split(",")):
+        if item:
+            name, _, workers = item.partition("=")
+            dedicated[name.strip()] = int(workers or 1)
+    return dedicated
+
+
+async def run(args: argparse.Namespace) -> dict[str, RouteStats]:
+    routes = [r.strip() for r in args.routes.split(",") if r.strip()]
+    dedicated = _parse_dedicated(args.dedicated)
+    unknown = [r for r in [*routes, *dedicated] if r not in ROUTES]
+    if unknown:
+        raise SystemExit(f"Unknown routes: {', '.join(unknown)} (known: {', '.join(ROUTES)})")
+
+    stats = {name: RouteStats() for name in [*routes, *dedicated]}
+    workers = [routes] * args.concurrency + [
+        [name] for name, n in dedicated.items() for _ in range(n)
+    ]
+    limits = httpx.Limits(max_connections=len(workers), max_keepalive_connections=len(workers))
+    async with httpx.AsyncClient(
+        base_url=args.base_url, timeout=args.timeout, limits=limits
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                _worker(
+                    client,
+                    mix,
+                    stats,
+                    deadline,
+                    random.Random(args.seed + i),
+                    args.span_days,
+                    not args.no_retry_after,
+                )
+                for i, mix in enumerate(workers)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    print(report(stats, elapsed))
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout (s)")
+    parser.add_argument(
+        "--routes", default="activity-day,activity-range,fitbit-daily-summary,greetings-list"
+    )
+    parser.add_argument(
+        "--dedicated", default="", help="extra single-route workers, e.g. activity-range=48"
+    )
+    parser.add_argument("--no-retry-after", action="store_true", help="retry 503s immediately")
+    parser.add_argument(
+        "--span-days", type=int, default=30, help="pick dates within the last N days"
+    )
+    parser.add_argument("--seed", type=int, default=1337)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
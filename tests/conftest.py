@@ -1,7 +1,9 @@
+import os
 import random
 import socket as _socket
 import sys
 import time
+from contextlib import contextmanager
 from pathlib import Path
 
 import pytest
@@ -12,7 +14,18 @@ from sqlalchemy.orm import sessionmaker
 # Ensure 'app' is importable in CI without package install
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from app.database import get_db
+# Module-level settings are read at import time; keep the app off real GCP/Fitbit
+os.environ.setdefault("PROJECT_ID", "test-project")
+os.environ.setdefault("FITBIT_REDIRECT_URI", "http://test/api/v1/fitbit/auth/callback")
+os.environ.setdefault("SECRET_STORE_BACKEND", "memory")
+# Fixed test-only Fernet key for EncryptedString columns
+os.environ.setdefault("TOKEN_ENCRYPTION_KEYS", "gBIFS8z854uZSJelU-1v_tPuscNgBNVNT2SUV-dUpRE=")
+
+from app.database import get_db, get_read_db
+from app.db_instrumentation import instrument_engine, track_queries
+from app.greeting_cache import greeting_cache
+from app.integrations.fitbit_client import breakers as fitbit_breakers
+from app.integrations.fitbit_daily import section_cache as fitbit_section_cache
 from app.main import app
 from app.models import Base
 
@@ -28,6 +41,27 @@ def _hermetic_env(monkeypatch):
     random.seed(1337)
 
 
+@pytest.fixture(autouse=True)
+def _reset_fitbit_breakers():
+    # Upstream failures in one test must not leave a circuit open for the next
+    yield
+    fitbit_breakers.reset()
+
+
+@pytest.fixture(autouse=True)
+def _clear_fitbit_section_cache():
+    # Score providers share raw Fitbit payloads through this cache; keep them per test
+    yield
+    fitbit_section_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_greeting_cache():
+    # Test rows are rolled back; their cached bodies must not outlive them
+    yield
+    greeting_cache.clear()
+
+
 @pytest.fixture(autouse=True)
 def _block_network(monkeypatch):
     """
@@ -55,6 +89,7 @@ def engine():
         future=True,
         connect_args={"check_same_thread": False},
     )
+    instrument_engine(engine)
     with engine.begin() as conn:
         Base.metadata.create_all(conn)
     return engine
@@ -90,8 +125,27 @@ def _override_db_dependency(db_session):
             pass
 
     app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_read_db] = _get_db
     yield
     app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_read_db, None)
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Guard against N+1 regressions:
+        with assert_max_queries(1):
+            await async_client.get("/api/v1/greetings/")
+    """
+
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= limit, f"expected at most {limit} queries, got {stats.count}"
+
+    return _assert_max_queries
 
 
 @pytest.fixture
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.admission import AdmissionMiddleware
+from app.gsi.activity_score.deps import get_fitbit_daily_summary_provider
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.main import admission_policy, app
+
+RANGE = "/api/v1/gsi/activity-score/range"
+PARAMS = {"start_date": "2025-01-01", "end_date": "2025-01-01"}
+
+
+class BlockingProvider(FitbitDailySummaryProvider):
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+
+    async def get_daily_activity_summary(self, date):
+        raise NotImplementedError
+
+    async def get_daily_activity_summaries(self, start_date, end_date):
+        await self.release.wait()
+        return [FitbitDailySummary(date=date(2025, 1, 1), steps=1)]
+
+
+@pytest.fixture
+async def async_client():
+    # Admission is off by default, so wrap the app in it explicitly
+    transport = ASGITransport(app=AdmissionMiddleware(app, policy=admission_policy))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.anyio
+async def test_saturated_expensive_route_sheds_without_blocking_cheap_routes(
+    async_client, monkeypatch
+):
+    gate = admission_policy.gates["expensive"]
+    monkeypatch.setattr(gate, "limit", 1)
+    monkeypatch.setattr(gate, "max_queue", 1)
+    provider = BlockingProvider()
+    app.dependency_overrides[get_fitbit_daily_summary_provider] = lambda: provider
+    try:
+        running = asyncio.create_task(async_client.get(RANGE, params=PARAMS))
+        queued = asyncio.create_task(async_client.get(RANGE, params=PARAMS))
+        while gate.snapshot()["queued_now"] < 1:
+            await asyncio.sleep(0.001)
+
+        shed = await async_client.get(RANGE, params=PARAMS)
+        assert shed.status_code == 503
+        assert int(shed.headers["Retry-After"]) >= 1
+
+        # Cheap routes have their own capacity
+        assert (await asyncio.wait_for(async_client.get("/info"), 1)).status_code == 200
+        assert (
+            await asyncio.wait_for(async_client.get("/api/v1/greetings/"), 1)
+        ).status_code == 200
+
+        provider.release.set()
+        assert (await running).status_code == 200
+        assert (await queued).status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_fitbit_daily_summary_provider, None)
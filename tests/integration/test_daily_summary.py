@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+
+import httpx
+import pytest
+
+from app.api.v1 import fitbit as fitbit_api
+from app.config import get_settings
+from app.integrations.fitbit_client import FitbitClient
+from app.integrations.fitbit_daily import _invalidator, section_cache
+
+endpoint = "/api/v1/fitbit/daily-summary"
+PAST_DAY = date.today() - timedelta(days=30)
+
+
+class Upstream:
+    def __init__(self) -> None:
+        self.hits: list[str] = []
+        self.tokens = 0
+        self.slow: set[str] = set()
+        self.failing: set[str] = set()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        section = next(s for s in ("sleep", "heart", "activities") if s in request.url.path)
+        self.hits.append(section)
+        if section in self.slow:
+            await asyncio.sleep(1)
+        if section in self.failing:
+            return httpx.Response(503)
+        return httpx.Response(200, json={section: request.url.path})
+
+    async def access_token(self) -> str:
+        self.tokens += 1
+        return "token"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    up = Upstream()
+    client = FitbitClient(
+        "cid", "http://test/cb", api_base="http://fitbit", transport=httpx.MockTransport(up.handler)
+    )
+    monkeypatch.setattr(fitbit_api, "_get_fitbit_client", lambda: client)
+    monkeypatch.setattr(fitbit_api, "_get_fresh_access_token", up.access_token)
+    section_cache.clear()
+    yield up
+    section_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_include_selects_sections(async_client, upstream):
+    resp = await async_client.get(
+        endpoint, params={"day": PAST_DAY.isoformat(), "include": "sleep"}
+    )
+    assert resp.status_code == 200
+    assert set(resp.json()) == {"date", "sleep"}
+    assert upstream.hits == ["sleep"]
+
+    resp = await async_client.get(endpoint, params={"include": "sleep,steps"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_failed_and_slow_sections_give_partial_results(async_client, upstream, monkeypatch):
+    monkeypatch.setattr(get_settings(), "fitbit_section_timeout_s", 0.05)
+    upstream.slow.add("heart")
+    upstream.failing.add("sleep")
+
+    resp = await async_client.get(endpoint, params={"day": PAST_DAY.isoformat()})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert "activity" in body
+    assert body["errors"] == {"sleep": "upstream status 503", "heartrate": "timeout"}
+
+    upstream.failing.add("activities")
+    resp = await async_client.get(
+        endpoint, params={"day": PAST_DAY.isoformat(), "include": "sleep"}
+    )
+    assert resp.status_code == 502
+
+
+@pytest.mark.anyio
+async def test_finalized_days_are_never_refetched(async_client, upstream):
+    params = {"day": PAST_DAY.isoformat()}
+    first = (await async_client.get(endpoint, params=params)).json()
+    second = (await async_client.get(endpoint, params=params)).json()
+
+    assert first == second
+    assert sorted(upstream.hits) == ["activities", "heart", "sleep"]
+    assert upstream.tokens == 1  # fully cached responses skip the token refresh
+
+    # A subscription notification for the day drops only the affected sections
+    await _invalidator("sleep")([PAST_DAY])
+    await async_client.get(endpoint, params=params)
+    assert sorted(upstream.hits) == ["activities", "heart", "sleep", "sleep"]
+
+
+@pytest.mark.anyio
+async def test_zero_ttl_disables_the_cache_for_finalized_days_too(
+    async_client, upstream, monkeypatch
+):
+    monkeypatch.setattr(get_settings(), "fitbit_section_cache_ttl_s", 0)
+    params = {"day": PAST_DAY.isoformat(), "include": "sleep"}
+    await async_client.get(endpoint, params=params)
+    await async_client.get(endpoint, params=params)
+
+    assert upstream.hits == ["sleep", "sleep"]
+    assert len(section_cache) == 0
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+
+import httpx
+import pytest
+
+from app import deadline
+from app.deadline import Deadline, DeadlineMiddleware
+from app.gsi.activity_score.deps import get_fitbit_daily_summary_provider
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.integrations.fitbit_client import FitbitClient
+from app.main import app
+
+RANGE = "/api/v1/gsi/activity-score/range"
+PARAMS = {"start_date": "2025-01-01", "end_date": "2025-01-03"}
+
+
+class SlowProvider(FitbitDailySummaryProvider):
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+        self.cancelled = False
+        self.remaining: float | None = None
+
+    async def get_daily_activity_summary(self, date):
+        raise NotImplementedError
+
+    async def get_daily_activity_summaries(self, start_date, end_date):
+        self.remaining = deadline.remaining()
+        try:
+            await asyncio.sleep(self.delay_s)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return [FitbitDailySummary(date=start_date, steps=1)]
+
+
+@pytest.fixture
+def provider():
+    p = SlowProvider()
+    app.dependency_overrides[get_fitbit_daily_summary_provider] = lambda: p
+    yield p
+    app.dependency_overrides.pop(get_fitbit_daily_summary_provider, None)
+
+
+@pytest.mark.anyio
+async def test_header_deadline_cancels_work_and_returns_504(async_client, provider):
+    provider.delay_s = 5
+    resp = await async_client.get(RANGE, params=PARAMS, headers={"X-Request-Timeout-Ms": "50"})
+    assert resp.status_code == 504
+    assert provider.cancelled
+
+
+@pytest.mark.anyio
+async def test_route_default_applies_unless_client_sets_deadline(async_client, provider):
+    await async_client.get(RANGE, params=PARAMS)
+    assert provider.remaining is not None and provider.remaining <= 20
+
+    await async_client.get(RANGE, params=PARAMS, headers={"X-Request-Timeout-Ms": "45000"})
+    assert 20 < provider.remaining <= 45
+
+    # Clients cannot extend past REQUEST_DEADLINE_MAX_S
+    await async_client.get(RANGE, params=PARAMS, headers={"X-Request-Timeout-Ms": "600000"})
+    assert provider.remaining <= 60
+
+
+@pytest.mark.anyio
+async def test_client_disconnect_cancels_the_request():
+    started = asyncio.Event()
+    cancelled = False
+
+    async def slow_app(scope, receive, send):
+        nonlocal cancelled
+        started.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await started.wait()
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    before = deadline.stats.client_disconnects
+    middleware = DeadlineMiddleware(slow_app, default_s=30, max_s=60)
+    await asyncio.wait_for(middleware({"type": "http", "headers": []}, receive, send), timeout=1)
+
+    assert cancelled
+    assert sent == []
+    assert deadline.stats.client_disconnects == before + 1
+
+
+@pytest.mark.anyio
+async def test_request_body_is_streamed_not_buffered():
+    first_chunk_read = asyncio.Event()
+    received = []
+
+    async def echo_app(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message["body"])
+            first_chunk_read.set()
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"".join(received)})
+
+    chunks = [b"a", b"b"]
+
+    async def receive():
+        if len(chunks) == 1:
+            # The middleware must hand the app the first chunk before asking for more
+            await first_chunk_read.wait()
+        if chunks:
+            body = chunks.pop(0)
+            return {"type": "http.request", "body": body, "more_body": bool(chunks)}
+        await asyncio.sleep(5)
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = DeadlineMiddleware(echo_app, default_s=30, max_s=60)
+    await asyncio.wait_for(middleware({"type": "http", "headers": []}, receive, send), timeout=1)
+
+    assert received == [b"a", b"b"]
+    assert sent[-1]["body"] == b"ab"
+
+
+@pytest.mark.anyio
+async def test_fitbit_timeout_is_capped_by_deadline():
+    seen = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.update(request.extensions["timeout"])
+        return httpx.Response(
+            200, json={"access_token": "a", "refresh_token": "r", "expires_in": 3600}
+        )
+
+    client = FitbitClient(
+        "cid", "http://test/cb", api_base="http://fitbit", transport=httpx.MockTransport(handler)
+    )
+    token = deadline._current.set(Deadline(2))
+    try:
+        await client.refresh_tokens("refresh")
+        assert 0 < seen["read"] <= 2
+
+        deadline.current().tighten(-1)
+        with pytest.raises(deadline.DeadlineExceeded):
+            await client.get_sleep("token", date(2025, 1, 15))
+    finally:
+        deadline._current.reset(token)
+
+
+@pytest.mark.anyio
+async def test_coalesced_fitbit_call_is_not_bound_by_the_first_callers_deadline():
+    timeouts = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"]["read"])
+        await asyncio.sleep(0.3)
+        return httpx.Response(200, json={"summary": {"steps": 1}})
+
+    client = FitbitClient(
+        "cid", "http://test/cb", api_base="http://fitbit", transport=httpx.MockTransport(handler)
+    )
+
+    async def fetch(budget_s: float):
+        deadline._current.set(Deadline(budget_s))
+        return await client.get_daily_activity_summary("token", date(2025, 1, 15))
+
+    leader = asyncio.create_task(fetch(0.1))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(fetch(10))
+
+    with pytest.raises(deadline.DeadlineExceeded):
+        await leader
+    assert await follower == {"summary": {"steps": 1}}
+    # One upstream call, with the full Fitbit timeout rather than the leader's 0.1 s
+    assert len(timeouts) == 1 and timeouts[0] > 1
+
+
+@pytest.mark.anyio
+async def test_streamed_export_chunks_get_their_own_deadline(async_client, provider):
+    # The client's 50 ms only covers the headers; each chunk fetch gets GSI_RANGE_DEADLINE_S
+    resp = await async_client.get(
+        "/api/v1/gsi/activity-score/export", params=PARAMS, headers={"X-Request-Timeout-Ms": "50"}
+    )
+    assert resp.status_code == 200
+    assert 1 < provider.remaining <= 20
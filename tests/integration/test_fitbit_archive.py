@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+from datetime import date, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.gsi.activity_score.provider import SummaryNotAvailableError
+from app.gsi.activity_score.provider_archive_impl import ArchiveDailySummaryProvider
+from app.gsi.activity_score.store import load_summaries
+from app.integrations import fitbit_client
+from app.integrations.emulators.fitbit import EmulatorConfig, create_app
+from app.integrations.fitbit_archive import FitbitArchive
+from app.integrations.fitbit_client import ACTIVITY_SUMMARY_PATH, FitbitClient
+from app.models import Base
+from app.workers.replay import ArchiveReplay
+
+DAY = date(2025, 1, 15)
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    def __init__(self) -> None:
+        self.inner = httpx.ASGITransport(app=create_app(EmulatorConfig(seed=1)))
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        return await self.inner.handle_async_request(request)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return FitbitArchive(tmp_path / "archive")
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'replay.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, future=True, expire_on_commit=False)
+
+
+def test_newest_version_of_a_day_wins_and_survives_reopening(archive):
+    path = f"/1/user/-/activities/date/{DAY.isoformat()}.json"
+    assert archive.append("u1", path, b'{"v": 1}')
+    assert archive.append("u1", path, b'{"v": 2}')
+    assert archive.append("u2", path, b'{"v": 3}')
+    assert not archive.append("u1", "/1/user/-/profile.json", b"{}")
+
+    assert archive.load("u1", ACTIVITY_SUMMARY_PATH, DAY) == {"v": 2}
+    assert archive.load("u2", ACTIVITY_SUMMARY_PATH, DAY) == {"v": 3}
+    assert archive.get("u1", ACTIVITY_SUMMARY_PATH, DAY + timedelta(days=1)) is None
+
+    reopened = FitbitArchive(archive.root)
+    assert reopened.load("u1", ACTIVITY_SUMMARY_PATH, DAY) == {"v": 2}
+
+    # An appender in another process is picked up on the next lookup
+    archive.append("u1", path, b'{"v": 4}')
+    assert reopened.load("u1", ACTIVITY_SUMMARY_PATH, DAY) == {"v": 4}
+
+
+def test_torn_index_entry_is_ignored_then_dropped(archive):
+    path = f"/1/user/-/activities/date/{DAY.isoformat()}.json"
+    archive.append(None, path, b'{"v": 1}')
+    idx = archive.root / "2025-01.idx"
+    with idx.open("ab") as f:
+        f.write(b"\x00" * 7)  # a writer crashed mid-entry
+
+    assert FitbitArchive(archive.root).load(None, ACTIVITY_SUMMARY_PATH, DAY) == {"v": 1}
+    archive.append(None, path, b'{"v": 2}')
+    assert FitbitArchive(archive.root).load(None, ACTIVITY_SUMMARY_PATH, DAY) == {"v": 2}
+
+
+@pytest.mark.anyio
+async def test_replay_remaps_archived_days_without_calling_fitbit(archive, local_db, monkeypatch):
+    monkeypatch.setattr(fitbit_client, "get_archive", lambda: archive)
+    transport = CountingTransport()
+    client = FitbitClient(
+        client_id="emu",
+        redirect_uri="http://test/cb",
+        api_base="http://emu",
+        transport=transport,
+        user_id="u1",
+    )
+    days = [DAY + timedelta(days=i) for i in range(3)]
+    fetched = {}
+    for day in days:
+        fetched[day] = await client.get_daily_activity_summary("emulator-token", day)
+        await client.get_active_zone_minutes("emulator-token", day)
+    assert archive.load("u1", ACTIVITY_SUMMARY_PATH, DAY) == fetched[DAY]
+
+    calls = transport.calls
+    provider = ArchiveDailySummaryProvider(archive, "u1")
+    report = ArchiveReplay(provider, local_db).run(
+        days[0], days[-1] + timedelta(days=1), dry_run=True
+    )
+    assert (report.days, report.missing, report.changed) == (3, 1, 3)
+    with local_db() as db:
+        assert load_summaries(db, days[0], days[-1]) == []
+
+    report = ArchiveReplay(provider, local_db, batch_days=2).run(days[0], days[-1])
+    assert report.changed == 3
+    with local_db() as db:
+        stored = load_summaries(db, days[0], days[-1])
+    assert [s.steps for s in stored] == [fetched[d]["summary"]["steps"] for d in days]
+
+    # Nothing changed since: a second replay writes nothing
+    assert ArchiveReplay(provider, local_db).run(days[0], days[-1]).changed == 0
+    with pytest.raises(SummaryNotAvailableError):
+        await provider.get_daily_activity_summary(days[-1] + timedelta(days=1))
+    assert transport.calls == calls
+
+
+def test_archived_bodies_are_stored_compressed(archive):
+    body = json.dumps(
+        {"activities-heart-intraday": {"dataset": [{"time": "00:00:00", "value": 60}] * 5000}}
+    ).encode()
+    archive.append(None, f"/1/user/-/activities/heart/date/{DAY.isoformat()}/1d/1sec.json", body)
+    assert (archive.root / "2025-01.seg").stat().st_size < len(body) // 10
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from datetime import date
+
+import httpx
+import pytest
+
+from app.gsi.activity_score.fitbit_mapper import map_fitbit_daily_summary
+from app.integrations.emulators.fitbit import EmulatorConfig, create_app
+from app.integrations.emulators.secret_manager import FakeSecretManagerClient
+from app.integrations.fitbit_client import FitbitClient
+from app.integrations.secret_store import SecretStore
+
+DAY = date(2025, 1, 15)
+
+
+def make_client(config: EmulatorConfig | None = None) -> FitbitClient:
+    transport = httpx.ASGITransport(app=create_app(config or EmulatorConfig(seed=1)))
+    return FitbitClient(
+        client_id="emulator-client",
+        redirect_uri="http://test/callback",
+        api_base="http://fitbit-emulator",
+        transport=transport,
+    )
+
+
+@pytest.mark.anyio
+async def test_refresh_and_fetch_daily_resources():
+    client = make_client()
+    tokens = await client.refresh_tokens("any-refresh-token")
+    assert tokens.access_token and tokens.refresh_token
+    assert tokens.expires_in > 0
+
+    summary = await client.get_daily_activity_summary(tokens.access_token, DAY)
+    azm = await client.get_active_zone_minutes(tokens.access_token, DAY)
+    mapped = map_fitbit_daily_summary(summary, azm, DAY)
+    assert mapped["steps"] > 0
+    assert mapped["active_zone_minutes"] >= 0
+
+    # Deterministic per date, so the mapper sees the same values every time
+    again = await client.get_daily_activity_summary(tokens.access_token, DAY)
+    assert again["summary"]["steps"] == summary["summary"]["steps"]
+
+    sleep = await client.get_sleep(tokens.access_token, DAY)
+    heart = await client.get_heartrate_day(tokens.access_token, DAY)
+    assert sleep["sleep"][0]["dateOfSleep"] == DAY.isoformat()
+    assert heart["activities-heart"][0]["dateTime"] == DAY.isoformat()
+
+
+@pytest.mark.anyio
+async def test_rate_limit_headers_and_429():
+    transport = httpx.ASGITransport(app=create_app(EmulatorConfig(rate_limit=2, seed=1)))
+    headers = {"Authorization": "Bearer t"}
+    path = f"/1/user/-/activities/date/{DAY.isoformat()}.json"
+    async with httpx.AsyncClient(transport=transport, base_url="http://fitbit-emulator") as http:
+        first = await http.get(path, headers=headers)
+        second = await http.get(path, headers=headers)
+        third = await http.get(path, headers=headers)
+
+    assert first.headers["Fitbit-Rate-Limit-Remaining"] == "1"
+    assert second.headers["Fitbit-Rate-Limit-Remaining"] == "0"
+    assert third.status_code == 429
+    assert "Retry-After" in third.headers
+
+
+@pytest.mark.anyio
+async def test_error_rate_and_auth_are_emulated():
+    client = make_client(EmulatorConfig(error_rate=1.0, seed=1))
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        await client.get_profile("token")
+    assert exc.value.response.status_code >= 500
+
+    with pytest.raises(httpx.HTTPStatusError) as exc:
+        await make_client().get_profile("")
+    assert exc.value.response.status_code == 401
+
+
+def test_fake_secret_manager_versions():
+    store = SecretStore("proj", client=FakeSecretManagerClient({"fitbit_client_id": "abc"}))
+    assert store.read("fitbit_client_id") == "abc"
+
+    store.write_new_version("fitbit_refresh_token", "r1")
+    store.write_new_version("fitbit_refresh_token", "r2")
+    assert store.read("fitbit_refresh_token") == "r2"
+    assert store.read("fitbit_refresh_token", version_id="1") == "r1"
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import httpx
+import pytest
+
+from app.api.v1 import fitbit as fitbit_api
+from app.cache import TTLCache
+from app.config import get_settings
+from app.gsi.activity_score.cache import CachingDailySummaryProvider
+from app.gsi.activity_score.deps import get_fitbit_daily_summary_provider
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.integrations.fitbit_client import FitbitClient, breakers
+from app.integrations.fitbit_daily import section_cache
+from app.main import app
+
+DAY = date(2025, 1, 15)
+
+
+class FlakyUpstream(FitbitDailySummaryProvider):
+    def __init__(self) -> None:
+        self.down = False
+
+    async def get_daily_activity_summary(self, date):
+        return (await self.get_daily_activity_summaries(date, date))[0]
+
+    async def get_daily_activity_summaries(self, start_date, end_date):
+        if self.down:
+            raise httpx.ConnectTimeout("fitbit unreachable")
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        return [FitbitDailySummary(date=d, steps=10_000, active_zone_minutes=60) for d in days]
+
+
+@pytest.mark.anyio
+async def test_activity_score_serves_stale_during_outage(async_client):
+    clock = [0.0]
+    cache: TTLCache[date, FitbitDailySummary] = TTLCache(
+        ttl_s=60, clock=lambda: clock[0], keep_stale=True
+    )
+    upstream = FlakyUpstream()
+    app.dependency_overrides[get_fitbit_daily_summary_provider] = (
+        lambda: CachingDailySummaryProvider(upstream, cache)
+    )
+    try:
+        fresh = (
+            await async_client.get(
+                f"/api/v1/gsi/activity-score/day/{DAY}", params={"prefetch": False}
+            )
+        ).json()
+        assert fresh["stale"] is False
+
+        clock[0] = 120
+        upstream.down = True
+        resp = await async_client.get(
+            f"/api/v1/gsi/activity-score/day/{DAY}", params={"prefetch": False}
+        )
+        assert resp.status_code == 200
+        assert resp.json()["stale"] is True
+        assert resp.json()["score"] == fresh["score"]
+
+        params = {"start_date": (DAY - timedelta(days=1)).isoformat(), "end_date": DAY.isoformat()}
+        with pytest.raises(httpx.ConnectTimeout):
+            # No last known value for D-1: nothing to fall back to
+            await async_client.get("/api/v1/gsi/activity-score/range", params=params)
+    finally:
+        app.dependency_overrides.pop(get_fitbit_daily_summary_provider, None)
+
+
+@pytest.mark.anyio
+async def test_open_circuit_fails_fast_and_daily_summary_goes_stale(async_client, monkeypatch):
+    hits = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal hits
+        hits += 1
+        return httpx.Response(503)
+
+    client = FitbitClient(
+        "cid", "http://test/cb", api_base="http://fitbit", transport=httpx.MockTransport(handler)
+    )
+
+    async def token() -> str:
+        return "token"
+
+    monkeypatch.setattr(fitbit_api, "_get_fitbit_client", lambda: client)
+    monkeypatch.setattr(fitbit_api, "_get_fresh_access_token", token)
+    section_cache.clear()
+    section_cache.set(("sleep", DAY), {"sleep": "last known"}, ttl_s=-1)  # already expired
+
+    threshold = get_settings().fitbit_breaker_failure_threshold
+    for _ in range(threshold):
+        with pytest.raises(httpx.HTTPStatusError):
+            await async_client.get("/api/v1/fitbit/profile")
+    assert breakers.get("profile").state == "open"
+
+    before = hits
+    resp = await async_client.get("/api/v1/fitbit/profile")
+    assert resp.status_code == 503
+    assert "Retry-After" in resp.headers
+    assert hits == before
+
+    resp = await async_client.get(
+        "/api/v1/fitbit/daily-summary", params={"day": DAY.isoformat(), "include": "sleep"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["sleep"] == {"sleep": "last known"}
+    assert resp.json()["stale"] == ["sleep"]
+    section_cache.clear()
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date
+
+import httpx
+import pytest
+
+from app import deadline
+from app.config import get_settings
+from app.gsi.activity_score import deps
+from app.gsi.activity_score.cache import refresh_activity_days, summary_cache
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.integrations.emulators.secret_manager import get_fake_secret_manager
+from app.integrations.fitbit_subscriptions import (
+    FitbitNotification,
+    refresh_queue,
+    sign_payload,
+)
+
+endpoint = "/api/v1/fitbit/webhook"
+CLIENT_SECRET = "webhook-test-secret"
+
+
+@pytest.fixture
+def signed_body():
+    get_fake_secret_manager().add_secret_version(
+        {
+            "parent": "projects/p/secrets/fitbit_client_secret",
+            "payload": {"data": CLIENT_SECRET.encode()},
+        }
+    )
+
+    def _make(*items: tuple[str, str]) -> tuple[bytes, dict[str, str]]:
+        body = json.dumps(
+            [
+                {
+                    "collectionType": c,
+                    "date": d,
+                    "ownerId": "EMU0001",
+                    "ownerType": "user",
+                    "subscriptionId": "1",
+                }
+                for c, d in items
+            ]
+        ).encode()
+        return body, {
+            "X-Fitbit-Signature": sign_payload(body, CLIENT_SECRET),
+            "Content-Type": "application/json",
+        }
+
+    return _make
+
+
+@pytest.fixture
+async def recorded(monkeypatch):
+    calls: list[tuple[str, list[date]]] = []
+
+    def recorder(collection):
+        async def _handler(days):
+            calls.append((collection, days))
+
+        return _handler
+
+    monkeypatch.setattr(
+        refresh_queue,
+        "_handlers",
+        {"activities": [recorder("activities")], "sleep": [recorder("sleep")]},
+    )
+    yield calls
+    await refresh_queue.stop()
+
+
+@pytest.mark.anyio
+async def test_verification_handshake(async_client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "fitbit_subscriber_verification_code", "correct-code")
+    assert (await async_client.get(endpoint, params={"verify": "correct-code"})).status_code == 204
+    assert (await async_client.get(endpoint, params={"verify": "wrong"})).status_code == 404
+
+
+@pytest.mark.anyio
+async def test_bad_signature_is_rejected(async_client, signed_body, recorded):
+    body, headers = signed_body(("activities", "2025-01-15"))
+    headers["X-Fitbit-Signature"] = sign_payload(body, "not-the-secret")
+    resp = await async_client.post(endpoint, content=body, headers=headers)
+    assert resp.status_code == 404
+    await refresh_queue.drain()
+    assert recorded == []
+
+
+@pytest.mark.anyio
+async def test_notifications_are_acked_then_processed_deduplicated(
+    async_client, signed_body, recorded
+):
+    body, headers = signed_body(
+        ("activities", "2025-01-15"),
+        ("activities", "2025-01-15"),
+        ("activities", "2025-01-14"),
+        ("sleep", "2025-01-15"),
+    )
+    resp = await async_client.post(endpoint, content=body, headers=headers)
+    assert resp.status_code == 204
+
+    await refresh_queue.drain()
+    assert sorted(recorded) == [
+        ("activities", [date(2025, 1, 14), date(2025, 1, 15)]),
+        ("sleep", [date(2025, 1, 15)]),
+    ]
+
+
+@pytest.mark.anyio
+async def test_notifications_are_deduplicated_per_owner(recorded):
+    notifications = [
+        FitbitNotification(collectionType="activities", date="2025-01-15", ownerId=owner)
+        for owner in ("OWNER1", "OWNER2", "OWNER1")
+    ]
+    assert refresh_queue.enqueue(notifications) == 2
+
+    await refresh_queue.drain()
+    # Only OWNER1's repeat is a duplicate; OWNER2's day is refreshed as well
+    assert recorded == [("activities", [date(2025, 1, 15)])] * 2
+
+
+@pytest.mark.anyio
+async def test_refresh_runs_after_the_triggering_requests_deadline(
+    async_client, signed_body, monkeypatch
+):
+    seen: list[float | None] = []
+
+    async def handler(days):
+        # A consumer started inside the first request must not inherit its deadline
+        deadline.check()
+        seen.append(deadline.remaining())
+
+    monkeypatch.setattr(refresh_queue, "_handlers", {"activities": [handler]})
+    try:
+        for day in ("2025-01-14", "2025-01-15"):
+            body, headers = signed_body(("activities", day))
+            headers["X-Request-Timeout-Ms"] = "50"
+            resp = await async_client.post(endpoint, content=body, headers=headers)
+            assert resp.status_code == 204
+            await refresh_queue.drain()
+            await asyncio.sleep(0.1)
+    finally:
+        await refresh_queue.stop()
+
+    assert seen == [None, None]
+
+
+@pytest.mark.anyio
+async def test_activity_refresh_replaces_cached_summary(monkeypatch):
+    day = date(2025, 1, 15)
+    summary_cache.set(day, FitbitDailySummary(date=day, steps=100))
+
+    class Upstream:
+        async def get_daily_activity_summary(self, d):
+            return FitbitDailySummary(date=d, steps=9_999)
+
+    monkeypatch.setattr(deps, "get_upstream_daily_summary_provider", lambda: Upstream())
+    await refresh_activity_days([day])
+    assert summary_cache.get(day).steps == 9_999
+    summary_cache.delete(day)
+
+
+@pytest.mark.anyio
+async def test_activity_refresh_skips_a_failing_day(monkeypatch):
+    bad, good = date(2025, 1, 14), date(2025, 1, 15)
+
+    class Upstream:
+        async def get_daily_activity_summary(self, d):
+            if d == bad:
+                raise httpx.HTTPStatusError(
+                    "boom",
+                    request=httpx.Request("GET", "http://fitbit"),
+                    response=httpx.Response(503),
+                )
+            return FitbitDailySummary(date=d, steps=9_999)
+
+    monkeypatch.setattr(deps, "get_upstream_daily_summary_provider", lambda: Upstream())
+    await refresh_activity_days([bad, good])
+    assert summary_cache.get(bad) is None
+    assert summary_cache.get(good).steps == 9_999
+    summary_cache.delete(good)
@@ -122,3 +122,40 @@ async def test_delete_greeting(async_client, db_session: Session):
     # Assert DB
     gone = db_session.get(Greeting, row.id)
     assert gone is None
+
+
+@pytest.mark.anyio
+async def test_get_greeting_is_served_from_cache(
+    async_client, db_session: Session, assert_max_queries
+):
+    row = add_greeting(db_session, sender="Ines", recipient="Jon", message="Ciao")
+    first = await async_client.get(f"{endpoint}{row.id}")
+
+    with assert_max_queries(0):
+        second = await async_client.get(f"{endpoint}{row.id}")
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["content-type"] == "application/json"
+
+
+@pytest.mark.anyio
+async def test_writes_invalidate_cached_greeting(async_client, db_session: Session):
+    row = add_greeting(db_session, sender="Kim", recipient="Lee", message="Hi")
+    await async_client.get(f"{endpoint}{row.id}")
+
+    await async_client.patch(f"{endpoint}{row.id}", json={"message": "Hey"})
+    assert (await async_client.get(f"{endpoint}{row.id}")).json()["message"] == "Hey"
+
+    await async_client.delete(f"{endpoint}{row.id}")
+    assert (await async_client.get(f"{endpoint}{row.id}")).status_code == 404
+
+
+@pytest.mark.anyio
+async def test_missing_greeting_404_is_cached(async_client, assert_max_queries):
+    missing = f"{endpoint}{uuid.uuid4()}"
+    assert (await async_client.get(missing)).status_code == 404
+
+    with assert_max_queries(0):
+        assert (await async_client.get(missing)).status_code == 404
+        assert (await async_client.get(f"{endpoint}not-a-uuid")).status_code == 404
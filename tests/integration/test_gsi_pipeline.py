@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+
+import httpx
+import pytest
+
+from app import deadline
+from app.api.v1 import fitbit as fitbit_api
+from app.cache import TTLCache
+from app.config import get_settings
+from app.deadline import DeadlineExceeded
+from app.gsi.activity_score.cache import CachingDailySummaryProvider
+from app.gsi.activity_score.deps import get_fitbit_daily_summary_provider
+from app.gsi.activity_score.metric import ActivityScoreModule
+from app.gsi.activity_score.provider_fitbit_impl import ExistingFitbitIntegrationProvider
+from app.gsi.pipeline import DayPayloads, GsiPipeline, UpstreamTimeoutError
+from app.integrations.circuit_breaker import CircuitOpenError
+from app.integrations.fitbit_client import FitbitClient, breakers
+from app.integrations.fitbit_daily import section_cache
+from app.main import app
+
+PAST_DAY = date.today() - timedelta(days=30)
+
+
+def _resource(path: str) -> str:
+    for resource, marker in (
+        ("sleep", "/sleep/"),
+        ("heartrate", "/heart/"),
+        ("active_zone_minutes", "/active-zone-"),
+    ):
+        if marker in path:
+            return resource
+    return "activity"
+
+
+class Upstream:
+    def __init__(self) -> None:
+        self.hits: list[str] = []
+        self.tokens = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failing: set[str] = set()
+        self.slow: set[str] = set()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        resource = _resource(path)
+        self.hits.append(resource)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.5 if resource in self.slow else 0.01)
+        finally:
+            self.in_flight -= 1
+        if resource in self.failing:
+            return httpx.Response(503)
+        if resource == "activity":
+            return httpx.Response(
+                200, json={"summary": {"steps": int(path.split("-")[-1][:2]), "caloriesOut": 2000}}
+            )
+        if resource == "active_zone_minutes":
+            return httpx.Response(
+                200, json={"activities-active-zone-minutes": [{"value": {"activeZoneMinutes": 30}}]}
+            )
+        return httpx.Response(200, json={resource: path})
+
+    async def access_token(self) -> str:
+        self.tokens += 1
+        return "token"
+
+
+class SleepModule:
+    name = "sleep"
+    resources = ("sleep", "heartrate")
+
+    def compute(self, day: date, payloads: DayPayloads) -> dict:
+        return {"sleep": payloads["sleep"], "heartrate": payloads["heartrate"]}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    up = Upstream()
+    client = FitbitClient(
+        "cid", "http://test/cb", api_base="http://fitbit", transport=httpx.MockTransport(up.handler)
+    )
+    monkeypatch.setattr(fitbit_api, "_get_fitbit_client", lambda: client)
+    monkeypatch.setattr(fitbit_api, "_get_fresh_access_token", up.access_token)
+    up.client = client
+    section_cache.clear()
+    yield up
+    section_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_modules_share_one_fetch_per_resource(upstream):
+    pipeline = GsiPipeline(
+        upstream.client, upstream.access_token, [ActivityScoreModule(), SleepModule()]
+    )
+    assert pipeline.resources == ["activity", "active_zone_minutes", "sleep", "heartrate"]
+
+    result = await pipeline.run(PAST_DAY)
+
+    assert sorted(upstream.hits) == sorted(pipeline.resources)
+    assert upstream.tokens == 1
+    summary = result.results["activity_score"]
+    assert summary.active_zone_minutes == 30 and summary.steps == PAST_DAY.day
+    assert set(result.results["sleep"]) == {"sleep", "heartrate"}
+
+
+@pytest.mark.anyio
+async def test_failed_resource_only_fails_the_modules_needing_it(upstream):
+    upstream.failing.add("sleep")
+    pipeline = GsiPipeline(
+        upstream.client, upstream.access_token, [ActivityScoreModule(), SleepModule()]
+    )
+
+    result = await pipeline.run(PAST_DAY)
+
+    assert list(result.results) == ["activity_score"]
+    assert result.errors == {"sleep": "sleep: upstream status 503"}
+    with pytest.raises(httpx.HTTPStatusError):
+        await pipeline.fetch(PAST_DAY, ["sleep"])
+
+
+@pytest.mark.anyio
+async def test_resource_timeout_is_an_upstream_error(upstream, async_client, monkeypatch):
+    upstream.slow.add("active_zone_minutes")
+    pipeline = GsiPipeline(
+        upstream.client, upstream.access_token, [ActivityScoreModule()], timeout_s=0.1
+    )
+    with pytest.raises(UpstreamTimeoutError):
+        await pipeline.fetch(PAST_DAY)
+
+    app.dependency_overrides[get_fitbit_daily_summary_provider] = lambda: (
+        ExistingFitbitIntegrationProvider(upstream.client, upstream.access_token)
+    )
+    monkeypatch.setattr(get_settings(), "fitbit_section_timeout_s", 0.1)
+    try:
+        resp = await async_client.get(f"/api/v1/gsi/activity-score/day/{PAST_DAY.isoformat()}")
+    finally:
+        app.dependency_overrides.pop(get_fitbit_daily_summary_provider, None)
+    assert resp.status_code == 502
+
+
+@pytest.mark.anyio
+async def test_resource_timeout_after_the_request_deadline_is_a_deadline_error(upstream):
+    upstream.slow.add("active_zone_minutes")
+    pipeline = GsiPipeline(
+        upstream.client, upstream.access_token, [ActivityScoreModule()], timeout_s=0.1
+    )
+    clock = [0.0]
+    # The request's deadline runs out while the section is still waiting on Fitbit
+    asyncio.get_running_loop().call_later(0.05, clock.__setitem__, 0, 10.0)
+    with deadline.scope(5) as request_deadline:
+        request_deadline._clock = lambda: clock[0]
+        request_deadline.expires_at = 5
+        with pytest.raises(DeadlineExceeded):
+            await pipeline.fetch(PAST_DAY)
+
+
+@pytest.mark.anyio
+async def test_score_and_daily_summary_download_the_activity_summary_once(async_client, upstream):
+    provider = ExistingFitbitIntegrationProvider(
+        upstream.client, upstream.access_token, cache=section_cache
+    )
+    await provider.get_daily_activity_summary(PAST_DAY)
+    assert sorted(upstream.hits) == ["active_zone_minutes", "activity"]
+
+    upstream.hits.clear()
+    resp = await async_client.get(
+        "/api/v1/fitbit/daily-summary",
+        params={"day": PAST_DAY.isoformat(), "include": "activity,sleep"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["activity"]["summary"]["steps"] == PAST_DAY.day
+    assert upstream.hits == ["sleep"]
+
+
+@pytest.mark.anyio
+async def test_range_is_fetched_concurrently_with_one_token(upstream, monkeypatch):
+    monkeypatch.setattr(get_settings(), "gsi_pipeline_concurrency", 3)
+    provider = ExistingFitbitIntegrationProvider(upstream.client, upstream.access_token)
+    start = PAST_DAY - timedelta(days=9)
+
+    summaries = await provider.get_daily_activity_summaries(start, PAST_DAY)
+
+    assert [s.date for s in summaries] == [start + timedelta(days=i) for i in range(10)]
+    assert upstream.tokens == 1
+    assert len(upstream.hits) == 20
+    # Three days at a time, each with its two resources in parallel
+    assert upstream.max_in_flight == 6
+
+
+@pytest.mark.anyio
+async def test_slow_fitbit_trips_the_breaker_and_scores_go_stale(upstream, monkeypatch):
+    monkeypatch.setattr(get_settings(), "fitbit_section_timeout_s", 0.05)
+    clock = [0.0]
+    cache: TTLCache = TTLCache(ttl_s=60, clock=lambda: clock[0], keep_stale=True)
+    provider = CachingDailySummaryProvider(
+        ExistingFitbitIntegrationProvider(upstream.client, upstream.access_token), cache
+    )
+    fresh = await provider.get_daily_activity_summary(PAST_DAY)
+
+    clock[0] = 120
+    upstream.slow.add("active_zone_minutes")  # answers, but after the section timeout
+    stale = await provider.get_daily_activity_summary(PAST_DAY)
+    assert stale.stale and stale.steps == fresh.steps
+
+    breaker = breakers.get("activities/active-zone-minutes")
+    while breaker.state == "closed":
+        with pytest.raises(UpstreamTimeoutError):
+            await provider.inner.get_daily_activity_summary(PAST_DAY)
+    assert (
+        breaker.snapshot()["consecutive_failures"]
+        == get_settings().fitbit_breaker_failure_threshold
+    )
+
+    azm_calls = upstream.hits.count("active_zone_minutes")
+    with pytest.raises(CircuitOpenError):
+        await provider.inner.get_daily_activity_summary(PAST_DAY)
+    assert (await provider.get_daily_activity_summary(PAST_DAY)).stale
+    assert upstream.hits.count("active_zone_minutes") == azm_calls  # failing fast
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip("numpy")
+
+from app.gsi.activity_score.deps import get_heartrate_ingestor  # noqa: E402
+from app.gsi.activity_score.heartrate import HeartRateSeries  # noqa: E402
+from app.gsi.activity_score.heartrate_ingest import HeartRateIngestor  # noqa: E402
+from app.gsi.activity_score.provider_fitbit_impl import (  # noqa: E402
+    ExistingFitbitIntegrationProvider,
+)
+from app.integrations.emulators.fitbit import EmulatorConfig, create_app  # noqa: E402
+from app.integrations.fitbit_client import FitbitClient  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Base, HeartRateDayRecord  # noqa: E402
+
+TODAY = date(2025, 1, 20)
+FINAL_DAY = date(2025, 1, 15)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self) -> None:
+        self.inner = httpx.ASGITransport(app=create_app(EmulatorConfig(seed=1)))
+        self.paths: list[str] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.paths.append(request.url.path)
+        return await self.inner.handle_async_request(request)
+
+
+@pytest.fixture
+def transport():
+    return RecordingTransport()
+
+
+@pytest.fixture
+def fitbit(transport):
+    return FitbitClient(
+        client_id="emu", redirect_uri="http://test/cb", api_base="http://emu", transport=transport
+    )
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'heartrate.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, future=True, expire_on_commit=False)
+
+
+@pytest.fixture
+def ingestor(fitbit, local_db):
+    return HeartRateIngestor(fitbit, local_db, today=lambda: TODAY)
+
+
+async def token() -> str:
+    return "emulator-token"
+
+
+@pytest.mark.anyio
+async def test_provider_takes_azm_from_intraday_heart_rate(ingestor, fitbit, transport):
+    provider = ExistingFitbitIntegrationProvider(fitbit, access_token=token, heartrate=ingestor)
+    summary = await provider.get_daily_activity_summary(FINAL_DAY)
+
+    assert not any("active-zone-minutes" in p for p in transport.paths)
+    assert any(p.endswith("/1d/1sec.json") for p in transport.paths)
+    stored = await ingestor.stored(FINAL_DAY)
+    assert stored is not None and stored.samples > 10_000
+    assert summary.active_zone_minutes == stored.active_zone_minutes
+    series = HeartRateSeries.from_blob(stored.series)
+    assert series.zone_minutes()["fat_burn"] == stored.fat_burn_minutes
+
+    # A final day is scored from the stored series: only the activity summary is fetched again
+    transport.paths.clear()
+    await provider.get_daily_activity_summary(FINAL_DAY)
+    assert len(transport.paths) == 1 and "/heart/" not in transport.paths[0]
+
+    # Recent days may still change upstream, so they are re-fetched
+    recent = TODAY - timedelta(days=1)
+    await ingestor.get("emulator-token", recent)
+    transport.paths.clear()
+    await ingestor.get("emulator-token", recent)
+    assert len(transport.paths) == 1
+
+
+@pytest.mark.anyio
+async def test_heartrate_endpoint_serves_downsampled_series(
+    async_client, ingestor, local_db, monkeypatch
+):
+    monkeypatch.setattr("app.integrations.fitbit_client.get_fresh_access_token", token)
+    app.dependency_overrides[get_heartrate_ingestor] = lambda: ingestor
+    try:
+        resp = await async_client.get(
+            f"/api/v1/gsi/activity-score/heartrate/{FINAL_DAY}", params={"bucket_s": 900}
+        )
+    finally:
+        app.dependency_overrides.pop(get_heartrate_ingestor, None)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert len(body["series"]["t"]) == 96
+    assert body["active_zone_minutes"] == body["fat_burn_minutes"] + 2 * (
+        body["cardio_minutes"] + body["peak_minutes"]
+    )
+    assert 40 < body["resting_heart_rate"] < 80
+    with local_db() as db:
+        assert db.get(HeartRateDayRecord, FINAL_DAY).samples == body["samples"]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from app.cache import TTLCache
+from app.gsi.activity_score import router as activity_router
+from app.gsi.activity_score.cache import CachingDailySummaryProvider
+from app.gsi.activity_score.deps import get_fitbit_daily_summary_provider
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.prefetch import Prefetcher
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.integrations.fitbit_client import RateLimitState
+from app.main import app
+
+DAY = date(2025, 1, 15)
+
+
+class Upstream(FitbitDailySummaryProvider):
+    def __init__(self, delay_s: float = 0.0):
+        self.fetched: list[date] = []
+        self.delay_s = delay_s
+
+    async def get_daily_activity_summary(self, date):
+        return (await self.get_daily_activity_summaries(date, date))[0]
+
+    async def get_daily_activity_summaries(self, start_date, end_date):
+        await asyncio.sleep(self.delay_s)
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        self.fetched.extend(days)
+        return [FitbitDailySummary(date=d, steps=d.day * 100) for d in days]
+
+
+def make_prefetcher(upstream, cache, rate_limit=None, window_days=3, min_remaining=0) -> Prefetcher:
+    return Prefetcher(
+        cache,
+        window_days=window_days,
+        min_remaining=min_remaining,
+        rate_limit=rate_limit or RateLimitState(),
+        provider_factory=lambda: upstream,
+    )
+
+
+@pytest.mark.anyio
+async def test_day_endpoint_prefetches_previous_days(async_client, monkeypatch):
+    cache: TTLCache[date, FitbitDailySummary] = TTLCache(maxsize=64, ttl_s=300)
+    upstream = Upstream()
+    prefetcher = make_prefetcher(upstream, cache)
+    monkeypatch.setattr(activity_router, "prefetcher", prefetcher)
+    app.dependency_overrides[get_fitbit_daily_summary_provider] = (
+        lambda: CachingDailySummaryProvider(upstream, cache)
+    )
+    try:
+        assert (await async_client.get(f"/api/v1/gsi/activity-score/day/{DAY}")).status_code == 200
+        await prefetcher.drain()
+        assert sorted(upstream.fetched) == [DAY - timedelta(days=i) for i in range(3, -1, -1)]
+
+        # Scrolling back is served from the cache and counted as prefetch hits
+        upstream.fetched.clear()
+        for i in (1, 2):
+            resp = await async_client.get(
+                f"/api/v1/gsi/activity-score/day/{DAY - timedelta(days=i)}"
+            )
+            assert resp.status_code == 200
+        await prefetcher.drain()
+    finally:
+        app.dependency_overrides.pop(get_fitbit_daily_summary_provider, None)
+
+    # D-1 and D-2 came from the cache; only the newly uncovered D-4 and D-5 were fetched
+    assert sorted(upstream.fetched) == [DAY - timedelta(days=5), DAY - timedelta(days=4)]
+    snap = prefetcher.snapshot()
+    assert snap["hits"] == 2
+    assert snap["fetched"] == 5
+
+
+@pytest.mark.anyio
+async def test_prefetch_respects_rate_limit_budget():
+    cache: TTLCache[date, FitbitDailySummary] = TTLCache(maxsize=64, ttl_s=300)
+    upstream = Upstream()
+    rate_limit = RateLimitState(remaining=20 + 2 * 2, reset_at=time.monotonic() + 3600)
+    prefetcher = make_prefetcher(upstream, cache, rate_limit, window_days=7, min_remaining=20)
+
+    assert prefetcher.schedule(DAY) == [DAY - timedelta(days=1), DAY - timedelta(days=2)]
+    await prefetcher.drain()
+    assert prefetcher.snapshot()["skipped_budget"] == 5
+
+    rate_limit.remaining = 20
+    assert prefetcher.schedule(DAY - timedelta(days=2)) == []
+
+
+@pytest.mark.anyio
+async def test_prefetch_skips_cached_and_in_flight_days():
+    cache: TTLCache[date, FitbitDailySummary] = TTLCache(maxsize=64, ttl_s=300)
+    cache.set(DAY - timedelta(days=1), FitbitDailySummary(date=DAY - timedelta(days=1)))
+    upstream = Upstream(delay_s=0.01)
+    prefetcher = make_prefetcher(upstream, cache)
+
+    assert prefetcher.schedule(DAY) == [DAY - timedelta(days=2), DAY - timedelta(days=3)]
+    # A second request while those are in flight only adds the new day
+    assert prefetcher.schedule(DAY - timedelta(days=1)) == [DAY - timedelta(days=4)]
+    await prefetcher.drain()
+
+    assert sorted(upstream.fetched) == [DAY - timedelta(days=i) for i in range(4, 1, -1)]
+    snap = prefetcher.snapshot()
+    assert snap["skipped_cached"] == 1
+    assert snap["deduplicated"] == 2
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.db_instrumentation import instrument_engine, redact_parameters, track_queries
+from app.models import Greeting
+
+endpoint = "/api/v1/greetings/"
+
+
+def seed(db: Session, n: int) -> None:
+    for i in range(n):
+        db.add(Greeting(sender=f"s{i}", recipient="r", message="m"))
+    db.flush()
+
+
+@pytest.mark.anyio
+async def test_query_stats_headers(async_client, db_session: Session):
+    seed(db_session, 2)
+    resp = await async_client.get(endpoint)
+    assert resp.status_code == 200
+    assert int(resp.headers["x-db-query-count"]) >= 1
+    assert float(resp.headers["x-db-time-ms"]) >= 0
+
+
+@pytest.mark.anyio
+async def test_list_greetings_has_no_n_plus_one(
+    async_client, db_session: Session, assert_max_queries
+):
+    seed(db_session, 10)
+    with assert_max_queries(1):
+        resp = await async_client.get(endpoint)
+    assert len(resp.json()) == 10
+
+
+def test_nested_scopes_and_slow_query_log(caplog):
+    engine = instrument_engine(
+        create_engine("sqlite+pysqlite:///:memory:"), slow_query_ms=1e-9, explain_slow_queries=True
+    )
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_query"):
+        with track_queries() as outer:
+            with engine.connect() as conn, track_queries() as inner:
+                conn.execute(text("SELECT :secret"), {"secret": "hunter2"})
+            assert inner.count == 1
+        assert outer.count == 1
+
+    assert "Slow query" in caplog.text
+    assert "hunter2" not in caplog.text
+    assert "params=['?']" in caplog.text  # sqlite binds positionally
+
+
+def test_redact_parameters_shapes():
+    assert redact_parameters({"a": 1, "b": "x"}) == {"a": "?", "b": "?"}
+    assert redact_parameters((1, 2)) == ["?", "?"]
+    assert redact_parameters([{"a": 1}, {"a": 2}]) == "<2 parameter sets>"
+    assert redact_parameters(None) is None
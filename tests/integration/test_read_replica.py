@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import database, db_routing
+from app.database import get_db, get_read_db
+from app.db_routing import ReplicaRouter
+from app.main import app
+from app.models import Base, Greeting
+
+endpoint = "/api/v1/greetings/"
+
+
+def _sqlite_sessionmaker(path) -> sessionmaker:
+    engine = create_engine(f"sqlite+pysqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False, future=True, expire_on_commit=False)
+
+
+@pytest.fixture
+def primary_and_replica(tmp_path):
+    """Two SQLite files standing in for primary and replica, seeded differently."""
+    primary = _sqlite_sessionmaker(tmp_path / "primary.db")
+    replica = _sqlite_sessionmaker(tmp_path / "replica.db")
+    with primary.begin() as db:
+        db.add(Greeting(sender="primary", recipient="r", message="m"))
+    with replica.begin() as db:
+        db.add(Greeting(sender="replica", recipient="r", message="m"))
+    return primary, replica
+
+
+@pytest.fixture
+def routed_app(primary_and_replica, monkeypatch):
+    primary, replica = primary_and_replica
+    lag = {"value": 0.0}
+    router = ReplicaRouter(
+        primary,
+        replica,
+        max_lag_s=5,
+        lag_check_interval_s=0,
+        sticky_s=5,
+        lag_probe=lambda s: lag["value"],
+    )
+    monkeypatch.setattr(database, "_ROUTER", router)
+
+    def _primary_db():
+        db = primary()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _primary_db
+    app.dependency_overrides.pop(get_read_db, None)
+    yield router, lag
+
+
+def _senders(resp) -> set[str]:
+    assert resp.status_code == 200
+    return {g["sender"] for g in resp.json()}
+
+
+@pytest.mark.anyio
+async def test_reads_go_to_replica(async_client, routed_app):
+    assert _senders(await async_client.get(endpoint)) == {"replica"}
+
+
+@pytest.mark.anyio
+async def test_read_your_writes_sticks_to_primary(async_client, routed_app, monkeypatch):
+    headers = {"X-Client-Id": "alice"}
+    resp = await async_client.post(
+        endpoint, json={"sender": "alice", "recipient": "bob", "message": "hi"}, headers=headers
+    )
+    assert resp.status_code == 201
+
+    # The writer sees its own write; other clients still read the replica
+    assert _senders(await async_client.get(endpoint, headers=headers)) == {"primary", "alice"}
+    assert _senders(await async_client.get(endpoint, headers={"X-Client-Id": "carol"})) == {
+        "replica"
+    }
+
+    # Once the window passes the writer goes back to the replica
+    later = db_routing.time.monotonic() + 10
+    monkeypatch.setattr(db_routing.time, "monotonic", lambda: later)
+    assert _senders(await async_client.get(endpoint, headers=headers)) == {"replica"}
+
+
+@pytest.mark.anyio
+async def test_lagging_or_unreachable_replica_falls_back_to_primary(async_client, routed_app):
+    router, lag = routed_app
+    lag["value"] = 30.0
+    assert _senders(await async_client.get(endpoint)) == {"primary"}
+
+    def broken(session):
+        raise RuntimeError("replica down")
+
+    router._lag_probe = broken
+    assert _senders(await async_client.get(endpoint)) == {"primary"}
+
+
+def test_lag_probe_result_is_cached(primary_and_replica):
+    primary, replica = primary_and_replica
+    calls = []
+    router = ReplicaRouter(
+        primary, replica, lag_check_interval_s=60, lag_probe=lambda s: calls.append(1) or 0.0
+    )
+    for _ in range(5):
+        assert router.read_sessionmaker("x") is replica
+    assert len(calls) == 1
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import database, lifespan
+from app.config import get_settings
+from app.database import warm_pool
+from app.db_pool import InstrumentedQueuePool
+from app.readiness import ReadinessProber
+
+
+@pytest.fixture
+def fake_prober():
+    calls = {"database": 0, "secret_manager": 0}
+    state = {"db_up": True}
+
+    def database_check():
+        calls["database"] += 1
+        if not state["db_up"]:
+            raise ConnectionError("db down")
+        return True
+
+    def secret_check():
+        calls["secret_manager"] += 1
+        return True
+
+    prober = ReadinessProber(interval_s=3600)
+    prober.add_check("database", database_check)
+    prober.add_check("secret_manager", secret_check)
+    return prober, calls, state
+
+
+@pytest.mark.anyio
+async def test_ready_is_served_from_cached_probe(async_client, fake_prober, monkeypatch):
+    prober, calls, state = fake_prober
+    monkeypatch.setattr("app.main.prober", prober)
+
+    resp = await async_client.get("/ready")
+    assert resp.status_code == 503
+    assert resp.json()["status"] == "starting"
+
+    await prober.run_once()
+    for _ in range(10):
+        resp = await async_client.get("/ready")
+        assert resp.status_code == 200
+    assert resp.json()["checks"]["database"]["ok"] is True
+    assert calls == {"database": 1, "secret_manager": 1}
+
+    state["db_up"] = False
+    await prober.run_once()
+    resp = await async_client.get("/ready")
+    assert resp.status_code == 503
+    assert "db down" in resp.json()["checks"]["database"]["error"]
+
+
+@pytest.mark.anyio
+async def test_prober_background_task_starts_and_stops():
+    prober = ReadinessProber(interval_s=3600)
+    prober.add_check("noop", lambda: True)
+    prober.start()
+    for _ in range(100):
+        if prober.state.checked_at is not None:
+            break
+        await asyncio.sleep(0.01)
+    await prober.stop()
+    assert prober.state.ready is True
+
+
+def test_warm_pool_leaves_connections_idle_in_pool(tmp_path):
+    engine = create_engine(
+        f"sqlite+pysqlite:///{tmp_path / 'warm.db'}", poolclass=InstrumentedQueuePool, pool_size=3
+    )
+    assert warm_pool(3, engine=engine) == 3
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.checkedout() == 0
+
+
+@pytest.mark.anyio
+async def test_warm_up_gives_up_on_an_unreachable_database(monkeypatch):
+    release = threading.Event()
+
+    def hanging_warm_pool(connections):
+        release.wait(5)  # like a connect to an unreachable host
+        return 0
+
+    async def warm_fitbit():
+        pass
+
+    monkeypatch.setattr(get_settings(), "warmup_timeout_s", 0.1)
+    monkeypatch.setattr(database, "warm_pool", hanging_warm_pool)
+    monkeypatch.setattr(lifespan, "_warm_fitbit", warm_fitbit)
+    started = time.monotonic()
+    try:
+        await lifespan.warm_up()
+    finally:
+        release.set()
+    assert time.monotonic() - started < 1
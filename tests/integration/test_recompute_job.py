@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.store import get_checkpoint, upsert_summaries
+from app.models import ActivityScoreDailyRecord, ActivityScoreRollupRecord, Base
+from app.workers.recompute import ScoreRecomputeJob, checkpoint_name
+
+START = date(2025, 1, 1)
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'recompute.db'}")
+    # The job writes while its streaming read is open, as it does on Postgres
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA journal_mode=WAL"))
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, future=True, expire_on_commit=False)
+    with factory() as db:
+        upsert_summaries(
+            db,
+            [
+                FitbitDailySummary(
+                    date=START + timedelta(days=i), steps=1_000 * i, active_zone_minutes=i
+                )
+                for i in range(45)
+            ],
+        )
+        db.commit()
+    return factory
+
+
+def scores(local_db) -> dict[date, tuple[float, str]]:
+    with local_db() as db:
+        return {r.date: (r.score, r.version) for r in db.scalars(select(ActivityScoreDailyRecord))}
+
+
+def test_recompute_rescores_history_in_checkpointed_batches(local_db):
+    assert {v for _, v in scores(local_db).values()} == {"2.0.0"}
+
+    report = ScoreRecomputeJob("1.0.0", local_db, batch_size=10).run()
+
+    assert (report.days, report.batches) == (45, 5)
+    after = scores(local_db)
+    assert {v for _, v in after.values()} == {"1.0.0"}
+    assert after[START + timedelta(days=12)][0] == 6  # floor + 4 step + 1 AZM points
+    with local_db() as db:
+        assert get_checkpoint(db, checkpoint_name("1.0.0")) == START + timedelta(days=44)
+        january = db.get(ActivityScoreRollupRecord, ("month", START))
+        assert january.score_sum == sum(after[START + timedelta(days=i)][0] for i in range(31))
+
+    # Resumes after the checkpoint: nothing left to do
+    assert ScoreRecomputeJob("1.0.0", local_db, batch_size=10).run().days == 0
+
+
+def test_process_pool_gives_the_same_scores(local_db):
+    ScoreRecomputeJob("1.0.0", local_db, batch_size=10).run()
+    in_process = scores(local_db)
+
+    job = ScoreRecomputeJob("1.0.0", local_db, batch_size=7, workers=2)
+    job.restart()
+    assert job.run().days == 45
+    assert scores(local_db) == in_process
+
+
+def test_unknown_version_fails_fast(local_db):
+    with pytest.raises(LookupError):
+        ScoreRecomputeJob("9.9.9", local_db)
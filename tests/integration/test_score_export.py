@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import csv
+import io
+from datetime import date, timedelta
+
+import pytest
+
+from app.gsi.activity_score.calculator import ActivityScoreCalculatorV1, ActivityScoreCalculatorV2
+from app.gsi.activity_score.deps import get_fitbit_daily_summary_provider
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.main import app
+from app.workers.export import ExportExistsError, ScoreExporter
+
+endpoint = "/api/v1/gsi/activity-score/export"
+START = date(2024, 1, 1)
+
+
+class HistoryProvider(FitbitDailySummaryProvider):
+    """Deterministic history; records every range fetched."""
+
+    def __init__(self) -> None:
+        self.fetched: list[tuple[date, date]] = []
+
+    async def get_daily_activity_summary(self, date):
+        raise NotImplementedError
+
+    async def get_daily_activity_summaries(self, start_date, end_date):
+        self.fetched.append((start_date, end_date))
+        days = (end_date - start_date).days + 1
+        return [
+            FitbitDailySummary(
+                date=start_date + timedelta(days=i),
+                steps=(start_date + timedelta(days=i)).toordinal() % 15_000,
+                active_zone_minutes=(start_date + timedelta(days=i)).toordinal() % 120,
+            )
+            for i in range(days)
+        ]
+
+
+@pytest.fixture
+def provider():
+    p = HistoryProvider()
+    app.dependency_overrides[get_fitbit_daily_summary_provider] = lambda: p
+    yield p
+    app.dependency_overrides.pop(get_fitbit_daily_summary_provider, None)
+
+
+@pytest.mark.anyio
+async def test_csv_export_streams_in_chunks(async_client, provider, monkeypatch):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "export_chunk_days", 30)
+    params = {"start_date": "2024-01-01", "end_date": "2024-12-31", "versions": "1.0.0,2.0.0"}
+    resp = await async_client.get(endpoint, params=params)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert "activity-scores_2024-01-01_2024-12-31.csv" in resp.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == 366
+    assert len(provider.fetched) == 13 and max((e - s).days + 1 for s, e in provider.fetched) == 30
+    v1, v2 = ActivityScoreCalculatorV1(), ActivityScoreCalculatorV2()
+    last = rows[-1]
+    assert last["date"] == "2024-12-31"
+    steps, azm = int(last["steps"]), int(last["active_zone_minutes"])
+    assert float(last["score_1.0.0"]) == v1.score(steps, azm)
+    assert float(last["score_2.0.0"]) == v2.score(steps, azm)
+
+
+@pytest.mark.anyio
+async def test_export_rejects_bad_ranges(async_client, provider):
+    resp = await async_client.get(
+        endpoint, params={"start_date": "2024-02-01", "end_date": "2024-01-01"}
+    )
+    assert resp.status_code == 400
+    resp = await async_client.get(
+        endpoint, params={"start_date": "2024-01-01", "end_date": "2024-01-02", "versions": "9"}
+    )
+    assert resp.status_code == 400
+    assert provider.fetched == []
+
+
+@pytest.mark.anyio
+async def test_csv_file_export_resumes_after_last_complete_row(tmp_path):
+    path = tmp_path / "history.csv"
+    exporter = ScoreExporter(HistoryProvider(), [ActivityScoreCalculatorV2()], chunk_days=10)
+    await exporter.to_csv(path, START, START + timedelta(days=24))
+    full = path.read_text()
+
+    # Interrupted mid-row on day 18
+    lines = full.splitlines(keepends=True)
+    path.write_text("".join(lines[:18]) + lines[18][:7])
+    with pytest.raises(ExportExistsError):
+        await exporter.to_csv(path, START, START + timedelta(days=24))
+
+    provider = HistoryProvider()
+    resumed = ScoreExporter(provider, [ActivityScoreCalculatorV2()], chunk_days=10)
+    report = await resumed.to_csv(path, START, START + timedelta(days=24), resume=True)
+    assert report.resumed_after == START + timedelta(days=16)
+    assert provider.fetched[0][0] == START + timedelta(days=17)
+    assert path.read_text() == full
+
+
+@pytest.mark.anyio
+async def test_parquet_file_export_writes_resumable_parts(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    exporter = ScoreExporter(
+        HistoryProvider(), [ActivityScoreCalculatorV2()], chunk_days=10, part_days=30
+    )
+    report = await exporter.to_parquet(tmp_path, START, START + timedelta(days=59))
+    assert report.parts == 2
+    (tmp_path / "part-2024-01-31_2024-02-29.parquet").unlink()
+
+    provider = HistoryProvider()
+    resumed = ScoreExporter(provider, [ActivityScoreCalculatorV2()], chunk_days=10, part_days=30)
+    report = await resumed.to_parquet(tmp_path, START, START + timedelta(days=59), resume=True)
+    assert report.resumed_after == START + timedelta(days=29)
+    assert pq.ParquetFile(tmp_path / "part-2024-01-31_2024-02-29.parquet").num_row_groups == 3
+    table = pq.read_table(tmp_path)
+    assert table.num_rows == 60
+    assert table.column_names[-1] == "score_2.0.0"
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import importlib.util
+from datetime import date, timedelta
+
+import pytest
+
+from app.gsi.activity_score import formats
+from app.gsi.activity_score.calculator import ActivityScoreCalculatorV2
+from app.gsi.activity_score.deps import get_fitbit_daily_summary_provider
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.main import app
+
+endpoint = "/api/v1/gsi/activity-score/range"
+params = {"start_date": "2025-01-01", "end_date": "2025-01-03"}
+
+
+class RangeProvider(FitbitDailySummaryProvider):
+    async def get_daily_activity_summary(self, date):
+        raise NotImplementedError
+
+    async def get_daily_activity_summaries(self, start_date, end_date):
+        return [
+            FitbitDailySummary(
+                date=start_date + timedelta(days=i), steps=steps, active_zone_minutes=azm
+            )
+            for i, (steps, azm) in enumerate([(12_500, 85), (0, 0), (4_000, 60)])
+        ]
+
+
+@pytest.fixture(autouse=True)
+def provider():
+    app.dependency_overrides[get_fitbit_daily_summary_provider] = RangeProvider
+    yield
+    app.dependency_overrides.pop(get_fitbit_daily_summary_provider, None)
+
+
+@pytest.mark.anyio
+async def test_columnar_json_matches_per_day_json(async_client):
+    per_day = (await async_client.get(endpoint, params=params)).json()
+
+    resp = await async_client.get(
+        endpoint, params=params, headers={"Accept": formats.MEDIA_TYPES[formats.COLUMNS]}
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == formats.MEDIA_TYPES[formats.COLUMNS]
+    columns = resp.json()
+    assert columns["dates"] == [day["date"] for day in per_day]
+    assert columns["scores"] == [day["score"] for day in per_day]
+    assert columns["steps"] == [12_500, 0, 4_000]
+    assert columns["azm"] == [85, 0, 60]
+
+    resp = await async_client.get(
+        endpoint, params={**params, "format": "columns", "versions": "1.0.0,2.0.0"}
+    )
+    assert set(resp.json()["scores"]) == {"1.0.0", "2.0.0"}
+    assert resp.json()["scores"]["2.0.0"] == columns["scores"]
+
+
+@pytest.mark.anyio
+async def test_missing_codec_is_not_acceptable(async_client):
+    if importlib.util.find_spec("msgpack") is not None:
+        pytest.skip("msgpack is installed")
+    resp = await async_client.get(endpoint, params={**params, "format": "msgpack"})
+    assert resp.status_code == 406
+    # Only offered formats are picked from Accept
+    resp = await async_client.get(
+        endpoint, params=params, headers={"Accept": "application/msgpack, application/json;q=0.5"}
+    )
+    assert resp.headers["content-type"] == "application/json"
+
+
+def test_negotiate_ranks_by_quality():
+    accept = f"application/json;q=0.5, {formats.MEDIA_TYPES[formats.COLUMNS]}"
+    assert formats.negotiate(None, accept) == formats.COLUMNS
+    assert formats.negotiate(None, "*/*") == formats.JSON
+    assert formats.negotiate(None, None) == formats.JSON
+    assert formats.negotiate("json", accept) == formats.JSON
+    with pytest.raises(formats.UnsupportedFormatError):
+        formats.negotiate("xml", None)
+
+
+def test_score_column_uses_calculator_score():
+    calc = ActivityScoreCalculatorV2()
+    day = FitbitDailySummary(date=date(2025, 1, 1), steps=7_321, active_zone_minutes=33)
+    columns = formats.ScoreColumns.build([day], [calc])
+    assert columns.scores == {calc.version: [calc.calculate(day).score]}
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.rollup import apply_summaries, rebuild_all
+from app.gsi.activity_score.store import upsert_summaries
+from app.models import ActivityScoreRollupRecord
+
+endpoint = "/api/v1/gsi/activity-score/rollup"
+MONDAY = date(2025, 3, 3)
+
+
+def day(offset: int, steps: int, azm: int = 60) -> FitbitDailySummary:
+    return FitbitDailySummary(
+        date=MONDAY + timedelta(days=offset), steps=steps, active_zone_minutes=azm
+    )
+
+
+def rollups(db) -> dict[tuple[str, date], ActivityScoreRollupRecord]:
+    return {(r.period, r.period_start): r for r in db.scalars(select(ActivityScoreRollupRecord))}
+
+
+@pytest.mark.anyio
+async def test_weekly_rollup_endpoint(async_client, db_session):
+    # Week 1: 10k steps + 60 AZM scores 5.0 (the V2 maximum); day 3 drops to 2.0
+    week1 = [day(i, 10_000) for i in range(7)]
+    week1[3] = day(3, 0, 30)
+    upsert_summaries(db_session, week1 + [day(7, 4_000), day(8, 4_000)])
+    db_session.flush()
+
+    resp = await async_client.get(
+        endpoint, params={"start_date": "2025-03-03", "end_date": "2025-03-16", "window": 2}
+    )
+    assert resp.status_code == 200
+    first, second = resp.json()
+    assert first["start_date"] == "2025-03-03" and first["end_date"] == "2025-03-09"
+    assert first["days"] == 7
+    assert (first["min_score"], first["max_score"]) == (1.6, 5.0)
+    assert first["mean_score"] == round((6 * 5.0 + 1.6) / 7, 2)
+    assert first["total_steps"] == 60_000
+    assert first["longest_streak"] == 3  # days 4-6 (days 0-2 are also 3)
+    assert second["days"] == 2
+    assert second["moving_avg_score"] == round((6 * 5.0 + 1.6 + 2 * 3.5) / 9, 2)
+
+    resp = await async_client.get(
+        endpoint, params={"period": "month", "start_date": "2025-03-10", "end_date": "2025-03-10"}
+    )
+    [month] = resp.json()
+    assert (month["start_date"], month["end_date"], month["days"]) == (
+        "2025-03-01",
+        "2025-03-31",
+        9,
+    )
+
+
+def test_only_buckets_of_changed_days_are_rebuilt(db_session):
+    summaries = [day(i, 10_000) for i in range(14)]
+    upsert_summaries(db_session, summaries)
+    db_session.flush()
+    before = {k: (r.score_sum, r.updated_at) for k, r in rollups(db_session).items()}
+
+    # Re-syncing unchanged days touches nothing
+    assert apply_summaries(db_session, summaries) == 0
+
+    assert apply_summaries(db_session, [day(10, 0, 0)]) == 1
+    after = rollups(db_session)
+    assert after[("week", MONDAY)].updated_at == before[("week", MONDAY)][1]
+    assert (
+        after[("week", MONDAY + timedelta(days=7))].score_sum
+        < before[("week", MONDAY + timedelta(days=7))][0]
+    )
+    assert after[("week", MONDAY + timedelta(days=7))].score_min == 0.4
+
+    # A full rebuild agrees with the incrementally maintained rows
+    incremental = {
+        k: (r.days, r.score_sum, r.score_min, r.score_max, r.longest_streak)
+        for k, r in after.items()
+    }
+    rebuild_all(db_session)
+    db_session.flush()
+    db_session.expire_all()
+    rebuilt = {
+        k: (r.days, r.score_sum, r.score_min, r.score_max, r.longest_streak)
+        for k, r in rollups(db_session).items()
+    }
+    assert rebuilt == incremental
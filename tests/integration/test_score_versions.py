@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import pytest
+
+from app.gsi.activity_score.calculator import ActivityScoreCalculatorV1, ActivityScoreCalculatorV2
+from app.gsi.activity_score.deps import get_calculator_registry, get_fitbit_daily_summary_provider
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.gsi.activity_score.registry import CalculatorRegistry
+from app.main import app
+
+BASE = "/api/v1/gsi/activity-score"
+
+
+class CountingProvider(FitbitDailySummaryProvider):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get_daily_activity_summary(self, date):
+        self.calls += 1
+        return FitbitDailySummary(date=date, steps=12_500, active_zone_minutes=85)
+
+    async def get_daily_activity_summaries(self, start_date, end_date):
+        self.calls += 1
+        return [FitbitDailySummary(date=start_date, steps=12_500, active_zone_minutes=85)]
+
+
+@pytest.fixture
+def provider():
+    p = CountingProvider()
+    app.dependency_overrides[get_fitbit_daily_summary_provider] = lambda: p
+    yield p
+    app.dependency_overrides.pop(get_fitbit_daily_summary_provider, None)
+
+
+@pytest.mark.anyio
+async def test_versions_are_scored_from_one_fetch(async_client, provider):
+    resp = await async_client.get(
+        f"{BASE}/day/2025-01-15", params={"versions": "1.0.0,2.0.0", "prefetch": False}
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert provider.calls == 1
+    assert body["scores"]["1.0.0"]["score"] == 9  # floor + bonus + 4 step + 3 AZM points
+    assert body["scores"]["2.0.0"]["score"] == 5.0
+    assert body["scores"]["2.0.0"]["breakdown"]["version"] == "2.0.0"
+
+    resp = await async_client.get(
+        f"{BASE}/range",
+        params={"start_date": "2025-01-15", "end_date": "2025-01-15", "versions": "1.0.0"},
+    )
+    assert [set(day["scores"]) for day in resp.json()] == [{"1.0.0"}]
+
+    # Without versions the response is unchanged
+    resp = await async_client.get(f"{BASE}/day/2025-01-15", params={"prefetch": False})
+    assert resp.json()["score"] == 5.0
+
+
+@pytest.mark.anyio
+async def test_unknown_version_is_rejected_before_fetching(async_client, provider):
+    resp = await async_client.get(f"{BASE}/day/2025-01-15", params={"versions": "9.9.9"})
+    assert resp.status_code == 400
+    assert provider.calls == 0
+
+
+@pytest.mark.anyio
+async def test_default_version_applies_to_every_route(async_client, provider):
+    registry = CalculatorRegistry(
+        [ActivityScoreCalculatorV1(), ActivityScoreCalculatorV2()], default="1.0.0"
+    )
+    app.dependency_overrides[get_calculator_registry] = lambda: registry
+    try:
+        day = await async_client.get(f"{BASE}/day/2025-01-15", params={"prefetch": False})
+        days = await async_client.get(
+            f"{BASE}/range", params={"start_date": "2025-01-15", "end_date": "2025-01-15"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_calculator_registry, None)
+
+    assert day.json()["breakdown"]["version"] == "1.0.0"
+    assert [d["breakdown"]["version"] for d in days.json()] == ["1.0.0"]
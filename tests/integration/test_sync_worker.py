@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import time
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.gsi.activity_score.deps import get_fitbit_daily_summary_provider
+from app.gsi.activity_score.models import FitbitDailySummary
+from app.gsi.activity_score.provider import FitbitDailySummaryProvider
+from app.gsi.activity_score.provider_local_impl import LocalDailySummaryProvider
+from app.gsi.activity_score.store import get_checkpoint
+from app.integrations.fitbit_client import RateLimitState
+from app.main import app
+from app.models import Base, FitbitDailySummaryRecord
+from app.workers.sync import BACKFILL_CHECKPOINT, FitbitSyncWorker
+
+TODAY = date(2025, 3, 31)
+
+
+class FakeProvider(FitbitDailySummaryProvider):
+    """Deterministic upstream that spends rate-limit budget like the real one."""
+
+    def __init__(self, rate_limit: RateLimitState | None = None):
+        self.fetched: list[date] = []
+        self.rate_limit = rate_limit
+
+    @staticmethod
+    def summary(d: date) -> FitbitDailySummary:
+        return FitbitDailySummary(date=d, steps=d.toordinal() % 15_000, active_zone_minutes=d.day)
+
+    async def get_daily_activity_summary(self, date):
+        return (await self.get_daily_activity_summaries(date, date))[0]
+
+    async def get_daily_activity_summaries(self, start_date, end_date):
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        if self.rate_limit is not None:
+            assert self.rate_limit.remaining is not None
+            assert self.rate_limit.remaining >= 2 * len(days), "worker overspent its budget"
+            self.rate_limit.remaining -= 2 * len(days)
+        self.fetched.extend(days)
+        return [self.summary(d) for d in days]
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, future=True, expire_on_commit=False)
+
+
+def make_worker(provider, local_db, rate_limit=None, **kwargs) -> FitbitSyncWorker:
+    options = dict(recent_days=3, backfill_days=10, chunk_days=4, min_remaining=0)
+    options.update(kwargs)
+    return FitbitSyncWorker(
+        provider,
+        local_db,
+        rate_limit=rate_limit or RateLimitState(),
+        today=lambda: TODAY,
+        **options,
+    )
+
+
+def stored_dates(local_db) -> list[date]:
+    with local_db() as db:
+        return list(
+            db.scalars(
+                select(FitbitDailySummaryRecord.date).order_by(FitbitDailySummaryRecord.date)
+            )
+        )
+
+
+@pytest.mark.anyio
+async def test_recent_sync_and_full_backfill(local_db):
+    provider = FakeProvider()
+    report = await make_worker(provider, local_db).run_once()
+
+    assert report.recent_days == 3
+    assert report.backfilled_days == 8
+    assert report.backfill_complete
+    assert stored_dates(local_db) == [TODAY - timedelta(days=i) for i in range(10, -1, -1)]
+    with local_db() as db:
+        assert get_checkpoint(db, BACKFILL_CHECKPOINT) == TODAY - timedelta(days=10)
+
+    # A second pass only refreshes the recent window
+    provider.fetched.clear()
+    report = await make_worker(provider, local_db).run_once()
+    assert report.backfilled_days == 0
+    assert sorted(provider.fetched) == [TODAY - timedelta(days=i) for i in range(2, -1, -1)]
+
+
+@pytest.mark.anyio
+async def test_backfill_respects_rate_limit_and_resumes_from_checkpoint(local_db):
+    rate_limit = RateLimitState(remaining=2 * (3 + 4) + 10, reset_at=time.monotonic() + 3600)
+    provider = FakeProvider(rate_limit)
+    report = await make_worker(provider, local_db, rate_limit, min_remaining=10).run_once()
+
+    assert report.paused_for_rate_limit
+    assert not report.backfill_complete
+    assert report.backfilled_days == 4
+    assert rate_limit.remaining == 10  # reserve left untouched
+
+    # "Restart" with a fresh quota: no day is fetched twice
+    rate_limit.remaining = 1_000
+    provider.fetched.clear()
+    report = await make_worker(provider, local_db, rate_limit, min_remaining=10).run_once()
+    assert report.backfill_complete
+    backfilled = [d for d in provider.fetched if d < TODAY - timedelta(days=2)]
+    assert backfilled == [TODAY - timedelta(days=i) for i in range(10, 6, -1)]
+    assert len(stored_dates(local_db)) == 11
+
+
+@pytest.mark.anyio
+async def test_handlers_read_only_local_data(async_client, local_db):
+    await make_worker(FakeProvider(), local_db, backfill_days=3).run_once()
+    app.dependency_overrides[get_fitbit_daily_summary_provider] = lambda: LocalDailySummaryProvider(
+        local_db
+    )
+    try:
+        resp = await async_client.get(f"/api/v1/gsi/activity-score/day/{TODAY.isoformat()}")
+        assert resp.status_code == 200
+        assert resp.json()["steps"] == FakeProvider.summary(TODAY).steps
+
+        resp = await async_client.get("/api/v1/gsi/activity-score/day/2020-01-01")
+        assert resp.status_code == 404
+
+        resp = await async_client.get(
+            "/api/v1/gsi/activity-score/range",
+            params={
+                "start_date": (TODAY - timedelta(days=10)).isoformat(),
+                "end_date": TODAY.isoformat(),
+            },
+        )
+        assert [r["date"] for r in resp.json()][0] == (TODAY - timedelta(days=3)).isoformat()
+    finally:
+        app.dependency_overrides.pop(get_fitbit_daily_summary_provider, None)
+
+    with local_db() as db:
+        assert db.scalar(select(func.count()).select_from(FitbitDailySummaryRecord)) == 4
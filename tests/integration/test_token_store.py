@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import fitbit as fitbit_api
+from app.config import get_settings
+from app.crypto import get_token_cipher
+from app.integrations.fitbit_client import FitbitClient, FitbitTokens
+from app.integrations.fitbit_tokens import FitbitTokenStore, TokenNotFoundError, token_store
+from app.models import Base
+from app.workers.token_sweeper import TokenSweeper
+
+NOW = datetime(2025, 3, 31, 12, 0)
+
+
+class TokenEndpoint:
+    """Fitbit's OAuth token endpoint: rotates tokens and tracks concurrency."""
+
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+        self.calls: list[str] = []
+        self.active = 0
+        self.max_active = 0
+        self.failing: set[str] = set()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        form = dict(x.split("=") for x in request.content.decode().split("&"))
+        old = form["refresh_token"]
+        self.calls.append(old)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay_s)
+        finally:
+            self.active -= 1
+        if old in self.failing:
+            return httpx.Response(400, json={"errors": [{"errorType": "invalid_grant"}]})
+        return httpx.Response(
+            200,
+            json={
+                "access_token": f"access-{old}+",
+                "refresh_token": f"{old}+",
+                "expires_in": 28800,
+                "scope": "activity",
+            },
+        )
+
+
+@pytest.fixture
+def local_db(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'tokens.db'}")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, future=True, expire_on_commit=False)
+
+
+@pytest.fixture
+def endpoint():
+    return TokenEndpoint()
+
+
+@pytest.fixture
+def store(local_db, endpoint):
+    client = FitbitClient(
+        "cid",
+        "http://test/cb",
+        api_base="http://fitbit",
+        transport=httpx.MockTransport(endpoint.handler),
+    )
+    return FitbitTokenStore(local_db, lambda: client, refresh_skew_s=300, clock=lambda: NOW)
+
+
+def tokens(name: str, expires_in: int) -> FitbitTokens:
+    return FitbitTokens(
+        access_token=f"access-{name}",
+        refresh_token=name,
+        expires_in=expires_in,
+        scope="activity",
+        user_id=name,
+    )
+
+
+def test_tokens_are_encrypted_at_rest(store, local_db):
+    store.save("U1", tokens("refresh-secret", 3600))
+
+    with local_db() as db:
+        access, refresh = db.execute(
+            text("SELECT access_token, refresh_token FROM fitbit_token")
+        ).one()
+    assert "refresh-secret" not in access + refresh
+    assert store.load("U1").refresh_token == "refresh-secret"
+
+    with pytest.raises(TokenNotFoundError):
+        store.load("nobody")
+
+
+@pytest.mark.anyio
+async def test_access_token_is_refreshed_only_near_expiry(store, endpoint):
+    store.save("fresh", tokens("fresh", 3600))
+    store.save("expiring", tokens("expiring", 60))
+    store.forget()
+
+    assert await store.get_access_token("fresh") == "access-fresh"
+    assert endpoint.calls == []
+
+    # Concurrent callers share one refresh (the refresh token is single-use)
+    results = await asyncio.gather(*(store.get_access_token("expiring") for _ in range(5)))
+    assert set(results) == {"access-expiring+"}
+    assert endpoint.calls == ["expiring"]
+    assert store.load("expiring").refresh_token == "expiring+"
+
+
+@pytest.mark.anyio
+async def test_sweeper_refreshes_due_tokens_in_bounded_batches(store, endpoint, local_db):
+    endpoint.delay_s = 0.01
+    for i in range(7):
+        store.save(f"due{i}", tokens(f"due{i}", 600))
+    store.save("later", tokens("later", 7200))
+    store.save("broken", tokens("broken", 60))
+    endpoint.failing.add("broken")
+
+    sweeper = TokenSweeper(store, horizon_s=900, batch_size=3, concurrency=2)
+    report = await sweeper.sweep_once()
+
+    assert sorted(endpoint.calls) == ["broken"] + [f"due{i}" for i in range(7)]
+    assert endpoint.max_active <= 2
+    assert (report.due, report.refreshed, report.failed, report.batches) == (8, 7, 1, 3)
+    with local_db() as db:
+        failures = db.execute(
+            text("SELECT refresh_failures FROM fitbit_token WHERE user_id = 'broken'")
+        ).scalar()
+    assert failures == 1
+
+    # Everything refreshed is now past the horizon; only the broken token is still due
+    endpoint.calls.clear()
+    await sweeper.sweep_once()
+    assert endpoint.calls == ["broken"]
+
+
+@pytest.mark.anyio
+async def test_oauth_callback_works_without_token_encryption_keys(
+    async_client, local_db, monkeypatch, caplog
+):
+    async def token_endpoint(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            json={
+                "access_token": "access",
+                "refresh_token": "refresh",
+                "expires_in": 28800,
+                "scope": "activity",
+                "user_id": "U1",
+            },
+        )
+
+    client = FitbitClient(
+        "cid",
+        "http://test/cb",
+        api_base="http://fitbit",
+        transport=httpx.MockTransport(token_endpoint),
+    )
+    monkeypatch.setattr(fitbit_api, "_get_fitbit_client", lambda: client)
+    monkeypatch.setattr(token_store, "_session_factory", local_db)
+    monkeypatch.setattr(get_settings(), "token_encryption_keys", "")
+    monkeypatch.setitem(fitbit_api._pkce_store, "state", {"verifier": "v", "created_at": 0.0})
+    get_token_cipher.cache_clear()
+    try:
+        resp = await async_client.get(
+            "/api/v1/fitbit/auth/callback", params={"code": "c", "state": "state"}
+        )
+    finally:
+        get_token_cipher.cache_clear()
+
+    assert resp.status_code == 200
+    assert resp.json()["user_id"] == "U1"
+    assert fitbit_api.secrets_store.read("fitbit_refresh_token", cache=False) == "refresh"
+    assert "Could not store Fitbit tokens for user U1" in caplog.text
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionGate, AdmissionPolicy, Shed
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_gate(clock=None, **kwargs) -> AdmissionGate:
+    options = dict(limit=1, max_queue=2, target_delay_s=0.1, interval_s=1.0, max_wait_s=5.0)
+    options.update(kwargs)
+    return AdmissionGate("test", clock=clock or FakeClock(), **options)
+
+
+@pytest.mark.anyio
+async def test_limit_queue_and_fifo_handoff():
+    gate = make_gate(max_queue=1)
+    await gate.acquire()
+    queued = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(Shed) as exc:
+        await gate.acquire()
+    assert exc.value.reason == "queue full"
+    assert exc.value.retry_after_s >= 1
+
+    gate.release()
+    await queued
+    assert gate.snapshot()["active"] == 1
+
+
+@pytest.mark.anyio
+async def test_standing_queue_switches_to_fast_shedding():
+    clock = FakeClock()
+    gate = make_gate(clock)
+    await gate.acquire()
+
+    # Two admissions a full interval apart, both after waiting above the target
+    for _ in range(2):
+        waiter = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+        clock.now += 1.0
+        gate.release()
+        await waiter
+    assert gate.dropping
+
+    with pytest.raises(Shed) as exc:
+        await gate.acquire()
+    assert exc.value.reason == "standing queue above target delay"
+
+    # Once a request gets through without queueing, shedding stops
+    gate.release()
+    await gate.acquire()
+    assert not gate.dropping
+
+
+@pytest.mark.anyio
+async def test_wait_timeout_and_cancelled_waiters_free_their_place():
+    gate = make_gate(max_wait_s=0.01)
+    await gate.acquire()
+    with pytest.raises(Shed) as exc:
+        await gate.acquire()
+    assert exc.value.reason == "queue wait too long"
+
+    gate.max_wait_s = 5.0
+    waiter = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    gate.release()
+    assert gate.snapshot()["active"] == 0
+    assert gate.snapshot()["queued_now"] == 0
+
+
+def test_policy_classifies_paths():
+    gates = {"expensive": make_gate(), "interactive": make_gate()}
+    policy = AdmissionPolicy(
+        gates,
+        default="interactive",
+        path_classes=[("/api/v1/gsi/activity-score/range", "expensive")],
+        critical_paths=["/info", "/ready"],
+    )
+    assert policy.gate_for("/info") is None
+    assert policy.gate_for("/ready") is None
+    assert policy.gate_for("/api/v1/gsi/activity-score/range") is gates["expensive"]
+    assert policy.gate_for("/api/v1/greetings/") is gates["interactive"]
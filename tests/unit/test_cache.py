@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from app.cache import TTLCache
+from app.integrations.emulators.secret_manager import FakeSecretManagerClient
+from app.integrations.secret_store import SecretStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_expiry_and_lru_eviction():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl_s=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)  # evicts "b"
+    assert "b" not in cache
+    assert cache.get("c") == 3
+
+    clock.now = 11
+    assert cache.get("a") is None
+    cache.set("forever", 0, ttl_s=None)
+    clock.now = 1_000_000
+    assert cache.get("forever") == 0
+    assert cache.stats.evictions == 1
+
+
+class CountingClient(FakeSecretManagerClient):
+    def __init__(self, seed):
+        super().__init__(seed)
+        self.reads = 0
+
+    def access_secret_version(self, request):
+        self.reads += 1
+        return super().access_secret_version(request)
+
+
+def test_secret_store_caches_reads_and_sees_own_writes():
+    client = CountingClient({"fitbit_client_id": "abc", "fitbit_refresh_token": "r0"})
+    store = SecretStore("proj", client=client, cache_ttl_s=60)
+
+    store.warm("fitbit_client_id")
+    for _ in range(5):
+        assert store.read("fitbit_client_id") == "abc"
+    assert client.reads == 1
+
+    store.write_new_version("fitbit_refresh_token", "r1")
+    assert store.read("fitbit_refresh_token") == "r1"
+    assert store.read("fitbit_refresh_token", cache=False) == "r1"
+    assert client.reads == 2
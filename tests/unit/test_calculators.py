@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from app.gsi.activity_score.calculator import (
+    _V1_AZM_POINTS,
+    _V1_STEPS_POINTS,
+    _V2_AZM_SIGNAL,
+    _V2_STEPS_SIGNAL,
+    ActivityScoreCalculatorV1,
+    ActivityScoreCalculatorV2,
+)
+from app.gsi.activity_score.models import (
+    ActivityScoreBreakdown,
+    ActivityScoreResult,
+    FitbitDailySummary,
+    validate_summaries,
+)
+from app.gsi.activity_score.registry import CalculatorRegistry, UnknownCalculatorVersionError
+
+
+@pytest.mark.parametrize(
+    ("table", "reference", "domain"),
+    [
+        (_V2_STEPS_SIGNAL, ActivityScoreCalculatorV2._calculate_steps_signal, 30_000),
+        (_V2_AZM_SIGNAL, ActivityScoreCalculatorV2._calculate_azm_signal, 1_440),
+        (_V1_STEPS_POINTS, ActivityScoreCalculatorV1._steps_points, 30_000),
+        (_V1_AZM_POINTS, ActivityScoreCalculatorV1._azm_points, 1_440),
+    ],
+)
+def test_lookup_tables_match_threshold_definitions(table, reference, domain):
+    xs = range(-100, domain)
+    assert [table(x) for x in xs] == [reference(x) for x in xs]
+
+
+def test_negative_inputs_do_not_index_from_the_end_of_a_table():
+    assert _V1_AZM_POINTS(-5) == ActivityScoreCalculatorV1._azm_points(-5) == 0
+
+
+def test_registry_resolves_versions_in_request_order():
+    v1, v2 = ActivityScoreCalculatorV1(), ActivityScoreCalculatorV2()
+    registry = CalculatorRegistry([v1, v2], default="2.0.0")
+
+    assert registry.get() is v2
+    assert registry.resolve("2.0.0, 1.0.0,2.0.0") == [v2, v1]
+    with pytest.raises(UnknownCalculatorVersionError, match="available: 1.0.0, 2.0.0"):
+        registry.resolve("3.0.0")
+
+
+def test_v2_score_for_a_typical_day():
+    result = ActivityScoreCalculatorV2().calculate(
+        FitbitDailySummary(date=date(2025, 1, 1), steps=6_000, active_zone_minutes=100)
+    )
+    # 0.75 * 5 * 0.6 + 0.77 * 5 * 0.4
+    assert result.score == 3.79
+
+
+def _days(n: int) -> list[FitbitDailySummary]:
+    start = date(2024, 1, 1)
+    return [
+        FitbitDailySummary(
+            date=start + timedelta(days=i), steps=(i * 389) % 16_000, active_zone_minutes=i % 130
+        )
+        for i in range(n)
+    ]
+
+
+def _reference(calculator, day: FitbitDailySummary) -> ActivityScoreResult:
+    # Per-day models, as calculate() built them before results were validated in batches
+    *_, steps_points, azm_points, _, score = calculator._points(day.steps, day.active_zone_minutes)
+    return ActivityScoreResult(
+        date=day.date,
+        score=score,
+        breakdown=ActivityScoreBreakdown(
+            version=calculator.version, steps_points=steps_points, azm_points=azm_points
+        ),
+        steps=day.steps,
+        active_zone_minutes=day.active_zone_minutes,
+    )
+
+
+@pytest.mark.parametrize(
+    "calculator", [ActivityScoreCalculatorV1(), ActivityScoreCalculatorV2()], ids=["v1", "v2"]
+)
+def test_batch_results_match_per_day_models(calculator):
+    days = _days(1_000)
+    expected = [_reference(calculator, d) for d in days]
+
+    batch = calculator.calculate_many(days)
+
+    assert batch == expected == [calculator.calculate(d) for d in days]
+    assert [r.model_dump_json() for r in batch] == [r.model_dump_json() for r in expected]
+    assert [r.score for r in batch] == [
+        calculator.score(d.steps, d.active_zone_minutes) for d in days
+    ]
+
+
+def test_batch_results_carry_the_stale_flag():
+    day = FitbitDailySummary(date=date(2025, 1, 1), steps=9_000, active_zone_minutes=45, stale=True)
+    assert ActivityScoreCalculatorV2().calculate_many([day])[0].stale
+    assert ActivityScoreCalculatorV2().calculate(day).stale
+
+
+def test_summaries_validate_in_one_call_like_per_row():
+    rows = [
+        {"date": d.date, "steps": d.steps, "active_zone_minutes": d.active_zone_minutes}
+        for d in _days(100)
+    ]
+    assert validate_summaries(rows) == [FitbitDailySummary(**r) for r in rows]
+    assert validate_summaries(iter(rows[:3])) == _days(3)
+
+    rows[42] = {**rows[42], "steps": -1}
+    with pytest.raises(ValidationError, match=r"42\.steps"):
+        validate_summaries(rows)
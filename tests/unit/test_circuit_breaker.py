@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.integrations.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://fitbit/1/user/-/profile.json")
+    return httpx.HTTPStatusError(
+        "boom", request=request, response=httpx.Response(status, request=request)
+    )
+
+
+def raising(exc: BaseException):
+    async def _fn():
+        raise exc
+
+    return _fn
+
+
+async def ok():
+    return "ok"
+
+
+@pytest.mark.anyio
+async def test_opens_after_consecutive_failures_and_fails_fast():
+    clock = FakeClock()
+    breaker = CircuitBreaker("sleep", failure_threshold=2, reset_timeout_s=30, clock=clock)
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectTimeout):
+            await breaker.call(raising(httpx.ConnectTimeout("slow")))
+    assert breaker.state == "open"
+
+    called = False
+
+    async def never():
+        nonlocal called
+        called = True
+
+    clock.now = 10
+    with pytest.raises(CircuitOpenError) as exc:
+        await breaker.call(never)
+    assert not called
+    assert exc.value.retry_after_s == 20
+    assert breaker.snapshot()["rejected"] == 1
+
+
+@pytest.mark.anyio
+async def test_half_open_probe_closes_or_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker("sleep", failure_threshold=1, reset_timeout_s=30, clock=clock)
+    with pytest.raises(httpx.HTTPStatusError):
+        await breaker.call(raising(_status_error(503)))
+
+    clock.now = 31
+    assert breaker.state == "half_open"
+    with pytest.raises(httpx.HTTPStatusError):
+        await breaker.call(raising(_status_error(502)))
+    assert breaker.state == "open"  # failed probe: wait another full reset period
+
+    clock.now = 45
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(ok)
+
+    clock.now = 62
+    assert await breaker.call(ok) == "ok"
+    assert breaker.state == "closed"
+
+
+@pytest.mark.anyio
+async def test_client_errors_do_not_trip_the_breaker():
+    breaker = CircuitBreaker("profile", failure_threshold=1)
+    for status in (401, 404, 429):
+        with pytest.raises(httpx.HTTPStatusError):
+            await breaker.call(raising(_status_error(status)))
+    assert breaker.state == "closed"
+
+
+@pytest.mark.anyio
+async def test_calls_past_their_timeout_count_as_failures():
+    breaker = CircuitBreaker("activities", failure_threshold=2)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            await breaker.call(slow, timeout_s=0.01)
+    assert breaker.state == "open"
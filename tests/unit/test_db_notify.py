@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.db_notify import PgNotifyListener
+from app.greeting_cache import NOT_FOUND, GreetingCache
+
+
+class FakePgConnection:
+    """What the listener uses of a psycopg2 connection, readable through a socket pair."""
+
+    def __init__(self):
+        self._server, self._client = socket.socketpair()
+        self._client.setblocking(False)
+        self.notifies: list[SimpleNamespace] = []
+        self.closed = False
+
+    def send(self, *payloads: str) -> None:
+        self.notifies.extend(SimpleNamespace(payload=p) for p in payloads)
+        self._server.send(b"x")
+
+    def drop(self) -> None:
+        self._server.close()
+
+    def fileno(self) -> int:
+        return self._client.fileno()
+
+    def poll(self) -> None:
+        try:
+            data = self._client.recv(64)
+        except BlockingIOError:
+            return
+        if not data:
+            raise OSError("server closed the connection")
+
+    def close(self) -> None:
+        self.closed = True
+        self._client.close()
+
+
+async def _until(predicate) -> None:
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.anyio
+async def test_listener_delivers_payloads_and_reconnects():
+    conns = [FakePgConnection(), FakePgConnection()]
+    pending = iter(conns)
+    received, connects = [], []
+    listener = PgNotifyListener(
+        "greeting_cache",
+        received.append,
+        on_connect=lambda: connects.append(1),
+        connect=lambda: next(pending),
+        retry_s=0,
+    )
+    task = asyncio.create_task(listener.run_forever())
+    try:
+        await _until(lambda: connects)
+        conns[0].send("a", "b")
+        await _until(lambda: received == ["a", "b"])
+
+        conns[0].drop()
+        await _until(lambda: len(connects) == 2)
+        assert conns[0].closed and listener.reconnects == 1
+
+        conns[1].send("c")
+        await _until(lambda: received == ["a", "b", "c"])
+        assert listener.snapshot()["received"] == 3
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    assert conns[1].closed
+
+
+@pytest.mark.anyio
+async def test_listener_exits_without_postgres():
+    await asyncio.wait_for(
+        PgNotifyListener("greeting_cache", print, connect=lambda: None).run_forever(), 1
+    )
+
+
+def test_greeting_cache_skips_fills_right_after_an_invalidation():
+    cache = GreetingCache(maxsize=8, ttl_s=60, negative_ttl_s=5, recent_write_window_s=60)
+    fresh, written = uuid.uuid4(), uuid.uuid4()
+
+    cache.fill(fresh, NOT_FOUND)
+    assert cache.get(fresh) == NOT_FOUND
+
+    cache.invalidate_payload(str(written))
+    cache.fill(written, b'{"message": "old"}')  # e.g. read from a lagging replica
+    assert cache.get(written) is None
+
+    cache.invalidate_payload("not-a-uuid")
+    assert cache.get(fresh) is None
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy import exc as sa_exc
+
+from app import db_pool
+from app.config import Settings
+from app.db_pool import InstrumentedQueuePool, compute_pool_sizing, install_idle_ping, pool_stats
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite+pysqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=2,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_static_sizing_uses_settings():
+    assert compute_pool_sizing(Settings(db_pool_size=7, db_max_overflow=3)) == (7, 3)
+
+
+def test_budget_sizing_splits_connections_across_processes():
+    settings = Settings(
+        db_pool_mode="budget", db_connection_budget=90, db_max_instances=10, web_concurrency=2
+    )
+    assert compute_pool_sizing(settings) == (4, 0)
+
+    with pytest.raises(ValueError):
+        compute_pool_sizing(
+            Settings(db_pool_mode="budget", db_connection_budget=5, db_max_instances=10)
+        )
+
+
+def test_pool_stats_report_saturation_and_overflow(pooled_engine):
+    conns = [pooled_engine.connect() for _ in range(3)]
+    stats = pool_stats(pooled_engine)
+    assert stats["checked_out"] == 3
+    assert stats["overflow_in_use"] == 1
+    assert stats["saturation"] == 1.0
+
+    with pytest.raises(sa_exc.TimeoutError):
+        pooled_engine.connect()  # pool exhausted after pool_timeout
+
+    for c in conns:
+        c.close()
+    stats = pool_stats(pooled_engine)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 3
+    assert stats["timeouts"] == 1
+    assert stats["peak_overflow"] == 1
+    assert stats["max_wait_ms"] >= 0
+
+
+def test_idle_ping_only_for_idle_connections(pooled_engine, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(db_pool.time, "monotonic", lambda: clock[0])
+    install_idle_ping(pooled_engine, idle_threshold_s=30)
+
+    with pooled_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    clock[0] += 5
+    with pooled_engine.connect() as conn:  # recently used -> no ping
+        conn.execute(text("SELECT 1"))
+    assert pooled_engine.pool.telemetry.liveness_pings == 0
+
+    clock[0] += 60
+    with pooled_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert pooled_engine.pool.telemetry.liveness_pings == 1
+
+
+def test_failed_ping_replaces_connection(pooled_engine, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(db_pool.time, "monotonic", lambda: clock[0])
+    install_idle_ping(pooled_engine, idle_threshold_s=30)
+    with pooled_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    calls = []
+
+    def flaky_ping(dbapi_connection):
+        calls.append(dbapi_connection)
+        if len(calls) == 1:
+            raise RuntimeError("server closed the connection")
+
+    monkeypatch.setattr(db_pool, "_ping", flaky_ping)
+    clock[0] += 60
+    with pooled_engine.connect() as conn:  # stale connection is discarded, fresh one handed out
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    assert pooled_engine.pool.telemetry.liveness_failures == 1
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.gsi.activity_score.heartrate import (  # noqa: E402
+    DEFAULT_ZONES,
+    HeartRateSeries,
+    active_zone_minutes,
+)
+
+
+def payload(
+    samples: list[tuple[str, int]], zones: tuple[int, int, int] | None = (100, 140, 170)
+) -> dict:
+    heart = {"dateTime": "2025-01-15", "value": {"heartRateZones": []}}
+    if zones:
+        names = ("Out of Range", "Fat Burn", "Cardio", "Peak")
+        bounds = (30, *zones, 220)
+        heart["value"]["heartRateZones"] = [
+            {"name": n, "min": lo, "max": hi}
+            for n, lo, hi in zip(names, bounds, bounds[1:], strict=False)
+        ]
+    return {
+        "activities-heart": [heart],
+        "activities-heart-intraday": {"dataset": [{"time": t, "value": v} for t, v in samples]},
+    }
+
+
+def test_zone_minutes_use_per_minute_means_and_payload_bounds():
+    samples = [
+        ("06:00:00", 60),
+        ("06:00:30", 62),  # resting minute
+        ("12:00:10", 95),
+        ("12:00:40", 105),  # mean 100: Fat Burn starts at 100
+        ("12:01:00", 150),  # Cardio
+        ("12:02:00", 171),
+        ("12:02:59", 175),  # Peak
+        ("00:00:05", 58),  # out of order
+    ]
+    series = HeartRateSeries.from_payload(payload(samples))
+    assert series.zones == (100, 140, 170)
+    assert series.seconds[0] == 5 and len(series) == 8
+
+    zones = series.zone_minutes()
+    assert zones == {"fat_burn": 1, "cardio": 1, "peak": 1}
+    assert active_zone_minutes(zones) == 5
+    assert series.resting_heart_rate() == pytest.approx(
+        np.percentile([58, 61, 100, 150, 173], 5), abs=0.05
+    )
+
+
+def test_blob_round_trip_and_downsampling():
+    seconds = np.arange(0, 86_400, 7, dtype=np.uint32)
+    bpm = (70 + (seconds // 600) % 60).astype(np.uint8)
+    series = HeartRateSeries(seconds, bpm, (98, 137, 166))
+
+    blob = series.to_blob()
+    assert len(blob) < seconds.size  # well under a byte per sample
+    restored = HeartRateSeries.from_blob(blob)
+    assert np.array_equal(restored.seconds, seconds) and np.array_equal(restored.bpm, bpm)
+    assert restored.zones == (98, 137, 166)
+
+    buckets = series.downsample(3600)
+    assert len(buckets["t"]) == 24 and buckets["t"][1] == 3600
+    first_hour = bpm[seconds < 3600]
+    assert buckets["min"][0] == first_hour.min() and buckets["max"][0] == first_hour.max()
+    assert buckets["mean"][0] == round(float(first_hour.mean()), 1)
+
+    record = series.to_record(date(2025, 1, 15))
+    assert record.samples == seconds.size and record.active_zone_minutes == active_zone_minutes(
+        series.zone_minutes()
+    )
+
+
+def test_empty_or_zoneless_payloads():
+    series = HeartRateSeries.from_payload(payload([], zones=None))
+    assert len(series) == 0 and series.zones == DEFAULT_ZONES
+    assert series.resting_heart_rate() is None
+    assert series.zone_minutes() == {"fat_burn": 0, "cardio": 0, "peak": 0}
+    assert series.downsample(60)["t"] == []
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import date, datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from app.gsi.activity_score.calculator import ActivityScoreCalculatorV2
+from app.gsi.activity_score.models import ActivityScoreResult, FitbitDailySummary
+from app.models import Greeting
+from app.responses import FastJSONResponse, model_response
+from app.schemas import GreetingRead
+
+
+def test_model_response_matches_default_encoding():
+    results = [
+        ActivityScoreCalculatorV2().calculate(
+            FitbitDailySummary(date=date(2025, 1, d), steps=d * 1000, active_zone_minutes=d)
+        )
+        for d in range(1, 4)
+    ]
+    resp = model_response(results, list[ActivityScoreResult])
+    assert resp.media_type == "application/json"
+    assert json.loads(resp.body) == jsonable_encoder(results)
+
+
+def test_model_response_converts_orm_rows_once():
+    row = Greeting(
+        id=uuid.uuid4(),
+        sender="a",
+        recipient="b",
+        message="hi",
+        created_at=datetime(2025, 1, 1, 8, 30),
+    )
+    body = json.loads(model_response([row], list[GreetingRead], from_attributes=True).body)
+    assert body == [
+        {
+            "id": str(row.id),
+            "sender": "a",
+            "recipient": "b",
+            "message": "hi",
+            "created_at": "2025-01-01T08:30:00",
+        }
+    ]
+
+
+def test_fast_json_response_renders_passthrough_payloads():
+    assert json.loads(FastJSONResponse({"activities": [], 1: "x"}).body) == {
+        "activities": [],
+        "1": "x",
+    }
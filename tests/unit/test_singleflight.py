@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+
+import httpx
+import pytest
+
+from app.integrations.fitbit_client import FitbitClient
+from app.integrations.singleflight import SingleFlight
+
+
+class Upstream:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def fetch(self) -> dict:
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {"n": self.calls}
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_execution():
+    flight: SingleFlight[dict] = SingleFlight()
+    upstream = Upstream()
+    waiters = [asyncio.create_task(flight.do("k", upstream.fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    upstream.release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert upstream.calls == 1
+    assert all(r is results[0] for r in results)
+    assert flight.snapshot()["coalesced"] == 4
+    assert flight.in_flight() == 0
+
+    # Once finished, the next call goes upstream again
+    await flight.do("k", upstream.fetch)
+    assert upstream.calls == 2
+
+
+@pytest.mark.anyio
+async def test_cancelled_leader_does_not_fail_followers():
+    flight: SingleFlight[dict] = SingleFlight()
+    upstream = Upstream()
+    leader = asyncio.create_task(flight.do("k", upstream.fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("k", upstream.fetch))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    upstream.release.set()
+
+    assert await follower == {"n": 1}
+    assert leader.cancelled()
+    assert not upstream.cancelled
+
+
+@pytest.mark.anyio
+async def test_upstream_cancelled_when_every_waiter_leaves():
+    flight: SingleFlight[dict] = SingleFlight()
+    upstream = Upstream()
+    waiters = [asyncio.create_task(flight.do("k", upstream.fetch)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for w in waiters:
+        w.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert upstream.cancelled
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.anyio
+async def test_errors_reach_every_waiter():
+    flight: SingleFlight[dict] = SingleFlight()
+
+    async def boom() -> dict:
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream 503")
+
+    results = await asyncio.gather(
+        *(flight.do("k", boom) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.anyio
+async def test_fitbit_client_coalesces_same_resource():
+    hits: dict[str, int] = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hits[request.url.path] = hits.get(request.url.path, 0) + 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"summary": {"steps": 1}})
+
+    client = FitbitClient(
+        "cid", "http://test/cb", api_base="http://fitbit", transport=httpx.MockTransport(handler)
+    )
+    day = date(2025, 1, 15)
+    await asyncio.gather(
+        *(client.get_daily_activity_summary(f"token-{i}", day) for i in range(4)),
+        client.get_daily_activity_summary("token", date(2025, 1, 16)),
+    )
+    assert sorted(hits.values()) == [1, 1]